@@ -1,7 +1,6 @@
 
 # -*- coding: utf-8 -*-
-from utils.json_util import read_json, write_json
-import os
+from app.store import store
 
 class AppConfig:
     _instance = None
@@ -12,16 +11,22 @@ class AppConfig:
         return cls._instance
 
     def load(self):
-        self.data = read_json("app_config.json", default=self.default_config())
+        self.data = store.get_settings("app")
+        if not self.data:
+            self.data = self.default_config()
+            self.save()
+        self.data["db_profiles"] = store.list_profiles()
 
-    def save(self):
-        write_json("app_config.json", self.data)
+    def save(self, *keys):
+        """写回配置：指定键时只更新这几项，否则整体写回；db_profiles 由 ProfileManager 逐条保存在 profiles 表"""
+        data = {k: v for k, v in self.data.items() if k != "db_profiles" and (not keys or k in keys)}
+        store.set_settings("app", data, replace=not keys)
 
     def default_config(self):
         return {
             "admin": {"username": "admin", "password": "admin123"},
             "user_info": {"name": "", "age": "", "phone": "", "email": ""},
-            "db_saved": [],
+            "db_profiles": [],
             "settings": {"bg_image": "", "brightness": 1.0, "splash_image": ""}
         }
 
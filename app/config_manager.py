@@ -1,17 +1,21 @@
 # -*- coding: utf-8 -*-
-import json
-import os
 import datetime
+import atexit
+import threading
+from app.store import store
 
 
 class ConfigManager:
+    """应用配置、统计计数与历史命令：内存中保存一份，修改时只把变更的行写入 SQLite（见 app/store.py）"""
+
     def __init__(self):
-        # 配置文件路径
-        self.config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
-        # 统计数据路径
-        self.stats_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "stats.json")
-        # SSH历史命令路径
-        self.ssh_history_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ssh_history.json")
+        # 统计数据的写盘状态（见 increment_stat）
+        self.stats_lock = threading.RLock()
+        self.stats_write_lock = threading.Lock()
+        self.stats_timer = None
+        self.stats_dirty = set()  # 未写盘的计数名
+        self.stats_writes = 0  # 实际写盘次数
+        self.stats_avoided_writes = 0  # 被合并省去的写盘次数
 
         # 默认配置
         self.default_config = {
@@ -20,6 +24,36 @@ class ConfigManager:
             "brightness": 10,
             "sql_timeout": 30,
             "ssh_timeout": 10,
+            "profile_probe_interval": 30,  # 数据库连接配置探测间隔（秒）
+            "ssh_keepalive": 30,  # SSH会话保活间隔（秒）
+            "ssh_idle_timeout": 300,  # 无通道的SSH会话空闲回收时间（秒）
+            "ssh_probe_timeout": 10,  # 使用中的SSH会话探测应答超时（秒）
+            "ssh_probe_misses": 3,  # 连续这么多轮探测无应答才视为断开（繁忙的连接应答可能较慢）
+            "ssh_reconnect_max_delay": 60,  # SSH断线重连的最大退避间隔（秒）
+            "console_fps": 30,  # 输出控制台每秒刷新次数
+            "console_spool_lines": 20000,  # 控制台文本框最多显示的行数，超过后改为从临时文件按需显示
+            "capture_max_results": 5000,  # 输出搜索最多返回的匹配数
+            "cmd_encoding": "",  # CMD输出编码，留空自动识别（BOM/UTF-8/控制台代码页）
+            "cmd_shell_persistent": False,  # CMD页面在持久shell会话中执行命令
+            "ps1_shell_persistent": False,  # PS1页面在持久shell会话中执行命令
+            "batch_concurrency": 4,  # CMD/PS1批量执行的并发进程数
+            "batch_timeout": 300,  # 批量执行单项超时（秒）
+            "batch_retries": 0,  # 批量执行失败/超时后的重试次数
+            "pipeline_parallel": 4,  # 流水线中同时执行的步骤数上限
+            "usage_history_max": 500,  # CMD命令资源占用历史保留条数
+            "scheduler_workers": 4,  # 定时任务同时执行的任务数上限
+            "stats_flush_delay": 2,  # 统计计数合并写盘的延迟（秒）
+            "fanout_concurrency": 20,  # SSH批量执行并发数
+            "fanout_timeout": 60,  # SSH批量执行单机超时（秒）
+            "metrics_interval": 5,  # 主机监控采样间隔（秒）
+            "metrics_history": 720,  # 主机监控每台主机保留的采样点数
+            "sftp_parallel_files": 4,  # SFTP同时传输的文件数
+            "sftp_range_threads": 4,  # 大文件拆分的并发区间数
+            "sftp_range_min_mb": 16,  # 每个区间的最小大小（MB）
+            "sftp_window": 64,  # 每个区间同时在途的读写请求数（每个32KB）
+            "sftp_listing_ttl": 10,  # 远程目录列表缓存有效期（秒）
+            "sftp_page_size": 1000,  # 远程目录每页加载条数
+            "ssh_record_sessions": False,  # 录制SSH命令会话（recordings目录，输出可能含敏感信息，默认关闭）
             "log_level": "INFO",
             "auto_start": False,
             "remember_login": False
@@ -45,10 +79,6 @@ class ConfigManager:
             "max_count": 50  # 最多保存50条
         }
 
-        # 加载所有配置
-        self.load_config()
-        self.load_stats()
-        self.load_ssh_history()
         # 默认SQL历史命令
         self.default_sql_history = {
             "commands": [],
@@ -63,122 +93,125 @@ class ConfigManager:
 
     # ========== 基础配置 ==========
     def load_config(self):
-        try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, "r", encoding="utf-8") as f:
-                    self.config = json.load(f)
-            else:
-                self.config = self.default_config
-                self.save_config()
-        except:
-            self.config = self.default_config
+        self.config = store.get_settings("config")
+        if not self.config:
+            self.config = dict(self.default_config)
             self.save_config()
 
     def save_config(self):
-        with open(self.config_path, "w", encoding="utf-8") as f:
-            json.dump(self.config, f, ensure_ascii=False, indent=4)
+        """整体写回（一般用 set 只更新一项）"""
+        store.set_settings("config", self.config, replace=True)
 
     def get(self, key, default=None):
         return self.config.get(key, default or self.default_config.get(key))
 
     def set(self, key, value):
         self.config[key] = value
-        self.save_config()
+        store.set_setting("config", key, value)
 
     # ========== 统计数据 ==========
+    # 计数只改内存，首次变更后延迟 stats_flush_delay 秒合并写盘一次（期间的变更一起写入，只写变更的计数），
+    # 退出时再写一次；统计数据由工作线程（如 SQLThread）和界面线程同时更新，用锁保护
     def load_stats(self):
-        try:
-            if os.path.exists(self.stats_path):
-                with open(self.stats_path, "r", encoding="utf-8") as f:
-                    self.stats = json.load(f)
-            else:
-                self.stats = self.default_stats
-                self.save_stats()
-        except:
-            self.stats = self.default_stats
+        """启动时读取；之后以内存为准（数据库可能落后最多 stats_flush_delay 秒）"""
+        counters = store.get_counters()
+        with self.stats_lock:
+            self.stats = dict(self.default_stats)
+            self.stats.update(counters)
+            self.stats["last_update"] = store.get_settings("stats").get("last_update", self.stats["last_update"])
+        if not counters:
             self.save_stats()
 
     def save_stats(self):
-        self.stats["last_update"] = str(datetime.date.today())
-        with open(self.stats_path, "w", encoding="utf-8") as f:
-            json.dump(self.stats, f, ensure_ascii=False, indent=4)
+        """立即写盘"""
+        with self.stats_lock:
+            self.stats_dirty.update(k for k in self.stats if k != "last_update")
+        self.flush_stats()
+
+    def schedule_stats_flush(self, key):
+        """标记有未写盘的变更：已有待执行的写盘时合并进去，否则启动延迟写盘"""
+        with self.stats_lock:
+            pending = bool(self.stats_dirty)
+            self.stats_dirty.add(key)
+            if pending:
+                self.stats_avoided_writes += 1
+                return
+            self.stats_timer = threading.Timer(self.get("stats_flush_delay"), self.flush_stats)
+            self.stats_timer.daemon = True
+            self.stats_timer.start()
+
+    def flush_stats(self):
+        """把变更的计数写入数据库（无变更时不写）"""
+        with self.stats_write_lock:
+            with self.stats_lock:
+                if self.stats_timer is not None:
+                    self.stats_timer.cancel()
+                    self.stats_timer = None
+                if not self.stats_dirty:
+                    return
+                changed = {key: self.stats[key] for key in self.stats_dirty}
+                self.stats_dirty = set()
+                self.stats["last_update"] = str(datetime.date.today())
+            store.set_counters(changed)
+            store.set_setting("stats", "last_update", self.stats["last_update"])
+            self.stats_writes += 1
 
     def increment_stat(self, key):
-        """增加统计计数"""
-        if key in self.stats:
+        """增加统计计数（线程安全，延迟合并写盘）"""
+        with self.stats_lock:
+            if key not in self.stats:
+                return
             self.stats[key] += 1
-            self.save_stats()
+            self.schedule_stats_flush(key)
+
+    def reset_stats(self):
+        """重置统计数据并立即写盘"""
+        with self.stats_lock:
+            self.stats = dict(self.default_stats)
+        self.save_stats()
 
     def get_stat(self, key):
         return self.stats.get(key, 0)
 
     # ========== SSH历史命令 ==========
     def load_ssh_history(self):
-        try:
-            if os.path.exists(self.ssh_history_path):
-                with open(self.ssh_history_path, "r", encoding="utf-8") as f:
-                    self.ssh_history = json.load(f)
-            else:
-                self.ssh_history = self.default_ssh_history
-                self.save_ssh_history()
-        except:
-            self.ssh_history = self.default_ssh_history
-            self.save_ssh_history()
-
-    def save_ssh_history(self):
-        # 限制最大条数
-        if len(self.ssh_history["commands"]) > self.ssh_history["max_count"]:
-            self.ssh_history["commands"] = self.ssh_history["commands"][-self.ssh_history["max_count"]:]
-        with open(self.ssh_history_path, "w", encoding="utf-8") as f:
-            json.dump(self.ssh_history, f, ensure_ascii=False, indent=4)
+        self.ssh_history = dict(self.default_ssh_history, commands=store.get_history("ssh"))
 
     def add_ssh_history(self, command):
         """添加SSH历史命令"""
-        if command and command not in self.ssh_history["commands"]:
-            self.ssh_history["commands"].append(command)
-            self.save_ssh_history()
+        self.add_history(self.ssh_history, "ssh", command)
 
     def get_ssh_history(self):
         return self.ssh_history["commands"]
 
     def clear_ssh_history(self):
         self.ssh_history["commands"] = []
-        self.save_ssh_history()
+        store.clear_history("ssh")
 
     # ========== 新增SQL历史命令 ==========
     def load_sql_history(self):
-        try:
-            self.sql_history_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sql_history.json")
-            if os.path.exists(self.sql_history_path):
-                with open(self.sql_history_path, "r", encoding="utf-8") as f:
-                    self.sql_history = json.load(f)
-            else:
-                self.sql_history = self.default_sql_history
-                self.save_sql_history()
-        except:
-            self.sql_history = self.default_sql_history
-            self.save_sql_history()
-
-    def save_sql_history(self):
-        # 限制最大条数
-        if len(self.sql_history["commands"]) > self.sql_history["max_count"]:
-            self.sql_history["commands"] = self.sql_history["commands"][-self.sql_history["max_count"]:]
-        with open(self.sql_history_path, "w", encoding="utf-8") as f:
-            json.dump(self.sql_history, f, ensure_ascii=False, indent=4)
+        self.sql_history = dict(self.default_sql_history, commands=store.get_history("sql"))
 
     def add_sql_history(self, command):
         """添加SQL历史命令"""
-        if command and command not in self.sql_history["commands"]:
-            self.sql_history["commands"].append(command)
-            self.save_sql_history()
+        self.add_history(self.sql_history, "sql", command)
 
     def get_sql_history(self):
         return self.sql_history["commands"]
 
     def clear_sql_history(self):
         self.sql_history["commands"] = []
-        self.save_sql_history()
+        store.clear_history("sql")
+
+    @staticmethod
+    def add_history(history, kind, command):
+        """追加一条（已存在则忽略），超过最大条数时丢弃最早的"""
+        if command and command not in history["commands"]:
+            history["commands"].append(command)
+            del history["commands"][:-history["max_count"]]
+            store.add_history(kind, command, history["max_count"])
 
 
 # 全局实例
-config_manager = ConfigManager()
\ No newline at end of file
+config_manager = ConfigManager()
+atexit.register(config_manager.flush_stats)
\ No newline at end of file
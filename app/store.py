@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sqlite3
+import threading
+from utils.paths import get_config_path
+from utils.logger import logger
+
+
+SCHEMA_VERSION = 2  # PRAGMA user_version：0 表示尚未从 JSON 文件迁移，1 表示只迁移了设置/统计/历史命令/连接配置
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS histories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    command TEXT NOT NULL,
+    UNIQUE (kind, command)
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    user TEXT NOT NULL,
+    password TEXT NOT NULL,
+    dbname TEXT NOT NULL,
+    last_used REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS step_results (
+    key TEXT PRIMARY KEY,
+    entry TEXT NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_runs_job ON job_runs (job_id, id);
+CREATE TABLE IF NOT EXISTS usage_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS usage_records_command ON usage_records (command, id);
+CREATE TABLE IF NOT EXISTS transfer_states (
+    key TEXT PRIMARY KEY,
+    entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    name TEXT PRIMARY KEY,
+    entry TEXT NOT NULL
+);
+"""
+PROFILE_DEFAULTS = {"name": "", "host": "", "port": 3306, "user": "", "password": "", "dbname": "", "last_used": 0}
+PROFILE_FIELDS = tuple(PROFILE_DEFAULTS)
+# 迁移前的 JSON 文件（config.json 等在程序根目录，app_config.json 在 config 目录）
+ROOT_PATH = os.path.dirname(os.path.dirname(__file__))
+LEGACY_FILES = {
+    "config": os.path.join(ROOT_PATH, "config.json"),
+    "stats": os.path.join(ROOT_PATH, "stats.json"),
+    "ssh": os.path.join(ROOT_PATH, "ssh_history.json"),
+    "sql": os.path.join(ROOT_PATH, "sql_history.json"),
+    "app": os.path.join(get_config_path(), "app_config.json"),
+    "jobs": os.path.join(get_config_path(), "scheduler_jobs.json"),
+    "job_runs": os.path.join(get_config_path(), "scheduler_history.json"),
+    "usage": os.path.join(get_config_path(), "cmd_usage_history.json"),
+    "transfers": os.path.join(get_config_path(), "sftp_resume.json"),
+    "hosts": os.path.join(get_config_path(), "ssh_inventory.json"),
+    "pipeline": os.path.join(get_config_path(), "pipeline_last.json"),
+}
+
+
+def dumps(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+class Store:
+    """应用状态的 SQLite 存储（WAL 模式）：设置、统计计数、历史命令、数据库连接配置、流水线步骤结果缓存，
+    定时任务及其执行记录、命令资源占用记录、SFTP 续传状态、SSH 主机清单
+
+    设置按 (scope, key) 一行，值为 JSON 文本；每次修改只写变更的行，不再整文件重写。
+    连接在线程间共享，所有操作用锁串行化。旧版 JSON 文件按 user_version 逐级迁移一次（原文件保留不动）。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # WAL 下提交不逐次 fsync，断电最多丢最近的提交，不会损坏
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(SCHEMA)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            with self.lock, self.conn:
+                self.migrate_json(version)
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # ========== 迁移 ==========
+    def migrate_json(self, version):
+        """把旧版 JSON 文件导入数据库（在调用方的事务中执行），只导入 version 之后才改存数据库的文件"""
+        migrated = []
+        if version < 1:
+            migrated += self.migrate_v1()
+        if version < 2:
+            migrated += self.migrate_v2()
+        if migrated:
+            logger.info(f"已把 {', '.join(migrated)} 迁移到 {self.path}")
+
+    def migrate_v1(self):
+        migrated = []
+        config = self.read_legacy("config")
+        if isinstance(config, dict):
+            self.write_settings("config", config)
+            migrated.append("config.json")
+        stats = self.read_legacy("stats")
+        if isinstance(stats, dict):
+            self.write_counters({k: v for k, v in stats.items() if isinstance(v, int)})
+            if "last_update" in stats:
+                self.write_settings("stats", {"last_update": stats["last_update"]})
+            migrated.append("stats.json")
+        for kind in ("ssh", "sql"):
+            history = self.read_legacy(kind)
+            if isinstance(history, dict):
+                self.conn.executemany("INSERT OR IGNORE INTO histories (kind, command) VALUES (?, ?)",
+                                      [(kind, c) for c in history.get("commands", []) if c])
+                migrated.append(f"{kind}_history.json")
+        app = self.read_legacy("app")
+        if isinstance(app, dict):
+            for profile in app.pop("db_profiles", []):
+                self.write_profile(profile)
+            self.write_settings("app", app)
+            migrated.append("app_config.json")
+        return migrated
+
+    def migrate_v2(self):
+        migrated = []
+        jobs = self.read_legacy("jobs")
+        if isinstance(jobs, dict):
+            for job in jobs.get("jobs", []):
+                self.write_job(job)
+            migrated.append("scheduler_jobs.json")
+        runs = self.read_legacy("job_runs")
+        if isinstance(runs, dict):
+            # 旧文件中新记录在前，按时间先后插入
+            for job_id, records in runs.items():
+                self.conn.executemany("INSERT INTO job_runs (job_id, entry) VALUES (?, ?)",
+                                      [(job_id, dumps(r)) for r in reversed(records)])
+            migrated.append("scheduler_history.json")
+        usage = self.read_legacy("usage")
+        if isinstance(usage, dict):
+            self.conn.executemany("INSERT INTO usage_records (command, entry) VALUES (?, ?)",
+                                  [(r["command"], dumps(r)) for r in reversed(usage.get("records", []))])
+            migrated.append("cmd_usage_history.json")
+        transfers = self.read_legacy("transfers")
+        if isinstance(transfers, dict):
+            for key, state in transfers.items():
+                self.write_transfer_state(key, state)
+            migrated.append("sftp_resume.json")
+        hosts = self.read_legacy("hosts")
+        if isinstance(hosts, dict):
+            for host in hosts.get("hosts", []):
+                self.write_host(host)
+            migrated.append("ssh_inventory.json")
+        pipeline = self.read_legacy("pipeline")
+        if isinstance(pipeline, dict) and pipeline.get("definition"):
+            self.write_settings("pipeline", {"last_definition": pipeline["definition"]})
+            migrated.append("pipeline_last.json")
+        return migrated
+
+    @staticmethod
+    def read_legacy(name):
+        try:
+            with open(LEGACY_FILES[name], "r", encoding="utf-8") as f:
+                return json.load(f)
+        except:
+            return None
+
+    # ========== 设置 ==========
+    def get_settings(self, scope):
+        with self.lock:
+            rows = self.conn.execute("SELECT key, value FROM settings WHERE scope = ?", (scope,)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_settings(self, scope, data, replace=False):
+        """写入多个键；replace=True 时先删除该 scope 下不在 data 中的键"""
+        with self.lock, self.conn:
+            if replace:
+                self.conn.execute(f"DELETE FROM settings WHERE scope = ? AND key NOT IN ({','.join('?' * len(data))})",
+                                  (scope, *data))
+            self.write_settings(scope, data)
+
+    def set_setting(self, scope, key, value):
+        self.set_settings(scope, {key: value})
+
+    def write_settings(self, scope, data):
+        self.conn.executemany(
+            "INSERT INTO settings (scope, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (scope, key) DO UPDATE SET value = excluded.value",
+            [(scope, key, json.dumps(value, ensure_ascii=False)) for key, value in data.items()])
+
+    # ========== 统计计数 ==========
+    def get_counters(self):
+        with self.lock:
+            return dict(self.conn.execute("SELECT name, value FROM counters").fetchall())
+
+    def set_counters(self, counters):
+        with self.lock, self.conn:
+            self.write_counters(counters)
+
+    def write_counters(self, counters):
+        self.conn.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = excluded.value", list(counters.items()))
+
+    # ========== 历史命令 ==========
+    def get_history(self, kind):
+        with self.lock:
+            rows = self.conn.execute("SELECT command FROM histories WHERE kind = ? ORDER BY id", (kind,)).fetchall()
+        return [row[0] for row in rows]
+
+    def add_history(self, kind, command, max_count):
+        """追加一条（已存在则忽略），只保留最近 max_count 条"""
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO histories (kind, command) VALUES (?, ?)", (kind, command))
+            self.conn.execute("DELETE FROM histories WHERE kind = ? AND id NOT IN "
+                              "(SELECT id FROM histories WHERE kind = ? ORDER BY id DESC LIMIT ?)",
+                              (kind, kind, max_count))
+
+    def clear_history(self, kind):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM histories WHERE kind = ?", (kind,))
+
+    # ========== 数据库连接配置 ==========
+    def list_profiles(self):
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {', '.join(PROFILE_FIELDS)} FROM profiles ORDER BY rowid").fetchall()
+        return [dict(zip(PROFILE_FIELDS, row)) for row in rows]
+
+    def save_profile(self, profile):
+        with self.lock, self.conn:
+            self.write_profile(profile)
+
+    def write_profile(self, profile):
+        values = {field: profile.get(field) or default for field, default in PROFILE_DEFAULTS.items()}
+        self.conn.execute(
+            f"INSERT INTO profiles ({', '.join(PROFILE_FIELDS)}) VALUES ({', '.join('?' * len(PROFILE_FIELDS))}) "
+            "ON CONFLICT (name) DO UPDATE SET " + ", ".join(f"{f} = excluded.{f}" for f in PROFILE_FIELDS[1:]),
+            [values[field] for field in PROFILE_FIELDS])
+
+    def delete_profile(self, name):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+
+    def touch_profile(self, name, last_used):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE profiles SET last_used = ? WHERE name = ?", (last_used, name))
+
+    # ========== 流水线步骤结果缓存 ==========
+    def get_step_result(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT entry FROM step_results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_step_result(self, key, entry, max_count):
+        """写入一条（同 key 覆盖），只保留最近完成的 max_count 条"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO step_results (key, entry, finished) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET entry = excluded.entry, finished = excluded.finished",
+                (key, json.dumps(entry, ensure_ascii=False), entry.get("finished", 0)))
+            self.conn.execute("DELETE FROM step_results WHERE key NOT IN "
+                              "(SELECT key FROM step_results ORDER BY finished DESC LIMIT ?)", (max_count,))
+
+    def clear_step_results(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM step_results")
+
+    # ========== 定时任务 ==========
+    def list_jobs(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT entry FROM jobs ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save_job(self, job):
+        with self.lock, self.conn:
+            self.write_job(job)
+
+    def write_job(self, job):
+        self.conn.execute("INSERT INTO jobs (id, entry) VALUES (?, ?) "
+                          "ON CONFLICT (id) DO UPDATE SET entry = excluded.entry", (job["id"], dumps(job)))
+
+    def delete_job(self, job_id):
+        """删除任务及其执行记录"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self.conn.execute("DELETE FROM job_runs WHERE job_id = ?", (job_id,))
+
+    def list_job_runs(self, job_id):
+        """执行记录，新的在前"""
+        with self.lock:
+            rows = self.conn.execute("SELECT entry FROM job_runs WHERE job_id = ? ORDER BY id DESC",
+                                     (job_id,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def job_runs_version(self, job_id):
+        """(记录数, 最新记录 id)：不读出记录内容即可判断是否有变化"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*), MAX(id) FROM job_runs WHERE job_id = ?", (job_id,)).fetchone()
+
+    def add_job_run(self, job_id, record, max_count):
+        """追加一条执行记录，该任务只保留最近 max_count 条"""
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO job_runs (job_id, entry) VALUES (?, ?)", (job_id, dumps(record)))
+            self.conn.execute("DELETE FROM job_runs WHERE job_id = ? AND id NOT IN "
+                              "(SELECT id FROM job_runs WHERE job_id = ? ORDER BY id DESC LIMIT ?)",
+                              (job_id, job_id, max_count))
+
+    def clear_job_runs(self, job_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM job_runs WHERE job_id = ?", (job_id,))
+
+    # ========== 命令资源占用记录 ==========
+    def list_usage_records(self):
+        """全部记录，新的在前"""
+        with self.lock:
+            rows = self.conn.execute("SELECT entry FROM usage_records ORDER BY id DESC").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def add_usage_record(self, record, max_count):
+        """追加一条，只保留最近 max_count 条；返回同一命令的上一条记录（没有则为 None）"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT entry FROM usage_records WHERE command = ? ORDER BY id DESC LIMIT 1",
+                                    (record["command"],)).fetchone()
+            self.conn.execute("INSERT INTO usage_records (command, entry) VALUES (?, ?)",
+                              (record["command"], dumps(record)))
+            self.conn.execute("DELETE FROM usage_records WHERE id NOT IN "
+                              "(SELECT id FROM usage_records ORDER BY id DESC LIMIT ?)", (max_count,))
+        return json.loads(row[0]) if row else None
+
+    def clear_usage_records(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM usage_records")
+
+    # ========== SFTP 续传状态 ==========
+    def get_transfer_state(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT entry FROM transfer_states WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_transfer_state(self, key, state):
+        with self.lock, self.conn:
+            self.write_transfer_state(key, state)
+
+    def write_transfer_state(self, key, state):
+        self.conn.execute("INSERT INTO transfer_states (key, entry) VALUES (?, ?) "
+                          "ON CONFLICT (key) DO UPDATE SET entry = excluded.entry", (key, dumps(state)))
+
+    def delete_transfer_state(self, key):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM transfer_states WHERE key = ?", (key,))
+
+    # ========== SSH 主机清单 ==========
+    def list_hosts(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT entry FROM hosts ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save_hosts(self, hosts, replace=False):
+        """写入多台主机（同名覆盖，保持原位置）；replace=True 时先清空清单"""
+        with self.lock, self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM hosts")
+            for host in hosts:
+                self.write_host(host)
+
+    def write_host(self, host):
+        self.conn.execute("INSERT INTO hosts (name, entry) VALUES (?, ?) "
+                          "ON CONFLICT (name) DO UPDATE SET entry = excluded.entry", (host["name"], dumps(host)))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# 全局实例
+store = Store(os.path.join(get_config_path(), "app.db"))
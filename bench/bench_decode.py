@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""进程输出解码压测：多 MB 输出按随机大小的块（模拟管道读取，多字节字符会被拆开）送入解码器
+
+对比三种方式的吞吐（MB/秒）与正确性（解码结果与原文逐行比较）：
+    per-line  逐行读取后各自 decode（固定编码，errors=ignore），即按行读管道的旧做法
+    fixed     LineDecoder 固定编码增量解码
+    auto      AutoLineDecoder 自动识别（BOM/UTF-16/UTF-8，非法行按控制台代码页）
+
+    python -m bench.bench_decode --size 20
+    python -m bench.bench_decode --size 50 --chunk 4096 --cases utf8,gbk,mixed
+"""
+import argparse
+import codecs
+import json
+import random
+import time
+from core.stream import LineDecoder, AutoLineDecoder
+
+
+CASES = ("ascii", "utf8", "gbk", "mixed", "utf8-bom", "utf16")
+WORDS = ["build", "目标", "compile", "链接", "warning", "文件", "C:\\Windows\\System32", "已复制", "0x7ffe", "完成"]
+
+
+def make_lines(size, seed):
+    """生成约 size 字节（按 UTF-8 计）的文本行"""
+    rng = random.Random(seed)
+    lines, total = [], 0
+    while total < size:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 16)))
+        lines.append(line)
+        total += len(line.encode("utf-8")) + 2
+    return lines
+
+
+def encode_case(case, lines):
+    """返回 (原始字节, 期望的行, fixed 方式使用的编码)"""
+    if case == "ascii":
+        lines = [line.encode("ascii", errors="ignore").decode("ascii") for line in lines]
+        return "\r\n".join(lines).encode("ascii"), lines, "utf-8"
+    if case == "utf8":
+        return "\r\n".join(lines).encode("utf-8"), lines, "utf-8"
+    if case == "gbk":
+        return "\r\n".join(lines).encode("gbk"), lines, "gbk"
+    if case == "mixed":
+        # 每 50 行切换一次编码（如批处理中途 chcp 65001，或调用不同程序）
+        data = b"\r\n".join(line.encode("gbk" if i // 50 % 2 else "utf-8") for i, line in enumerate(lines))
+        return data, lines, "gbk"
+    if case == "utf8-bom":
+        return codecs.BOM_UTF8 + "\r\n".join(lines).encode("utf-8"), lines, "utf-8-sig"
+    return "\r\n".join(lines).encode("utf-16-le"), lines, "utf-16-le"
+
+
+def split_chunks(data, chunk, seed):
+    rng = random.Random(seed)
+    chunks, pos = [], 0
+    while pos < len(data):
+        size = rng.randint(1, chunk)
+        chunks.append(data[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def decode_per_line(chunks, encoding):
+    """旧做法：按行切分字节后逐行解码"""
+    lines, pending = [], b""
+    for data in chunks:
+        parts = (pending + data).split(b"\n")
+        pending = parts.pop()
+        lines.extend(part.decode(encoding, errors="ignore").rstrip("\r") for part in parts)
+    if pending:
+        lines.append(pending.decode(encoding, errors="ignore").rstrip("\r"))
+    return lines
+
+
+def decode_with(decoder, chunks):
+    lines = []
+    for data in chunks:
+        lines.extend(decoder.feed(data))
+    return lines + decoder.flush()
+
+
+def measure(func, data_size, repeat):
+    best, lines = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        lines = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return lines, {"seconds": round(best, 4), "mb_per_s": round(data_size / 1048576 / best, 1)}
+
+
+def run(args):
+    lines = make_lines(int(args.size * 1048576), args.seed)
+    results = {}
+    for case in args.cases.split(","):
+        data, expected, encoding = encode_case(case, lines)
+        chunks = split_chunks(data, args.chunk, args.seed)
+        methods = {
+            "per-line": lambda: decode_per_line(chunks, encoding),
+            "fixed": lambda: decode_with(LineDecoder(encoding), chunks),
+            "auto": lambda: decode_with(AutoLineDecoder(args.fallback), chunks),
+        }
+        results[case] = {"bytes": len(data), "lines": len(expected), "chunks": len(chunks)}
+        for name, func in methods.items():
+            decoded, stats = measure(func, len(data), args.repeat)
+            if case == "utf16" and name == "per-line":
+                stats["correct"] = False  # 按 0x0A 字节切分 UTF-16 会错位
+            else:
+                stats["correct"] = decoded == expected
+            results[case][name] = stats
+        print(f"{case:9} {len(data) / 1048576:7.1f} MB  " + "  ".join(
+            f"{name} {results[case][name]['mb_per_s']:7.1f} MB/s{'' if results[case][name]['correct'] else ' (错误)'}"
+            for name in methods))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程输出解码压测")
+    parser.add_argument("--size", type=float, default=20, help="每种输出的大小（MB）")
+    parser.add_argument("--chunk", type=int, default=65536, help="单块最大字节数（实际为 1~该值的随机大小）")
+    parser.add_argument("--cases", default=",".join(CASES), help="逗号分隔：" + ",".join(CASES))
+    parser.add_argument("--fallback", default="gbk", help="auto 方式的控制台代码页")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快一次")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
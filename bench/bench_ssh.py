@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""SSH 实时日志端到端压测：替身服务器 -> SSHLogThread -> ConsoleWidget
+
+统计上屏吞吐（行/秒）、从远端写出到上屏的延迟、本进程 CPU 与内存。替身服务器默认在子进程中运行，
+CPU/内存只反映应用本身；--in-process 则在同一进程内启动（便于调试）。
+
+    python -m bench.bench_ssh --rate 50000 --size 120 --duration 10
+    python -m bench.bench_ssh --rate 0 --count 2000000              # 不限速，测上限
+    python -m bench.bench_ssh --latency 0.1 --bandwidth 2000000     # 慢链路
+    python -m bench.bench_ssh --follow --rate 2000 --drop-after 5   # tail -F 断线重连续传，检查丢行/重复
+
+--follow 模式由压测进程写临时文件、远端执行 tail -F 跟踪，需要本机有 tail/wc（Linux/macOS）。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import paramiko
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+from bench.ssh_stub_server import StubSSHServer, make_line, parse_line
+
+
+def rss_mb():
+    """当前进程常驻内存（MB）"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1048576
+    except ImportError:
+        return 0.0
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def start_server(args):
+    """返回 (端口, 清理函数)"""
+    if args.in_process:
+        server = StubSSHServer(user=args.user, password=args.password, latency=args.latency,
+                               bandwidth=args.bandwidth, shell=args.follow)
+        return server.start(), server.stop
+    command = [sys.executable, "-m", "bench.ssh_stub_server", "--port", "0",
+               "--user", args.user, "--password", args.password,
+               "--latency", str(args.latency), "--bandwidth", str(args.bandwidth)]
+    if args.follow:
+        command.append("--shell")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(command, cwd=root, stdout=subprocess.PIPE, text=True, encoding="utf-8")
+    line = process.stdout.readline()
+    if ":" not in line:
+        process.kill()
+        raise RuntimeError("替身服务器启动失败")
+    return int(line.rsplit(":", 1)[1]), process.kill
+
+
+def drop_connections(port, args):
+    """另开一个连接让服务器断开其余连接"""
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect("127.0.0.1", port, args.user, args.password, look_for_keys=False, allow_agent=False)
+    try:
+        _, stdout, _ = client.exec_command("stub-drop")
+        stdout.read()
+    finally:
+        client.close()
+
+
+class FileWriter:
+    """--follow 模式：按速率向日志文件追加带序号和时间戳的行"""
+
+    def __init__(self, path, rate, size):
+        self.path = path
+        self.rate = rate
+        self.size = size
+        self.running = True
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+
+    def write_loop(self):
+        start = time.monotonic()
+        seq = 0
+        with open(self.path, "a", encoding="utf-8") as f:
+            while self.running:
+                due = int((time.monotonic() - start) * self.rate) + 1 - seq
+                if due <= 0:
+                    time.sleep(0.005)
+                    continue
+                now = time.time()
+                f.write("".join(make_line(seq + i, now, self.size) for i in range(min(due, 2000))))
+                f.flush()
+                seq += min(due, 2000)
+
+
+class SequenceChecker:
+    """在读取线程中检查序号连续性（丢行/重复）"""
+
+    def __init__(self):
+        self.expected = None
+        self.gaps = 0
+        self.duplicates = 0
+
+    def __call__(self, lines):
+        for line in lines:
+            parsed = parse_line(line)
+            if not parsed:
+                continue
+            seq = parsed[0]
+            if self.expected is not None:
+                if seq > self.expected:
+                    self.gaps += seq - self.expected
+                elif seq < self.expected:
+                    self.duplicates += 1
+                    continue
+            self.expected = seq + 1
+
+
+def build_console_class():
+    # 需在 QApplication 创建后导入界面模块
+    from ui.widgets.console import ConsoleWidget
+
+    class BenchConsole(ConsoleWidget):
+        """记录每次刷新上屏的行数，以及本批最旧/最新一行从远端写出到上屏的延迟"""
+
+        def __init__(self):
+            super().__init__(min_height=300)
+            self.screen_lines = 0
+            self.oldest_latency = []
+            self.newest_latency = []
+
+        def flush(self):
+            if self.paused or not (self.spooled or self.pending):
+                super().flush()
+                return
+            first = self.pending[0] if self.pending else None
+            last = self.pending[-1] if self.pending else None
+            count = len(self.pending)
+            super().flush()
+            if self.spooled:
+                # 大输出模式不再填充 pending：上屏的是查看器范围内新增的行，首尾两行从捕获存储读取
+                shown = self.spool_view.shown_lines
+                if shown <= self.screen_lines:
+                    return
+                first = self.capture.read_lines(self.screen_lines, self.screen_lines + 1)[0]
+                last = self.capture.read_lines(shown - 1, shown)[0]
+                count = shown - self.screen_lines
+            self.record(count, first, last)
+
+        def record(self, count, first, last):
+            now = time.time()
+            self.screen_lines += count
+            oldest = parse_line(first)
+            newest = parse_line(last)
+            if oldest:
+                self.oldest_latency.append(now - oldest[1])
+            if newest:
+                self.newest_latency.append(now - newest[1])
+
+    return BenchConsole
+
+
+def run(args):
+    if not args.show:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication(sys.argv)
+    from core.ssh import ssh_sessions
+    from ui.pages.page_ssh import SSHLogThread
+
+    port, stop_server = start_server(args)
+    writer = None
+    log_dir = None
+    try:
+        success, msg, _, session = ssh_sessions.get_session("127.0.0.1", port, args.user, args.password)
+        if not success:
+            raise RuntimeError(f"连接替身服务器失败：{msg}")
+        if args.follow:
+            log_dir = tempfile.mkdtemp(prefix="bench_ssh_")
+            log_path = os.path.join(log_dir, "app.log")
+            open(log_path, "w").close()
+            writer = FileWriter(log_path, args.rate or 10000, args.size)
+            writer.thread.start()
+            command = f"tail -n 0 -F {log_path}"
+        else:
+            command = f"stub-emit rate={args.rate} size={args.size} count={args.count}"
+
+        console = build_console_class()()
+        if args.show:
+            console.resize(1000, 700)
+            console.show()
+        received = {"lines": 0}
+        checker = SequenceChecker() if args.follow or args.check else None
+        sinks = [lambda lines: received.__setitem__("lines", received["lines"] + len(lines))]
+        if checker:
+            sinks.append(checker)
+        thread = SSHLogThread(session, command, sinks)
+        thread.lines_received.connect(console.append_lines)
+        thread.log_received.connect(console.append_line)
+        events = {"dropped": None, "reconnected": None}
+        thread.session_changed.connect(lambda s: events.__setitem__("reconnected", time.monotonic()))
+
+        samples = []
+        cpu_start = time.process_time()
+        started = time.monotonic()
+        rss_start = rss_mb()
+
+        def drop():
+            events["dropped"] = time.monotonic()
+            drop_connections(port, args)
+
+        if args.drop_after:
+            threading.Timer(args.drop_after, drop).start()
+
+        def tick():
+            samples.append(rss_mb())
+            elapsed = time.monotonic() - started
+            if elapsed >= args.duration or thread.isFinished():
+                thread.stop()
+                thread.wait()
+                # 先投递读取线程已发出、尚在队列中的行；捕获存储在写入线程中写盘，等写完再做最后一次刷新
+                app.processEvents()
+                console.commit_capture()
+                console.capture.sync()
+                console.flush()
+                app.quit()
+
+        timer = QTimer()
+        timer.timeout.connect(tick)
+        timer.start(500)
+        thread.start()
+        app.exec_()
+
+        wall = time.monotonic() - started
+        cpu = time.process_time() - cpu_start
+        result = {
+            "command": command,
+            "seconds": round(wall, 2),
+            "received_lines": received["lines"],
+            "screen_lines": console.screen_lines,
+            "screen_lines_per_sec": round(console.screen_lines / wall),
+            "screen_mb_per_sec": round(console.screen_lines * args.size / wall / 1048576, 2),
+            "latency_oldest_ms": {p: round(percentile(console.oldest_latency, p) * 1000, 1) for p in (50, 95, 99, 100)},
+            "latency_newest_ms_p50": round(percentile(console.newest_latency, 50) * 1000, 1),
+            "flushes": len(console.oldest_latency),
+            "cpu_percent": round(cpu / wall * 100, 1),
+            "rss_mb": {"start": round(rss_start, 1), "peak": round(max(samples + [rss_start]), 1),
+                       "end": round(rss_mb(), 1)},
+        }
+        if events["dropped"]:
+            result["reconnect_seconds"] = round(events["reconnected"] - events["dropped"], 2) \
+                if events["reconnected"] else None
+        if checker:
+            result["missing_lines"] = checker.gaps
+            result["duplicate_lines"] = checker.duplicates
+        return result
+    finally:
+        if writer:
+            writer.running = False
+        ssh_sessions.close_all()
+        stop_server()
+        if log_dir:
+            for name in os.listdir(log_dir):
+                os.remove(os.path.join(log_dir, name))
+            os.rmdir(log_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSH 实时日志端到端压测")
+    parser.add_argument("--rate", type=float, default=20000, help="每秒行数，0 不限速（--follow 模式下不限速按 10000）")
+    parser.add_argument("--size", type=int, default=120, help="每行字节数")
+    parser.add_argument("--count", type=int, default=0, help="总行数，0 不限（直到 --duration）")
+    parser.add_argument("--duration", type=float, default=10, help="最长运行秒数")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟单向延迟（秒）")
+    parser.add_argument("--bandwidth", type=int, default=0, help="模拟带宽上限（字节/秒）")
+    parser.add_argument("--drop-after", type=float, default=0, help="运行若干秒后断开连接，统计重连耗时")
+    parser.add_argument("--follow", action="store_true", help="跟踪本地写入的日志文件（tail -F），可配合 --drop-after 检查续传")
+    parser.add_argument("--check", action="store_true", help="检查序号连续性（丢行/重复）")
+    parser.add_argument("--in-process", action="store_true", help="替身服务器在本进程内运行")
+    parser.add_argument("--show", action="store_true", help="显示控制台窗口（默认 offscreen）")
+    parser.add_argument("--user", default="test")
+    parser.add_argument("--password", default="test")
+    parser.add_argument("--json", help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""本地替身 SSH 服务器（paramiko 实现，可在进程内启动，也可单独运行），用于测试/压测 SSH 页面
+
+支持的命令：
+    stub-emit rate=行每秒(0 不限速) size=每行字节数 count=总行数(0 无限)
+        输出 "序号 发送时间戳 xxx..." 格式的行，接收端可据此计算延迟与丢行
+    stub-drop       断开除本连接外的所有连接（模拟断网）
+    其他命令        启动时指定 shell=True 则交给本机 shell 执行（可测试 tail -F 跟踪与断线续传），否则返回 127
+
+链路模拟：latency 为每块数据的单向延迟（秒，流水线方式不降低吞吐），bandwidth 为每通道带宽上限（字节/秒）。
+
+单独运行：python -m bench.ssh_stub_server --port 2222 --shell --latency 0.05
+"""
+import argparse
+import queue
+import shlex
+import socket
+import subprocess
+import threading
+import time
+import paramiko
+
+
+EMIT_BATCH = 2000  # 每次最多生成的行数
+
+
+def make_line(seq, timestamp, size):
+    head = f"{seq:010d} {timestamp:.6f} "
+    return head + "x" * max(size - len(head) - 1, 0) + "\n"
+
+
+def parse_line(line):
+    """解析 stub-emit 输出的行，返回 (序号, 发送时间戳)，不是该格式返回 None"""
+    parts = line.split(" ", 2)
+    if len(parts) < 2 or not parts[0].isdigit():
+        return None
+    try:
+        return int(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+
+
+class LinkShaper:
+    """按延迟和带宽整形一个通道的输出：数据带截止时间入队，由发送线程到点发出"""
+
+    def __init__(self, channel, latency=0.0, bandwidth=0):
+        self.channel = channel
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.queue = queue.Queue(maxsize=256)
+        self.closed = False
+        self.thread = None
+        if latency or bandwidth:
+            self.thread = threading.Thread(target=self.send_loop, name="stub-link", daemon=True)
+            self.thread.start()
+
+    def send(self, data, stderr=False):
+        if self.closed:
+            raise EOFError("channel closed")
+        if self.thread is None:
+            self.write(data, stderr)
+        else:
+            self.queue.put((time.monotonic() + self.latency, data, stderr))
+
+    def write(self, data, stderr):
+        if stderr:
+            self.channel.sendall_stderr(data)
+        else:
+            self.channel.sendall(data)
+
+    def send_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            deadline, data, stderr = item
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self.write(data, stderr)
+            except Exception:
+                self.closed = True
+                break
+            if self.bandwidth:
+                time.sleep(len(data) / self.bandwidth)
+
+    def finish(self, exit_status):
+        """等已排队的数据发完，再发送退出码并关闭通道"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+        try:
+            self.channel.send_exit_status(exit_status)
+        finally:
+            self.channel.close()
+
+
+class StubServerInterface(paramiko.ServerInterface):
+
+    def __init__(self, server, transport):
+        self.server = server
+        self.transport = transport
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if username == self.server.user and password == self.server.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_global_request(self, kind, msg):
+        # 应答 keepalive@openssh.com 等探测
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        command = command.decode("utf-8", errors="replace")
+        threading.Thread(target=self.server.run_command, args=(self.transport, channel, command),
+                         name="stub-exec", daemon=True).start()
+        return True
+
+
+class StubSSHServer:
+    """进程内替身 SSH 服务器：start() 返回监听端口，drop_connections() 模拟断线"""
+
+    def __init__(self, host="127.0.0.1", port=0, user="test", password="test",
+                 latency=0.0, bandwidth=0, shell=False):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.shell = shell
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.sock = None
+        self.transports = []
+        self.lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(100)
+        self.port = self.sock.getsockname()[1]
+        self.running = True
+        threading.Thread(target=self.accept_loop, name="stub-accept", daemon=True).start()
+        return self.port
+
+    def stop(self):
+        self.running = False
+        if self.sock:
+            self.sock.close()
+        self.drop_connections()
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                break
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            with self.lock:
+                self.transports = [t for t in self.transports if t.is_active()]
+                self.transports.append(transport)
+            try:
+                transport.start_server(server=StubServerInterface(self, transport))
+            except (paramiko.SSHException, EOFError, OSError):
+                transport.close()
+
+    def drop_connections(self, keep=None):
+        """断开所有连接（keep 除外），客户端表现为连接被重置"""
+        with self.lock:
+            transports = [t for t in self.transports if t is not keep]
+            self.transports = [t for t in self.transports if t is keep]
+        for transport in transports:
+            transport.close()
+        return len(transports)
+
+    # ========== 命令 ==========
+    def run_command(self, transport, channel, command):
+        link = LinkShaper(channel, self.latency, self.bandwidth)
+        exit_status = 0
+        try:
+            argv = shlex.split(command) if command.startswith("stub-") else []
+            if argv and argv[0] == "stub-emit":
+                options = dict(arg.split("=", 1) for arg in argv[1:] if "=" in arg)
+                self.emit(link, float(options.get("rate", 1000)), int(options.get("size", 100)),
+                          int(options.get("count", 0)))
+            elif argv and argv[0] == "stub-drop":
+                link.send(f"dropped {self.drop_connections(keep=transport)}\n".encode())
+            elif self.shell:
+                exit_status = self.run_shell(link, command)
+            else:
+                link.send(f"stub: command not found: {command}\n".encode(), stderr=True)
+                exit_status = 127
+        except (EOFError, OSError, paramiko.SSHException):
+            # 客户端关闭通道或连接被断开
+            return
+        except ValueError as e:
+            link.send(f"stub: {str(e)}\n".encode(), stderr=True)
+            exit_status = 2
+        try:
+            link.finish(exit_status)
+        except (EOFError, OSError, paramiko.SSHException):
+            pass
+
+    def emit(self, link, rate, size, count):
+        """按速率输出带序号和时间戳的行；rate 为 0 时尽可能快"""
+        start = time.monotonic()
+        seq = 0
+        while self.running and (count == 0 or seq < count):
+            if link.closed or link.channel.closed:
+                raise EOFError("channel closed")
+            due = EMIT_BATCH if rate <= 0 else int((time.monotonic() - start) * rate) + 1 - seq
+            n = min(due, EMIT_BATCH, count - seq if count else EMIT_BATCH)
+            if n <= 0:
+                time.sleep(0.002)
+                continue
+            now = time.time()
+            link.send("".join(make_line(seq + i, now, size) for i in range(n)).encode())
+            seq += n
+
+    def run_shell(self, link, command):
+        process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        def pump_stderr():
+            try:
+                for data in iter(lambda: process.stderr.read1(65536), b""):
+                    link.send(data, stderr=True)
+            except (EOFError, OSError, paramiko.SSHException):
+                pass
+
+        err_thread = threading.Thread(target=pump_stderr, daemon=True)
+        err_thread.start()
+        try:
+            for data in iter(lambda: process.stdout.read1(65536), b""):
+                link.send(data)
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+        err_thread.join()
+        return process.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地替身 SSH 服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2222)
+    parser.add_argument("--user", default="test")
+    parser.add_argument("--password", default="test")
+    parser.add_argument("--latency", type=float, default=0.0, help="单向延迟（秒）")
+    parser.add_argument("--bandwidth", type=int, default=0, help="每通道带宽上限（字节/秒），0 不限")
+    parser.add_argument("--shell", action="store_true", help="其他命令交给本机 shell 执行")
+    args = parser.parse_args()
+    server = StubSSHServer(args.host, args.port, args.user, args.password, args.latency, args.bandwidth, args.shell)
+    port = server.start()
+    print(f"替身 SSH 服务器已启动：{args.user}/{args.password}@{args.host}:{port}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
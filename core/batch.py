@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import os
+import re
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.process import ProcessRunner
+from core.cmd import cmd_args, cmd_encoding
+from core.ps1 import ps1_args, PS1_ENCODING
+
+
+# {item}、{index}、{n}（n 从 1 开始，{0} 等不是占位符，PowerShell 的 "{0}" -f 格式串不受影响）；
+# 前缀 q: 表示按目标 shell 加引号；{{item}} 这样的双层花括号原样输出为 {item}
+PLACEHOLDER = re.compile(r"\{\{(?:q:)?(?:item|index|[1-9]\d*)\}\}|\{(q:)?(item|index|[1-9]\d*)\}")
+MAX_OUTPUT_LINES = 20000  # 每项保留的输出行数上限（超出保留最后的部分）
+
+
+def parse_inputs(text):
+    """输入列表：每行一项，忽略空行和 # 开头的注释"""
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith("#")]
+
+
+def quote_value(value, kind):
+    """按目标 shell 加引号：PowerShell 用单引号（' 写作 ''），CMD 用双引号（" 写作 ""），
+    非 Windows 系统的 cmd 经 /bin/sh 执行，按 POSIX shell 规则加引号"""
+    if kind == "ps1":
+        return "'" + value.replace("'", "''") + "'"
+    if os.name != "nt":
+        return shlex.quote(value)
+    return '"' + value.replace('"', '""') + '"'
+
+
+def render_command(template, item, index, kind="cmd"):
+    """替换命令模板中的占位符：{item} 整行输入，{index} 序号（从 1 开始），{1}、{2}... 按空白分隔的第 n 列
+
+    值默认原样代入、不加引号（含空格或特殊字符时需自行加引号，或用 {q:item}、{q:1} 按 kind 对应的 shell 加引号）；
+    需要字面的 {item} 时写作 {{item}}。
+    """
+    fields = item.split()
+
+    def replace(m):
+        if m.group(0).startswith("{{"):
+            return m.group(0)[1:-1]
+        quoted, key = m.groups()
+        if key == "item":
+            value = item
+        elif key == "index":
+            value = str(index)
+        else:
+            n = int(key)
+            value = fields[n - 1] if n <= len(fields) else ""
+        return quote_value(value, kind) if quoted else value
+
+    return PLACEHOLDER.sub(replace, template)
+
+
+def make_runner(kind, command):
+    if kind == "ps1":
+        return ProcessRunner(ps1_args(command), encoding=PS1_ENCODING)
+    return ProcessRunner(cmd_args(command), encoding=cmd_encoding())
+
+
+class BatchRunner:
+    """对一组输入并发执行同一命令模板：进程数有上限，每项独立超时，失败/超时按退避间隔重试，结果逐项回调"""
+
+    def __init__(self, kind, template, items, concurrency=4, timeout=300, retries=0, retry_delay=1.0):
+        self.kind = kind
+        self.template = template
+        self.items = items
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.cancelled = threading.Event()
+        self.running = {}  # 序号 -> 正在执行的 ProcessRunner
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+        with self.lock:
+            runners = list(self.running.values())
+        for runner in runners:
+            runner.stop()
+
+    def run(self, on_result):
+        """阻塞执行；每项开始时以 status=running 回调一次，结束时再回调最终结果"""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as pool:
+            for index, item in enumerate(self.items, 1):
+                pool.submit(self.run_item, index, item, on_result)
+
+    def run_item(self, index, item, on_result):
+        command = render_command(self.template, item, index, self.kind)
+        result = {
+            "index": index,
+            "item": item,
+            "command": command,
+            "status": "cancelled",
+            "exit_code": None,
+            "duration": 0.0,
+            "attempts": 0,
+            "output": "",
+            "error": ""
+        }
+        if self.cancelled.is_set():
+            on_result(result)
+            return
+        result["status"] = "running"
+        on_result(dict(result))
+        start = time.monotonic()
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # 指数退避，等待期间可被取消
+                if self.cancelled.wait(self.retry_delay * 2 ** (attempt - 1)):
+                    result["status"] = "cancelled"
+                    break
+            result["attempts"] = attempt + 1
+            self.run_once(index, command, result)
+            if result["status"] in ("ok", "cancelled"):
+                break
+        result["duration"] = time.monotonic() - start
+        on_result(result)
+
+    def run_once(self, index, command, result):
+        runner = make_runner(self.kind, command)
+        lines = []
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            runner.stop()
+
+        def collect(batch):
+            lines.extend(batch)
+            if len(lines) > MAX_OUTPUT_LINES:
+                del lines[:len(lines) - MAX_OUTPUT_LINES]
+
+        timer = threading.Timer(self.timeout, on_timeout)
+        with self.lock:
+            self.running[index] = runner
+        if self.cancelled.is_set():
+            # 登记之前已取消：runner 不会再启动进程
+            runner.stop()
+        try:
+            timer.start()
+            outcome = runner.run(collect)
+            result["exit_code"] = outcome.exit_code
+            result["error"] = ""
+            if self.cancelled.is_set():
+                result["status"] = "cancelled"
+            elif timed_out.is_set():
+                result["status"] = "timeout"
+            else:
+                result["status"] = "ok" if outcome.exit_code == 0 else "failed"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e) or e.__class__.__name__
+        finally:
+            timer.cancel()
+            with self.lock:
+                self.running.pop(index, None)
+        result["output"] = "\n".join(lines)
+
+
+EXPORT_FIELDS = ["index", "item", "command", "status", "exit_code", "duration", "attempts", "error", "output"]
+
+
+def export_results(path, results):
+    """导出结果：.json 为 JSON 数组，其他按 CSV（UTF-8 BOM，Excel 可直接打开）"""
+    rows = [{k: r[k] for k in EXPORT_FIELDS} for r in results]
+    for row in rows:
+        row["duration"] = round(row["duration"], 3)
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        return
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+import mmap
+import re
+import tempfile
+import threading
+import time
+from array import array
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+BLOCK_LINES = 256  # 倒排索引的粒度：每 256 行一个块
+OFFSET_STRIDE = 64  # 行偏移索引的间隔（须整除 BLOCK_LINES，块的起止偏移可直接取到）
+MAX_POSTING_ENTRIES = 16000000  # 倒排索引条目上限（约 64MB），超出后的块不再索引
+
+
+def required_literals(pattern):
+    """从正则中提取必须出现的字面量片段（顶层或分组内连续的普通字符），用于索引预筛选"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+    literals = []
+
+    def walk(items):
+        run = ""
+        for op, arg in items:
+            if op is sre_parse.LITERAL:
+                run += chr(arg)
+                continue
+            if run:
+                literals.append(run)
+                run = ""
+            if op is sre_parse.SUBPATTERN:
+                walk(arg[-1])
+        if run:
+            literals.append(run)
+
+    walk(parsed)
+    return literals
+
+
+def trigrams(text):
+    return set(zip(text, text[1:], text[2:]))
+
+
+class CaptureStore:
+    """输出捕获存储：只追加的临时文件 + 稀疏行偏移索引 + 按块的三元组（trigram）倒排索引
+
+    append 只把行放入内存队列，编码、写文件和记偏移由写入线程完成（每次取走队列中的全部行，一批只 flush 一次），
+    调用方（界面线程）不做磁盘 I/O；需要完整输出时先 sync 等待写完。
+    偏移每 OFFSET_STRIDE 行记一个（GB 级输出的索引也只占几 MB）；
+    读取通过内存映射（mmap）按需取行，不把整个文件读入内存；
+    后台线程把写满的块加入索引（小写，大小写不敏感的预筛选），索引条目超过上限后不再扩展，其后的块搜索时直接扫描。
+    搜索先用索引求候选块，再只对候选块和尚未索引的尾部做正则匹配，返回 (行号, 起, 止)。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.written = threading.Condition(self.lock)
+        self.write_lock = threading.Lock()  # 写入线程写文件与 reset/close 更换、关闭文件互斥
+        self.indexing = False  # 索引线程按需启动，追上进度后退出
+        self.writing = False  # 写入线程同样按需启动，队列写空后退出
+        self.closed = False
+        self.pending = []  # 已 append、尚未写入文件的行
+        self.generation = 0
+        self.open_store()
+
+    def open_store(self):
+        self.file = tempfile.TemporaryFile(prefix="capture_")
+        self.map = None
+        self.size = 0  # 已写入的字节数
+        self.lines = 0
+        self.offsets = array("Q", [0])  # 第 i * OFFSET_STRIDE 行的起始偏移为 offsets[i]
+        self.postings = {}  # 三元组 -> array 块号
+        self.posting_entries = 0
+        self.indexed_blocks = 0
+
+    def reset(self):
+        with self.write_lock, self.lock:
+            self.close_store()
+            self.pending = []
+            self.generation += 1
+            self.open_store()
+
+    @property
+    def line_count(self):
+        """已写入文件、可读取的行数（刚 append 的行写入前不计入）"""
+        return self.lines
+
+    def append(self, lines):
+        if not lines:
+            return
+        with self.lock:
+            if self.closed:
+                return
+            self.pending.extend(lines)
+            start_writer = not self.writing
+            if start_writer:
+                self.writing = True
+        if start_writer:
+            threading.Thread(target=self.write_loop, name="capture-writer", daemon=True).start()
+
+    def sync(self):
+        """等待已 append 的行全部写入文件（读取完整输出前调用）"""
+        with self.lock:
+            while self.writing:
+                self.written.wait()
+
+    def write_loop(self):
+        while True:
+            with self.write_lock:
+                with self.lock:
+                    lines, self.pending = self.pending, []
+                    if not lines or self.closed:
+                        self.writing = False
+                        self.written.notify_all()
+                        return
+                self.write_lines(lines)
+
+    def write_lines(self, lines):
+        # 在写入线程中、持有 write_lock 时调用：lines/size 只在这里增长，计算偏移不必持有 self.lock
+        # 按换行记偏移，行内自带的换行也会拆成多行
+        data = ("\n".join(lines) + "\n").encode("utf-8", errors="replace")
+        self.file.seek(0, 2)
+        self.file.write(data)
+        self.file.flush()  # 映射读取看到的是文件内容，不经过写缓冲
+        base = self.size
+        count = data.count(b"\n")
+        offsets = []
+        # 只有跨过 OFFSET_STRIDE 的整数倍时才需要逐个找换行
+        if self.lines % OFFSET_STRIDE + count >= OFFSET_STRIDE:
+            find = data.find
+            line = self.lines
+            position = find(b"\n")
+            while position >= 0:
+                line += 1
+                if line % OFFSET_STRIDE == 0:
+                    offsets.append(base + position + 1)
+                position = find(b"\n", position + 1)
+        with self.lock:
+            self.offsets.extend(offsets)
+            self.lines += count
+            self.size += len(data)
+            start_indexer = not self.indexing and self.line_count // BLOCK_LINES > self.indexed_blocks \
+                and self.posting_entries < MAX_POSTING_ENTRIES
+            if start_indexer:
+                self.indexing = True
+        if start_indexer:
+            threading.Thread(target=self.index_loop, name="capture-indexer", daemon=True).start()
+
+    def mapped(self):
+        # 调用方需持有 self.lock；文件增长后重新映射到当前大小
+        if self.map is None or len(self.map) < self.size:
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map
+
+    def line_offset(self, line):
+        # 调用方需持有 self.lock；从最近的稀疏偏移向后数换行
+        if line >= self.lines:
+            return self.size
+        position = self.offsets[line // OFFSET_STRIDE]
+        data = self.mapped()
+        for _ in range(line % OFFSET_STRIDE):
+            position = data.find(b"\n", position) + 1
+        return position
+
+    def read_bytes(self, start, end):
+        # 调用方需持有 self.lock
+        end = min(end, self.line_count)
+        if start >= end:
+            return b""
+        return self.mapped()[self.line_offset(start):self.line_offset(end)]
+
+    def read_range(self, start, end):
+        """读取第 start 到 end-1 行的原始文本（整段，一次读取）"""
+        with self.lock:
+            data = self.read_bytes(start, end)
+        return data.decode("utf-8", errors="replace")
+
+    def read_lines(self, start, end):
+        text = self.read_range(start, end)
+        return text.split("\n")[:-1] if text else []
+
+    def export(self, path, chunk_size=4194304):
+        """把当前已捕获的全部输出写入文件（UTF-8），分块复制，期间不阻塞追加；返回写入的行数"""
+        self.sync()
+        with self.lock:
+            generation, size, lines = self.generation, self.size, self.lines
+        with open(path, "wb") as f:
+            position = 0
+            while position < size:
+                with self.lock:
+                    if generation != self.generation:
+                        raise OSError("导出期间输出已被清空")
+                    data = self.mapped()[position:min(position + chunk_size, size)]
+                f.write(data)
+                position += len(data)
+        return lines
+
+    # ========== 索引 ==========
+    def index_loop(self):
+        """把写满的块依次加入索引（最后不满一块的部分不索引，搜索时直接扫描）"""
+        while True:
+            with self.lock:
+                block = self.indexed_blocks
+                generation = self.generation
+                if self.closed or (block + 1) * BLOCK_LINES > self.line_count:
+                    self.indexing = False
+                    return
+                data = self.read_bytes(block * BLOCK_LINES, (block + 1) * BLOCK_LINES)
+            grams = trigrams(data.decode("utf-8", errors="replace").lower())
+            with self.lock:
+                if generation != self.generation:
+                    # 期间被 reset，从新存储的第一块重新开始
+                    continue
+                for gram in grams:
+                    posting = self.postings.get(gram)
+                    if posting is None:
+                        self.postings[gram] = array("I", [block])
+                    else:
+                        posting.append(block)
+                self.posting_entries += len(grams)
+                self.indexed_blocks = block + 1
+                if self.posting_entries >= MAX_POSTING_ENTRIES:
+                    self.indexing = False
+                    return
+
+    def candidate_blocks(self, literals):
+        """包含全部字面量三元组的已索引块，加上尚未索引的块；无可用三元组时返回全部块"""
+        with self.lock:
+            total_blocks = -(-self.line_count // BLOCK_LINES)
+            indexed = self.indexed_blocks
+            grams = set()
+            for literal in literals:
+                grams |= trigrams(literal.lower())
+            if not grams:
+                return list(range(total_blocks)), total_blocks
+            postings = sorted((self.postings.get(g, array("I")) for g in grams), key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(posting)
+        return sorted(candidates) + list(range(indexed, total_blocks)), total_blocks
+
+    def search(self, query, regex=False, case_sensitive=False, max_results=5000):
+        """返回 ([(行号, 起始列, 结束列)], 统计信息)；正则无效时抛出 re.error"""
+        start_time = time.perf_counter()
+        self.sync()
+        flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+        if regex:
+            pattern = re.compile(query, flags)
+            literals = required_literals(query)
+        else:
+            pattern = re.compile(re.escape(query), flags)
+            literals = [query]
+        blocks, total_blocks = self.candidate_blocks(literals)
+
+        matches = []
+        for block in blocks:
+            first_line = block * BLOCK_LINES
+            text = self.read_range(first_line, first_line + BLOCK_LINES)
+            self.match_block(pattern, text, first_line, matches, max_results)
+            if len(matches) >= max_results:
+                break
+        return matches, {
+            "elapsed_ms": (time.perf_counter() - start_time) * 1000,
+            "scanned_blocks": len(blocks),
+            "total_blocks": total_blocks,
+            "truncated": len(matches) >= max_results
+        }
+
+    @staticmethod
+    def match_block(pattern, text, first_line, matches, max_results):
+        """对整块文本匹配，用换行计数换算行号和列；匹配跨行时退回逐行匹配（结果只在单行内）"""
+        found = []
+        line = first_line
+        pos = 0
+        line_start = 0
+        for m in pattern.finditer(text):
+            start, end = m.span()
+            if start == len(text):
+                # 末尾换行之后的空匹配（如 ^）
+                break
+            if "\n" in text[start:end]:
+                found = None
+                break
+            newlines = text.count("\n", pos, start)
+            if newlines:
+                line += newlines
+                line_start = text.rfind("\n", 0, start) + 1
+            pos = start
+            found.append((line, start - line_start, end - line_start))
+            if len(matches) + len(found) >= max_results:
+                break
+        if found is None:
+            found = []
+            for i, line_text in enumerate(text.split("\n")[:-1]):
+                found.extend((first_line + i, m.start(), m.end()) for m in pattern.finditer(line_text))
+        matches.extend(found[:max_results - len(matches)])
+
+    def close_store(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def close(self):
+        """释放临时文件（控件销毁时调用）；之后的 append 被忽略"""
+        with self.write_lock, self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.pending = []
+            self.close_store()
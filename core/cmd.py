@@ -1 +1,25 @@
+# -*- coding: utf-8 -*-
+import os
+from app.config_manager import config_manager
+from core.stream import AUTO, console_encoding
 
+
+def cmd_encoding():
+    """CMD 输出编码：配置为空时自动识别（BOM/UTF-8，否则按控制台代码页，中文 Windows 为 cp936/GBK）"""
+    return config_manager.get("cmd_encoding") or AUTO
+
+
+def cmd_input_encoding():
+    """写入 CMD 标准输入的编码：配置为空时用控制台代码页"""
+    return config_manager.get("cmd_encoding") or console_encoding()
+
+
+def cmd_args(command):
+    """CMD 命令的启动参数（非 Windows 下用 /bin/sh 执行，便于调试）
+
+    Windows 下直接给出完整命令行字符串：传列表时 subprocess 用 list2cmdline 把引号转义为 \\"，
+    cmd.exe 不认这种转义；/s 配合外层引号让 cmd 只去掉首尾一对引号，命令中的引号原样保留。
+    """
+    if os.name == "nt":
+        return f'cmd.exe /d /s /c "{command}"'
+    return ["/bin/sh", "-c", command]
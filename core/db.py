@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
+import socket
+import time
 import pymysql
+from core.net import timed_connect, elapsed_ms
 
 class DBManager:
     @staticmethod
@@ -20,6 +23,41 @@ class DBManager:
         except Exception as e:
             return False, str(e)
 
+    @staticmethod
+    def test_conn_timed(host, port, user, pwd, dbname="", timeout=5):
+        """分阶段测试数据库连接，返回 (是否成功, 信息, {阶段: 毫秒})"""
+        phases = {}
+        sock = None
+        try:
+            sock = timed_connect(host, port, timeout, phases)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            # 服务端问候包到达即握手完成（MSG_PEEK 不消费数据，留给 pymysql 解析）
+            start = time.perf_counter()
+            sock.recv(1, socket.MSG_PEEK)
+            phases["握手"] = elapsed_ms(start)
+
+            conn = pymysql.connect(
+                host=host,
+                port=int(port),
+                user=user,
+                password=pwd,
+                database=dbname or None,
+                charset="utf8mb4",
+                connect_timeout=timeout,
+                read_timeout=timeout,
+                defer_connect=True
+            )
+            start = time.perf_counter()
+            conn.connect(sock=sock)
+            phases["TLS/认证"] = elapsed_ms(start)
+            conn.close()
+            return True, "数据库连接成功！", phases
+        except Exception as e:
+            if sock:
+                sock.close()
+            return False, str(e), phases
+
     @staticmethod
     def exec_sql(host, port, user, pwd, dbname, sql):
         """执行SQL语句"""
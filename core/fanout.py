@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.config_manager import config_manager
+from core.ssh import ssh_sessions, read_channel, NO_EXIT_STATUS
+
+
+class FanoutExecutor:
+    """在多台主机上并发执行同一命令：并发数有上限，每台主机独立超时，结果逐台回调"""
+
+    def __init__(self, hosts, command, concurrency=20, timeout=60):
+        self.hosts = hosts
+        self.command = command
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self, on_result):
+        """阻塞执行，每台主机完成后回调 on_result(结果字典)"""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ssh-fanout") as pool:
+            futures = [pool.submit(self.run_host, h) for h in self.hosts]
+            for future in as_completed(futures):
+                on_result(future.result())
+
+    def run_host(self, host):
+        result = {
+            "name": host["name"],
+            "status": "ok",
+            "exit_code": None,
+            "output": "",
+            "error": "",
+            "duration": 0.0
+        }
+        if self.cancelled.is_set():
+            result["status"] = "cancelled"
+            return result
+
+        start = time.monotonic()
+        deadline = start + self.timeout
+        channel = None
+        session = None
+        try:
+            # 单台超时从开始计：建立连接、打开通道与执行共用同一期限
+            success, msg, _, session = ssh_sessions.get_session(
+                host["host"], host["port"], host["user"], host["password"], host["key_file"] or None,
+                timeout=min(self.timeout, config_manager.get("ssh_timeout"))
+            )
+            if not success:
+                result["status"] = "error"
+                result["error"] = msg
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                result["status"] = "timeout"
+                return result
+            channel = session.open_channel(timeout=remaining)
+            channel.exec_command(self.command)
+            lines = []
+            exit_code = read_channel(
+                channel, lines.extend,
+                lambda: not self.cancelled.is_set() and time.monotonic() < deadline
+            )
+            result["output"] = "\n".join(lines)
+            if exit_code is None:
+                result["status"] = "cancelled" if self.cancelled.is_set() else "timeout"
+            elif exit_code == NO_EXIT_STATUS:
+                # 没有退出码不等于执行失败：区分连接断开与命令未返回退出码
+                if session.is_active():
+                    result["status"] = "unknown"
+                else:
+                    result["status"] = "error"
+                    result["error"] = "执行中连接断开"
+            else:
+                result["exit_code"] = exit_code
+                if exit_code != 0:
+                    result["status"] = "failed"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e) or e.__class__.__name__
+        finally:
+            if channel:
+                session.release_channel(channel)
+            result["duration"] = time.monotonic() - start
+        return result
+
+
+def result_digest(result):
+    """按 (状态, 退出码, 输出内容) 计算摘要，输出完全相同的主机摘要相同"""
+    content = f"{result['status']}\0{result['exit_code']}\0{result['output']}\0{result['error']}"
+    return hashlib.sha1(content.encode("utf-8", errors="replace")).hexdigest()
+
+
+class ResultGrouper:
+    """增量合并结果：相同输出的主机归为一组"""
+
+    def __init__(self):
+        self.groups = {}  # 摘要 -> {"sample": 结果, "hosts": [主机名]}
+
+    def add(self, result):
+        """加入一条结果，返回其所属分组的摘要"""
+        digest = result_digest(result)
+        group = self.groups.setdefault(digest, {"sample": result, "hosts": []})
+        group["hosts"].append(result["name"])
+        return digest
+
+    def summary(self):
+        """按主机数降序的分组列表 [(摘要, 分组)]"""
+        return sorted(self.groups.items(), key=lambda item: len(item[1]["hosts"]), reverse=True)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import threading
+from app.store import store
+
+
+PASSWORD_MASK = "********"  # 导出文本中代替密码；导入时原样保留则沿用该主机已保存的密码
+
+
+class HostInventory:
+    """SSH主机清单：主机可属于多个分组，每台主机独立的凭据/私钥（保存在数据库 hosts 表，每台主机一行）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        self.data = {"hosts": store.list_hosts()}
+
+    @staticmethod
+    def make_host(host, port=22, user="root", password="", key_file="", groups=None, name=""):
+        return {
+            "name": name or f"{user}@{host}:{port}",
+            "host": host,
+            "port": int(port),
+            "user": user,
+            "password": password,
+            "key_file": key_file,
+            "groups": list(groups or [])
+        }
+
+    @staticmethod
+    def parse_line(line):
+        """解析一行主机定义：user@host:port [分组1,分组2] [password=xxx] [key=/path/id_rsa]"""
+        parts = line.split()
+        if not parts or parts[0].startswith("#"):
+            return None
+        target = parts[0]
+        user, _, hostport = target.rpartition("@")
+        host, _, port = hostport.partition(":")
+        groups, password, key_file = [], "", ""
+        for part in parts[1:]:
+            if part.startswith("password="):
+                password = part[len("password="):]
+            elif part.startswith("key="):
+                key_file = part[len("key="):]
+            else:
+                groups.extend(g for g in part.split(",") if g)
+        return HostInventory.make_host(host, port or 22, user or "root", password, key_file, groups)
+
+    def import_text(self, text, previous=None, replace=False):
+        """批量导入（同名主机覆盖），返回导入条数；密码为 PASSWORD_MASK 的沿用 previous（默认为当前清单）中的密码
+
+        只写入导入的主机行；replace=True 时先清空数据库中的清单
+        """
+        hosts = [h for h in (self.parse_line(line) for line in text.splitlines()) if h]
+        with self.lock:
+            if previous is None:
+                previous = {h["name"]: h["password"] for h in self.data["hosts"]}
+            for h in hosts:
+                if h["password"] == PASSWORD_MASK:
+                    h["password"] = previous.get(h["name"], "")
+            existing = {h["name"]: i for i, h in enumerate(self.data["hosts"])}
+            for h in hosts:
+                if h["name"] in existing:
+                    self.data["hosts"][existing[h["name"]]] = h
+                else:
+                    existing[h["name"]] = len(self.data["hosts"])
+                    self.data["hosts"].append(h)
+            store.save_hosts(hosts, replace)
+        return len(hosts)
+
+    def export_text(self):
+        """导出为文本（密码以 PASSWORD_MASK 代替，不以明文显示）"""
+        lines = []
+        for h in self.list_hosts():
+            line = f"{h['user']}@{h['host']}:{h['port']}"
+            if h["groups"]:
+                line += " " + ",".join(h["groups"])
+            if h["password"]:
+                line += f" password={PASSWORD_MASK}"
+            if h["key_file"]:
+                line += f" key={h['key_file']}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def replace_text(self, text):
+        """用文本整体替换清单"""
+        with self.lock:
+            previous = {h["name"]: h["password"] for h in self.data["hosts"]}
+            self.data["hosts"] = []
+        return self.import_text(text, previous, replace=True)
+
+    def list_hosts(self, group=None):
+        with self.lock:
+            hosts = [dict(h) for h in self.data["hosts"]]
+        if group:
+            hosts = [h for h in hosts if group in h["groups"]]
+        return hosts
+
+    def groups(self):
+        result = set()
+        for h in self.list_hosts():
+            result.update(h["groups"])
+        return sorted(result)
+
+
+# 全局实例
+inventory = HostInventory()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, deque
+
+
+# nginx/apache combined（末尾可选 $request_time 秒数）
+COMBINED_RE = re.compile(
+    r'^\S+ \S+ \S+ \[[^\]]+\] "(?:\S+) (\S+)[^"]*" (\d{3}) \S+(?: "[^"]*" "[^"]*")?(?: ([\d.]+))?')
+JSON_STATUS_KEYS = ("status", "status_code", "code")
+JSON_PATH_KEYS = ("path", "uri", "url", "request_uri")
+JSON_LATENCY_KEYS = ("request_time", "latency", "duration", "elapsed")  # 秒
+
+
+def parse_access_line(line):
+    """解析一行访问日志，返回 (状态码, 路径, 延迟毫秒或None)，无法识别返回 None"""
+    if line.startswith("{"):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        status = next((record[k] for k in JSON_STATUS_KEYS if k in record), None)
+        if status is None:
+            return None
+        path = next((record[k] for k in JSON_PATH_KEYS if k in record), "-")
+        latency = next((record[k] for k in JSON_LATENCY_KEYS if k in record), None)
+        return str(status), str(path).split("?")[0], parse_latency(latency)
+    m = COMBINED_RE.match(line)
+    if not m:
+        return None
+    path, status, latency = m.groups()
+    return status, path.split("?")[0], parse_latency(latency)
+
+
+def parse_latency(value):
+    """秒数转毫秒；缺失或无法识别（如 "-"、"1.2.3"、非数字类型）返回 None"""
+    if value is None or value == "":
+        return None
+    try:
+        latency = float(value) * 1000
+    except (ValueError, TypeError):
+        return None
+    return latency if 0 <= latency < math.inf else None
+
+
+class LatencySketch:
+    """对数分桶的分位数草图（DDSketch 思路）：相对误差 alpha，桶数有上限，可合并"""
+
+    def __init__(self, alpha=0.01, max_buckets=2048):
+        """max_buckets 为 None 时不合并桶（桶数受取值范围限制），此时 subtract 是精确的"""
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 1e-9:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if self.max_buckets and len(self.buckets) > self.max_buckets:
+            self.collapse()
+
+    def collapse(self):
+        """桶数超限时合并最低的两个桶（只损失最小值一端的精度）"""
+        lowest, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(lowest)
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        while self.max_buckets and len(self.buckets) > self.max_buckets:
+            self.collapse()
+
+    def subtract(self, other):
+        """减去此前 merge 进来的草图（用于滚动窗口移出过期的桶）"""
+        for index, count in other.buckets.items():
+            left = self.buckets.get(index, 0) - count
+            if left > 0:
+                self.buckets[index] = left
+            else:
+                self.buckets.pop(index, None)
+        self.zero_count -= other.zero_count
+        self.count -= other.count
+
+    def copy(self):
+        sketch = LatencySketch(self.alpha, self.max_buckets)
+        sketch.merge(self)
+        return sketch
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class SpaceSaving:
+    """Space-Saving 热点统计：只保留 capacity 个计数器，近似求 Top-K"""
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, key, count=1):
+        if key in self.counts or len(self.counts) < self.capacity:
+            self.counts[key] = self.counts.get(key, 0) + count
+            return
+        # 顶替当前最小的计数器（继承其计数作为误差上界）
+        victim = min(self.counts, key=self.counts.get)
+        self.counts[key] = self.counts.pop(victim) + count
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.add(key, count)
+
+    def top(self, k):
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+class SecondBucket:
+    """一秒内的聚合"""
+
+    def __init__(self, second):
+        self.second = second
+        self.closed = False
+        self.count = 0
+        self.status = Counter()
+        self.paths = SpaceSaving(100)
+        self.latency = LatencySketch()
+
+
+class LogAnalyzer:
+    """滚动窗口聚合：每秒一个桶，只保留最近 window 秒，内存与日志量无关
+
+    已结束的秒桶在结束时并入窗口汇总、过期时再减出，snapshot 只需把汇总与当前这一秒的桶相加，
+    不必每次把整个窗口的桶重新合并一遍。
+    """
+
+    def __init__(self, window=60):
+        self.window = window
+        self.buckets = deque()
+        self.lock = threading.Lock()
+        self.parsed = 0
+        self.skipped = 0
+        # 已结束各秒的汇总（路径用精确计数：每秒至多 100 个，窗口内总量有上限）
+        self.closed_count = 0
+        self.closed_status = Counter()
+        self.closed_paths = Counter()
+        self.closed_latency = LatencySketch(max_buckets=None)
+
+    def feed_lines(self, lines):
+        """逐行增量更新（可在读取线程中调用）"""
+        now = int(time.time())
+        with self.lock:
+            for line in lines:
+                record = parse_access_line(line)
+                if record is None:
+                    self.skipped += 1
+                    continue
+                self.parsed += 1
+                # 以到达时间分桶：重放旧日志时同样能看到速率
+                bucket = self.bucket_for(now)
+                status, path, latency = record
+                bucket.count += 1
+                bucket.status[status] += 1
+                bucket.paths.add(path)
+                if latency is not None:
+                    bucket.latency.add(latency)
+
+    def bucket_for(self, second):
+        # 已结束的桶不再写入（snapshot 可能已按时钟把它结束）
+        if not self.buckets or self.buckets[-1].second != second or self.buckets[-1].closed:
+            self.close_current()
+            self.buckets.append(SecondBucket(second))
+            self.expire(second)
+        return self.buckets[-1]
+
+    def close_current(self):
+        """当前秒桶不再写入：并入窗口汇总"""
+        if not self.buckets or self.buckets[-1].closed:
+            return
+        bucket = self.buckets[-1]
+        bucket.closed = True
+        self.closed_count += bucket.count
+        self.closed_status.update(bucket.status)
+        self.closed_paths.update(bucket.paths.counts)
+        self.closed_latency.merge(bucket.latency)
+
+    def expire(self, now):
+        while self.buckets and self.buckets[0].second <= now - self.window:
+            bucket = self.buckets.popleft()
+            if bucket.closed:
+                self.closed_count -= bucket.count
+                self.closed_status -= bucket.status
+                self.closed_paths -= bucket.paths.counts
+                self.closed_latency.subtract(bucket.latency)
+
+    def snapshot(self, top=10):
+        """窗口汇总加上当前秒桶"""
+        now = int(time.time())
+        with self.lock:
+            if self.buckets and self.buckets[-1].second < now:
+                self.close_current()
+            self.expire(now)
+            parsed, skipped = self.parsed, self.skipped
+            first = self.buckets[0].second if self.buckets else None
+            total = self.closed_count
+            status = self.closed_status.copy()
+            paths = self.closed_paths.copy()
+            latency = self.closed_latency.copy()
+            if self.buckets and not self.buckets[-1].closed:
+                current = self.buckets[-1]
+                total += current.count
+                status.update(current.status)
+                paths.update(current.paths.counts)
+                latency.merge(current.latency)
+        span = min(self.window, max(now - first + 1, 1)) if first is not None else 1
+        return {
+            "total": total,
+            "rps": total / span,
+            "status": status.most_common(),
+            "top_paths": paths.most_common(top),
+            "p50": latency.quantile(0.5),
+            "p90": latency.quantile(0.9),
+            "p99": latency.quantile(0.99),
+            "parsed": parsed,
+            "skipped": skipped
+        }
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import calendar
+import heapq
+import re
+import time
+from datetime import datetime
+
+
+MONTHS = {m: i for i, m in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+
+# nginx/apache：[10/Oct/2000:13:55:36 -0700]
+CLF_RE = re.compile(r"\[(\d{2})/(\w{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2})(?: ([+-])(\d{2})(\d{2}))?\]")
+# ISO 8601 / 常见应用日志：2024-01-02T03:04:05.123+08:00、2024-01-02 03:04:05,123
+ISO_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,](\d{1,6}))?(Z|[+-]\d{2}:?\d{2})?")
+# syslog：Oct 10 13:55:36（无年份，按当前年份）
+SYSLOG_RE = re.compile(r"^(\w{3}) +(\d{1,2}) (\d{2}):(\d{2}):(\d{2})")
+
+
+def tz_offset(sign, hours, minutes):
+    offset = int(hours) * 3600 + int(minutes) * 60
+    return -offset if sign == "-" else offset
+
+
+def parse_timestamp(line):
+    """从日志行中解析时间戳（UTC 秒），无法识别返回 None；无时区的按本地时间处理"""
+    m = CLF_RE.search(line)
+    if m:
+        day, mon, year, hh, mm, ss, sign, oh, om = m.groups()
+        month = MONTHS.get(mon)
+        if month:
+            ts = calendar.timegm((int(year), month, int(day), int(hh), int(mm), int(ss)))
+            return ts - tz_offset(sign, oh, om) if sign else ts
+    m = ISO_RE.search(line)
+    if m:
+        year, month, day, hh, mm, ss, frac, tz = m.groups()
+        fields = (int(year), int(month), int(day), int(hh), int(mm), int(ss))
+        fraction = float(f"0.{frac}") if frac else 0.0
+        if tz is None:
+            return time.mktime(fields + (0, 0, -1)) + fraction
+        ts = calendar.timegm(fields)
+        if tz != "Z":
+            tz = tz.replace(":", "")
+            ts -= tz_offset(tz[0], tz[1:3], tz[3:5])
+        return ts + fraction
+    m = SYSLOG_RE.match(line)
+    if m:
+        mon, day, hh, mm, ss = m.groups()
+        month = MONTHS.get(mon)
+        if month:
+            year = datetime.now().year
+            return time.mktime((year, month, int(day), int(hh), int(mm), int(ss), 0, 0, -1))
+    return None
+
+
+class ReorderMerger:
+    """多路日志按时间戳 k 路归并，带小的重排窗口
+
+    每路各自基本有序：当所有活跃来源的最新时间戳都已越过某行（水位线），该行即可输出；
+    某一路暂时没有新数据时，行最多在堆里等待 window 秒后强制输出，避免静默来源阻塞整体。
+    无时间戳的行（如堆栈续行）沿用同一来源上一行的时间戳，保持与其紧邻。
+    """
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self.heap = []
+        self.seq = 0
+        self.last_ts = {}  # 来源 -> 最近时间戳
+
+    def add_source(self, source):
+        self.last_ts.setdefault(source, None)
+
+    def remove_source(self, source):
+        self.last_ts.pop(source, None)
+
+    def push(self, source, line, now=None):
+        ts = parse_timestamp(line)
+        if ts is None:
+            ts = self.last_ts.get(source)
+            if ts is None:
+                ts = time.time()
+        self.last_ts[source] = ts
+        self.seq += 1
+        heapq.heappush(self.heap, (ts, self.seq, now or time.monotonic(), source, line))
+
+    def watermark(self):
+        values = list(self.last_ts.values())
+        if not values or None in values:
+            return None
+        return min(values)
+
+    def pop_ready(self, now=None, flush=False):
+        """取出可以输出的行 [(来源, 行)]，按时间顺序"""
+        now = now or time.monotonic()
+        mark = self.watermark()
+        ready = []
+        while self.heap:
+            ts, _, arrived, source, line = self.heap[0]
+            if flush or (mark is not None and ts <= mark) or now - arrived >= self.window:
+                heapq.heappop(self.heap)
+                ready.append((source, line))
+            else:
+                break
+        return ready
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from core.ssh import ssh_sessions, read_channel, NO_EXIT_STATUS
+
+
+# 一次采样只执行一条远端命令：只读 /proc 与 df，不启动 top/netstat 这类重量级进程
+SAMPLE_COMMAND = (
+    "echo @@uptime; cat /proc/uptime; "
+    "echo @@stat; head -n 1 /proc/stat; "
+    "echo @@mem; cat /proc/meminfo; "
+    "echo @@net; cat /proc/net/dev; "
+    "echo @@load; cat /proc/loadavg; "
+    "echo @@disk; df -P -k 2>/dev/null"
+)
+
+# 时间序列中保存的指标
+METRIC_NAMES = ("cpu", "mem", "disk", "load", "rx", "tx")
+
+
+def split_sections(lines):
+    """按 @@名称 分段：{名称: [行]}"""
+    sections = {}
+    current = None
+    for line in lines:
+        if line.startswith("@@"):
+            current = sections.setdefault(line[2:].strip(), [])
+        elif current is not None and line.strip():
+            current.append(line)
+    return sections
+
+
+def parse_sample(lines):
+    """把一次采样的原始输出解析为计数器（CPU 与网卡为累计值，速率需与上一次相减）"""
+    sections = split_sections(lines)
+    raw = {}
+
+    uptime = sections.get("uptime")
+    if uptime:
+        raw["uptime"] = float(uptime[0].split()[0])
+
+    stat = sections.get("stat")
+    if stat and stat[0].startswith("cpu"):
+        values = [int(v) for v in stat[0].split()[1:9]]
+        # user nice system idle iowait irq softirq steal
+        raw["cpu_total"] = sum(values)
+        raw["cpu_idle"] = values[3] + (values[4] if len(values) > 4 else 0)
+
+    mem = {}
+    for line in sections.get("mem", []):
+        name, _, rest = line.partition(":")
+        parts = rest.split()
+        if parts:
+            mem[name] = int(parts[0])
+    if mem.get("MemTotal"):
+        available = mem.get("MemAvailable")
+        if available is None:
+            available = mem.get("MemFree", 0) + mem.get("Buffers", 0) + mem.get("Cached", 0)
+        raw["mem"] = (mem["MemTotal"] - available) * 100.0 / mem["MemTotal"]
+        raw["mem_total_kb"] = mem["MemTotal"]
+
+    rx = tx = 0
+    for line in sections.get("net", []):
+        name, sep, rest = line.partition(":")
+        if not sep or name.strip() == "lo":
+            continue
+        fields = rest.split()
+        if len(fields) >= 9:
+            rx += int(fields[0])
+            tx += int(fields[8])
+    if sections.get("net"):
+        raw["rx_bytes"] = rx
+        raw["tx_bytes"] = tx
+
+    load = sections.get("load")
+    if load:
+        raw["load"] = float(load[0].split()[0])
+
+    # 取真实块设备中使用率最高的文件系统
+    disk = None
+    for line in sections.get("disk", [])[1:]:
+        fields = line.split()
+        if len(fields) >= 6 and fields[0].startswith("/") and fields[4].endswith("%"):
+            percent = float(fields[4][:-1])
+            disk = percent if disk is None else max(disk, percent)
+    if disk is not None:
+        raw["disk"] = disk
+    return raw
+
+
+def compute_rates(prev, raw):
+    """根据相邻两次采样计算指标；以远端 uptime 计时，不受网络延迟抖动影响"""
+    metrics = {"mem": raw.get("mem"), "disk": raw.get("disk"), "load": raw.get("load"),
+               "cpu": None, "rx": None, "tx": None}
+    if not prev:
+        return metrics
+    if "cpu_total" in raw and "cpu_total" in prev:
+        total = raw["cpu_total"] - prev["cpu_total"]
+        idle = raw["cpu_idle"] - prev["cpu_idle"]
+        if total > 0:
+            metrics["cpu"] = max(0.0, min(100.0, (total - idle) * 100.0 / total))
+    elapsed = raw.get("uptime", 0) - prev.get("uptime", 0)
+    if elapsed > 0 and "rx_bytes" in raw and "rx_bytes" in prev:
+        # 计数器回绕或网卡变化时差值为负，丢弃这一点
+        rx = raw["rx_bytes"] - prev["rx_bytes"]
+        tx = raw["tx_bytes"] - prev["tx_bytes"]
+        if rx >= 0 and tx >= 0:
+            metrics["rx"] = rx / elapsed
+            metrics["tx"] = tx / elapsed
+    return metrics
+
+
+class HostSeries:
+    """单台主机的定长时间序列（环形缓冲，内存占用固定）"""
+
+    def __init__(self, name, size):
+        self.name = name
+        self.times = deque(maxlen=size)
+        self.values = {metric: deque(maxlen=size) for metric in METRIC_NAMES}
+        self.prev = None
+        self.error = ""
+        self.duration = 0.0
+        self.updated = 0.0
+
+    def add(self, raw, duration):
+        metrics = compute_rates(self.prev, raw)
+        self.prev = raw
+        self.error = ""
+        self.duration = duration
+        self.updated = time.time()
+        self.times.append(self.updated)
+        for metric in METRIC_NAMES:
+            self.values[metric].append(metrics[metric])
+
+    def latest(self, metric):
+        values = self.values[metric]
+        return values[-1] if values else None
+
+    def history(self, metric):
+        return list(self.values[metric])
+
+
+class MetricsSampler:
+    """周期性采集多台主机的 CPU/内存/磁盘/网络指标
+
+    每台主机每次采样只在复用的 SSH 会话上开一个通道执行一条命令；
+    上一次采样尚未返回的主机本轮跳过，慢主机不会造成任务堆积。
+    """
+
+    def __init__(self, hosts, interval=5, history=720, concurrency=20, timeout=10):
+        self.hosts = hosts
+        self.interval = interval
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.series = {h["name"]: HostSeries(h["name"], history) for h in hosts}
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.pool = None
+
+    def start(self):
+        self.stop_event.clear()
+        self.in_flight.clear()
+        self.pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ssh-metrics")
+        self.thread = threading.Thread(target=self.loop, name="ssh-metrics-timer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.pool:
+            # 丢弃排队中的采样；已在执行的采样看到 stop_event 后尽快返回，不再新建连接
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def loop(self):
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            for host in self.hosts:
+                with self.lock:
+                    if host["name"] in self.in_flight:
+                        continue
+                    self.in_flight.add(host["name"])
+                try:
+                    self.pool.submit(self.sample_host, host)
+                except RuntimeError:
+                    # 线程池已关闭
+                    return
+            self.stop_event.wait(max(self.interval - (time.monotonic() - started), 0.1))
+
+    def sample_host(self, host):
+        series = self.series[host["name"]]
+        start = time.monotonic()
+        deadline = start + self.timeout
+        channel = None
+        session = None
+        try:
+            if self.stop_event.is_set():
+                return
+            success, msg, _, session = ssh_sessions.get_session(
+                host["host"], host["port"], host["user"], host["password"], host["key_file"] or None
+            )
+            if not success:
+                series.error = msg
+                return
+            channel = session.open_channel(timeout=self.timeout)
+            channel.exec_command(SAMPLE_COMMAND)
+            lines = []
+            exit_code = read_channel(
+                channel, lines.extend,
+                lambda: not self.stop_event.is_set() and time.monotonic() < deadline
+            )
+            if exit_code is None:
+                if not self.stop_event.is_set():
+                    series.error = "采样超时"
+                return
+            if exit_code == NO_EXIT_STATUS and not session.is_active():
+                # 连接中途断开：输出可能不完整，不计入本次采样
+                series.error = "采样时连接断开"
+                return
+            raw = parse_sample(lines)
+            if not raw:
+                series.error = "无法解析采样结果（需要 Linux /proc）"
+                return
+            series.add(raw, time.monotonic() - start)
+        except Exception as e:
+            series.error = str(e) or e.__class__.__name__
+        finally:
+            if channel:
+                session.release_channel(channel)
+            with self.lock:
+                self.in_flight.discard(host["name"])
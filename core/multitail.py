@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import queue
+import re
+import shlex
+import threading
+from core.ssh import ssh_sessions, read_channel
+from core.log_merge import ReorderMerger
+
+
+def build_tail_command(path, pattern="", lines=0):
+    """远端跟踪命令：过滤在服务端完成，只有匹配的行经过网络"""
+    command = f"tail -n {int(lines)} -F {shlex.quote(path)}"
+    if pattern:
+        command += f" | grep --line-buffered -E -- {shlex.quote(pattern)}"
+    return command
+
+
+FOLLOW_MARKER = "@@follow "
+
+
+def parse_follow_command(command):
+    """识别单个文件的 tail -f/-F 命令，返回 (路径, 初始行数)；带管道、多文件等其他命令返回 None"""
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return None
+    if not args or args[0] != "tail":
+        return None
+    follow = False
+    lines = "10"
+    path = None
+    i = 1
+    while i < len(args):
+        arg = args[i]
+        if arg in ("-f", "-F", "--follow", "--follow=name", "--follow=descriptor") or re.fullmatch(r"-[fF]+", arg):
+            follow = True
+        elif arg == "--retry":
+            pass
+        elif arg in ("-n", "--lines"):
+            i += 1
+            lines = args[i] if i < len(args) else ""
+        elif arg.startswith("--lines="):
+            lines = arg[len("--lines="):]
+        elif re.fullmatch(r"-[fF]?n\d+", arg):
+            follow = follow or arg[1] in "fF"
+            lines = arg.split("n", 1)[1]
+        elif re.fullmatch(r"-\d+[fF]?", arg):
+            follow = follow or arg[-1] in "fF"
+            lines = arg.strip("-fF")
+        elif arg.startswith("-") or path is not None:
+            return None
+        else:
+            path = arg
+        i += 1
+    if not follow or path is None or not lines.isdigit():
+        return None
+    return path, int(lines)
+
+
+def build_follow_command(path, lines=10, start_line=None):
+    """可续传的跟踪命令：先输出一行 "@@follow 起始行号"，再从该行开始 tail -F
+    首次执行按文件当前行数换算出最后 lines 行的行号；断线重连时直接从 start_line 继续"""
+    quoted = shlex.quote(path)
+    if start_line is None:
+        start = f"n=$(wc -l < {quoted} 2>/dev/null || echo 0); s=$((n > {int(lines)} ? n - {int(lines)} + 1 : 1))"
+    else:
+        start = f"s={int(start_line)}"
+    return f'{start}; echo "{FOLLOW_MARKER}$s"; exec tail -n +$s -F {quoted}'
+
+
+class MultiTail:
+    """同时跟踪多台主机上的多个日志文件（每个文件一个通道），按时间戳归并为一条有序流"""
+
+    def __init__(self, hosts, paths, pattern="", window=2.0, lines=0):
+        self.hosts = hosts
+        self.paths = paths
+        self.pattern = pattern
+        self.lines = lines
+        self.merger = ReorderMerger(window)
+        self.queue = queue.Queue()
+        self.running = False
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.running = True
+        for host in self.hosts:
+            for path in self.paths:
+                source = f"{host['name']}:{path}"
+                self.merger.add_source(source)
+                with self.lock:
+                    self.active += 1
+                threading.Thread(
+                    target=self.follow, args=(host, path, source), name="ssh-tail", daemon=True
+                ).start()
+
+    def stop(self):
+        self.running = False
+
+    def is_finished(self):
+        with self.lock:
+            return self.active == 0 and self.queue.empty()
+
+    def follow(self, host, path, source):
+        channel = None
+        session = None
+        try:
+            success, msg, _, session = ssh_sessions.get_session(
+                host["host"], host["port"], host["user"], host["password"], host["key_file"] or None
+            )
+            if not success:
+                self.queue.put((source, None, f"连接失败：{msg}"))
+                return
+            channel = session.open_channel()
+            channel.exec_command(build_tail_command(path, self.pattern, self.lines))
+            read_channel(channel, lambda lines: self.queue.put((source, lines, None)), lambda: self.running)
+            if self.running:
+                self.queue.put((source, None, "跟踪已结束"))
+        except Exception as e:
+            self.queue.put((source, None, f"执行错误：{str(e)}"))
+        finally:
+            if channel:
+                session.release_channel(channel)
+            with self.lock:
+                self.active -= 1
+
+    def poll(self, timeout=0.1):
+        """收取各通道的新行并归并，返回可显示的行（带来源前缀）"""
+        output = []
+        try:
+            item = self.queue.get(timeout=timeout)
+            while True:
+                source, lines, message = item
+                if lines is None:
+                    # 来源结束：不再等待它的水位线
+                    self.merger.remove_source(source)
+                    output.append(f"[{source}] {message}")
+                else:
+                    for line in lines:
+                        self.merger.push(source, line)
+                item = self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        flush = self.is_finished()
+        output.extend(f"[{source}] {line}" for source, line in self.merger.pop_ready(flush=flush))
+        return output
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import socket
+import time
+
+
+def elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def timed_connect(host, port, timeout, phases):
+    """分阶段建立TCP连接：DNS解析、TCP握手，耗时（毫秒）写入 phases"""
+    start = time.perf_counter()
+    addrs = socket.getaddrinfo(host, int(port), 0, socket.SOCK_STREAM)
+    phases["DNS解析"] = elapsed_ms(start)
+
+    error = None
+    start = time.perf_counter()
+    for family, socktype, proto, _, addr in addrs:
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(addr)
+            phases["TCP连接"] = elapsed_ms(start)
+            return sock
+        except OSError as e:
+            error = e
+            sock.close()
+    raise error or OSError(f"无法解析主机：{host}")
+
+
+def format_phases(phases):
+    """把阶段耗时格式化为多行文本"""
+    lines = [f"{name}：{ms:.1f} ms" for name, ms in phases.items()]
+    if phases:
+        lines.append(f"合计：{sum(phases.values()):.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from app.store import store
+from core.batch import make_runner
+from core.ssh import ssh_sessions, read_channel
+from core.inventory import inventory
+from core.profile import profile_manager
+from core.db import DBManager
+
+
+STEP_TYPES = ("cmd", "ps1", "ssh", "sql")
+FAILURE_POLICIES = ("stop", "continue")
+OK_STATUSES = ("ok", "cached")
+MAX_CACHED_LINES = 5000  # 缓存中每步保留的输出行数
+MAX_CACHE_ENTRIES = 500
+
+EXAMPLE = """{
+    "steps": [
+        {"id": "prepare", "type": "cmd", "command": "echo 准备", "cache": true, "inputs": []},
+        {"id": "remote", "type": "ssh", "host": "主机清单中的名称", "command": "uptime", "depends": ["prepare"]},
+        {"id": "query", "type": "sql", "profile": "数据库连接配置名称", "sql": "SELECT NOW()",
+         "depends": ["prepare"], "on_failure": "continue"},
+        {"id": "report", "type": "ps1", "command": "Get-Date", "depends": ["remote", "query"], "timeout": 60}
+    ]
+}"""
+
+
+class PipelineError(ValueError):
+    pass
+
+
+def normalize_step(raw):
+    """校验一个步骤定义并补全默认值（定时任务也用它描述要执行的命令）"""
+    if not isinstance(raw, dict):
+        raise PipelineError("步骤必须是对象")
+    step_id = str(raw.get("id", "")).strip()
+    if not step_id:
+        raise PipelineError("每个步骤都需要 id")
+    step_type = raw.get("type", "cmd")
+    if step_type not in STEP_TYPES:
+        raise PipelineError(f"步骤 {step_id} 的类型无效：{step_type}")
+    command = raw.get("sql" if step_type == "sql" else "command", "")
+    if not str(command).strip():
+        raise PipelineError(f"步骤 {step_id} 缺少{'sql' if step_type == 'sql' else 'command'}")
+    if step_type == "ssh" and not raw.get("host"):
+        raise PipelineError(f"步骤 {step_id} 缺少 host")
+    if step_type == "sql" and not raw.get("profile"):
+        raise PipelineError(f"步骤 {step_id} 缺少 profile")
+    on_failure = raw.get("on_failure", "stop")
+    if on_failure not in FAILURE_POLICIES:
+        raise PipelineError(f"步骤 {step_id} 的 on_failure 无效：{on_failure}")
+    return {
+        "id": step_id,
+        "type": step_type,
+        "command": str(command),
+        "host": raw.get("host", ""),
+        "profile": raw.get("profile", ""),
+        "depends": [str(d) for d in raw.get("depends", [])],
+        "on_failure": on_failure,
+        "cache": bool(raw.get("cache", False)),
+        "inputs": [str(p) for p in raw.get("inputs", [])],
+        "timeout": float(raw.get("timeout", 0) or 0)
+    }
+
+
+def parse_pipeline(text):
+    """解析并校验流水线定义（JSON），返回按依赖排好序的步骤列表；定义有误抛出 PipelineError
+
+    步骤字段：id、type（cmd/ps1/ssh/sql）、command（sql 类型为 sql）、host（ssh，主机清单名称）、
+    profile（sql，数据库连接配置名称）、depends、on_failure（stop 失败即停止整个流水线 / continue 视为可忽略）、
+    cache（是否按输入缓存结果）、inputs（参与缓存键计算的本地文件/目录）、timeout（秒）
+    """
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise PipelineError(f"JSON 格式错误：{str(e)}")
+    steps = data.get("steps") if isinstance(data, dict) else data
+    if not isinstance(steps, list) or not steps:
+        raise PipelineError("流水线中没有步骤（steps）")
+
+    normalized = {}
+    for raw in steps:
+        step = normalize_step(raw)
+        if step["id"] in normalized:
+            raise PipelineError(f"步骤 id 重复：{step['id']}")
+        normalized[step["id"]] = step
+
+    # 拓扑排序（Kahn），同时发现未知依赖和环
+    for step in normalized.values():
+        for dep in step["depends"]:
+            if dep not in normalized:
+                raise PipelineError(f"步骤 {step['id']} 依赖的步骤不存在：{dep}")
+    remaining = {sid: set(s["depends"]) for sid, s in normalized.items()}
+    ordered = []
+    while remaining:
+        ready = [sid for sid, deps in remaining.items() if not deps]
+        if not ready:
+            raise PipelineError(f"步骤之间存在循环依赖：{', '.join(sorted(remaining))}")
+        for sid in ready:
+            ordered.append(normalized[sid])
+            del remaining[sid]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return ordered
+
+
+def hash_path(digest, path):
+    """把文件/目录的内容计入摘要（目录按相对路径排序遍历），不存在的路径也计入"""
+    digest.update(f"\0path:{path}\0".encode("utf-8"))
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1048576), b""):
+                digest.update(block)
+    elif os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                hash_path(digest, os.path.join(root, name))
+    else:
+        digest.update(b"\0missing\0")
+
+
+def step_key(step, dep_digests):
+    """缓存键：步骤定义 + 输入文件内容 + 各依赖步骤的输出摘要（上游输出变化会让下游失效）"""
+    digest = hashlib.sha256()
+    definition = {k: step[k] for k in ("type", "command", "host", "profile")}
+    digest.update(json.dumps(definition, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    for path in step["inputs"]:
+        hash_path(digest, path)
+    for dep in step["depends"]:
+        digest.update(f"\0dep:{dep}:{dep_digests.get(dep, '')}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """流水线步骤结果缓存（SQLite 的 step_results 表）：只缓存成功的结果，超出上限时淘汰最早的
+
+    每条结果一行，写入一步只插入该行，不再整体重写全部缓存。
+    """
+
+    def get(self, key):
+        return store.get_step_result(key)
+
+    def put(self, key, entry):
+        store.put_step_result(key, entry, MAX_CACHE_ENTRIES)
+
+    def clear(self):
+        store.clear_step_results()
+
+
+class StepOutput:
+    """收集一个步骤的输出：转发给界面，同时累计摘要并保留最后若干行用于缓存"""
+
+    def __init__(self, step_id, on_event):
+        self.step_id = step_id
+        self.on_event = on_event
+        self.digest = hashlib.sha256()
+        self.lines = []
+
+    def __call__(self, lines):
+        for line in lines:
+            self.digest.update(line.encode("utf-8", errors="replace") + b"\n")
+        self.lines.extend(lines)
+        if len(self.lines) > MAX_CACHED_LINES:
+            del self.lines[:len(self.lines) - MAX_CACHED_LINES]
+        self.on_event(self.step_id, "lines", lines)
+
+
+class PipelineRunner:
+    """按依赖关系执行流水线：依赖都完成的步骤并行执行（并行数有上限），每步的输出和状态逐步回调
+
+    on_event(步骤id, 事件, 数据)：事件 "status" 数据为状态字典，"lines" 数据为输出行列表。
+    步骤失败时按 on_failure 处理：stop 不再启动新步骤（执行中的步骤继续完成），continue 不影响下游；
+    依赖未成功的步骤标记为跳过。
+    """
+
+    def __init__(self, steps, max_parallel=4, cache=None):
+        self.steps = steps
+        self.max_parallel = max_parallel
+        self.cache = cache
+        self.cancelled = threading.Event()
+        self.stoppers = {}  # 步骤id -> 停止函数
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+        with self.lock:
+            stoppers = list(self.stoppers.values())
+        for stop in stoppers:
+            stop()
+
+    def run(self, on_event):
+        """阻塞执行，返回 {步骤id: 结果}"""
+        steps = {s["id"]: s for s in self.steps}
+        pending = [s["id"] for s in self.steps]
+        results = {}
+        running = {}
+        halted = False
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="pipeline") as pool:
+            while pending or running:
+                for sid in list(pending):
+                    deps = [results.get(d) for d in steps[sid]["depends"]]
+                    if any(r is None for r in deps):
+                        continue
+                    pending.remove(sid)
+                    blocked = [r["id"] for r in deps if not self.dep_satisfied(steps[r["id"]], r)]
+                    if halted or self.cancelled.is_set() or blocked:
+                        reason = f"依赖步骤未成功：{', '.join(blocked)}" if blocked else "流水线已停止"
+                        results[sid] = self.skip(sid, reason, on_event)
+                        continue
+                    dep_digests = {r["id"]: r["digest"] for r in deps}
+                    running[pool.submit(self.run_step, steps[sid], dep_digests, on_event)] = sid
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    sid = running.pop(future)
+                    result = future.result()
+                    results[sid] = result
+                    if result["status"] not in OK_STATUSES and steps[sid]["on_failure"] == "stop":
+                        halted = True
+        for sid in pending:
+            results[sid] = self.skip(sid, "流水线已停止", on_event)
+        return results
+
+    @staticmethod
+    def dep_satisfied(step, result):
+        return result["status"] in OK_STATUSES or (
+            result["status"] in ("failed", "timeout", "error") and step["on_failure"] == "continue")
+
+    @staticmethod
+    def skip(step_id, reason, on_event):
+        result = {"id": step_id, "status": "skipped", "exit_code": None, "duration": 0.0,
+                  "digest": "", "error": reason}
+        on_event(step_id, "status", result)
+        return result
+
+    def run_step(self, step, dep_digests, on_event):
+        sid = step["id"]
+        result = {"id": sid, "status": "running", "exit_code": None, "duration": 0.0, "digest": "", "error": ""}
+        on_event(sid, "status", dict(result))
+        start = time.monotonic()
+        key = None
+        try:
+            if step["cache"] and self.cache:
+                key = step_key(step, dep_digests)
+                entry = self.cache.get(key)
+                if entry:
+                    finished = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["finished"]))
+                    on_event(sid, "lines", [f"===== 输入未变化，使用 {finished} 的缓存结果 ====="] + entry["output"])
+                    result.update(status="cached", exit_code=entry["exit_code"], digest=entry["digest"])
+                    return result
+            output = StepOutput(sid, on_event)
+            timed_out = threading.Event()
+            timer = None
+            if step["timeout"]:
+                def on_timeout():
+                    timed_out.set()
+                    self.stop_step(sid)
+                timer = threading.Timer(step["timeout"], on_timeout)
+                timer.start()
+            try:
+                exit_code = self.execute(step, output, timed_out)
+            finally:
+                if timer:
+                    timer.cancel()
+                with self.lock:
+                    self.stoppers.pop(sid, None)
+            result["exit_code"] = exit_code
+            result["digest"] = output.digest.hexdigest()
+            if self.cancelled.is_set():
+                result["status"] = "cancelled"
+            elif timed_out.is_set():
+                result["status"] = "timeout"
+            else:
+                result["status"] = "ok" if exit_code == 0 else "failed"
+            if result["status"] == "ok" and key:
+                self.cache.put(key, {"step": sid, "exit_code": exit_code, "digest": result["digest"],
+                                     "output": output.lines, "finished": time.time()})
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e) or e.__class__.__name__
+            on_event(sid, "lines", [f"执行错误：{result['error']}"])
+        finally:
+            result["duration"] = time.monotonic() - start
+            on_event(sid, "status", dict(result))
+        return result
+
+    def set_stopper(self, step_id, stop):
+        with self.lock:
+            self.stoppers[step_id] = stop
+        if self.cancelled.is_set():
+            stop()
+
+    def stop_step(self, step_id):
+        with self.lock:
+            stop = self.stoppers.get(step_id)
+        if stop:
+            stop()
+
+    # ========== 各类型步骤 ==========
+    def execute(self, step, output, timed_out):
+        """执行一个步骤，返回退出码（0 为成功）"""
+        if step["type"] in ("cmd", "ps1"):
+            runner = make_runner(step["type"], step["command"])
+            self.set_stopper(step["id"], runner.stop)
+            return runner.run(output).exit_code
+        if step["type"] == "ssh":
+            return self.execute_ssh(step, output, timed_out)
+        return self.execute_sql(step, output)
+
+    def execute_ssh(self, step, output, timed_out):
+        hosts = [h for h in inventory.list_hosts() if h["name"] == step["host"]]
+        if not hosts:
+            raise RuntimeError(f"主机清单中没有：{step['host']}")
+        host = hosts[0]
+        success, msg, _, session = ssh_sessions.get_session(
+            host["host"], host["port"], host["user"], host["password"], host["key_file"] or None)
+        if not success:
+            raise RuntimeError(msg)
+        channel = session.open_channel()
+        stopped = threading.Event()
+        self.set_stopper(step["id"], stopped.set)
+        try:
+            channel.exec_command(step["command"])
+            exit_code = read_channel(channel, output, lambda: not stopped.is_set())
+        finally:
+            session.release_channel(channel)
+        return -1 if exit_code is None else exit_code
+
+    @staticmethod
+    def execute_sql(step, output):
+        # pymysql 的查询不可中途取消，停止/超时在查询返回后生效
+        profile = profile_manager.get_profile(step["profile"])
+        if not profile:
+            raise RuntimeError(f"数据库连接配置不存在：{step['profile']}")
+        success, result = DBManager.exec_sql(profile["host"], profile["port"], profile["user"],
+                                             profile["password"], profile["dbname"], step["command"])
+        if not success:
+            output([f"错误：{result}"])
+            return 1
+        if isinstance(result, str):
+            output([result])
+        elif result:
+            columns = list(result[0].keys())
+            output(["\t".join(columns)] + ["\t".join(str(row[c]) for c in columns) for row in result])
+        else:
+            output(["（无结果）"])
+        return 0
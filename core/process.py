@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+import os
+import queue
+import selectors
+import signal
+import subprocess
+import threading
+import time
+from core.stream import line_decoder
+from core.usage import UsageSampler
+
+
+CHUNK_SIZE = 65536
+KILL_GRACE = 2.0  # 先请求结束进程树，超时再强制杀掉（秒）
+EOF_GRACE = 1.0  # 停止后进程已退出，但仍有残留子进程占着管道时最多再等待的时间（秒）
+
+
+class ProcessResult:
+    def __init__(self, exit_code, duration, stopped, usage=None):
+        self.exit_code = exit_code
+        self.duration = duration
+        self.stopped = stopped  # 用户主动停止
+        self.usage = usage  # ResourceUsage，未统计时为 None
+
+
+class SelectorPipes:
+    """POSIX：用 selector 同时等待 stdout/stderr，可读时一次取走已到达的原始字节"""
+
+    def __init__(self, process):
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(process.stdout, selectors.EVENT_READ, False)
+        self.selector.register(process.stderr, selectors.EVENT_READ, True)
+
+    @property
+    def open(self):
+        return bool(self.selector.get_map())
+
+    def read(self, timeout):
+        """返回 [(是否 stderr, 字节)]，字节为空表示该管道已结束"""
+        chunks = []
+        for key, _ in self.selector.select(timeout):
+            data = os.read(key.fd, CHUNK_SIZE)
+            if not data:
+                self.selector.unregister(key.fileobj)
+            chunks.append((key.data, data))
+        return chunks
+
+    def close(self):
+        self.selector.close()
+
+
+class ThreadedPipes:
+    """Windows：管道不支持 select，每个管道一个读取线程，把原始字节块放入同一队列"""
+
+    def __init__(self, process):
+        self.queue = queue.Queue()
+        self.remaining = 2
+        for pipe, is_err in ((process.stdout, False), (process.stderr, True)):
+            threading.Thread(target=self.pump, args=(pipe, is_err), daemon=True).start()
+
+    def pump(self, pipe, is_err):
+        try:
+            for data in iter(lambda: pipe.read1(CHUNK_SIZE), b""):
+                self.queue.put((is_err, data))
+        except (OSError, ValueError):
+            pass
+        self.queue.put((is_err, b""))
+
+    @property
+    def open(self):
+        return self.remaining > 0
+
+    def read(self, timeout):
+        chunks = []
+        try:
+            chunks.append(self.queue.get(timeout=timeout))
+            while True:
+                chunks.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        self.remaining -= sum(1 for _, data in chunks if not data)
+        return chunks
+
+    def close(self):
+        pass
+
+
+def open_pipes(process):
+    return ThreadedPipes(process) if os.name == "nt" else SelectorPipes(process)
+
+
+def popen(args, stdin=subprocess.DEVNULL, cwd=None, env=None):
+    """在独立的进程组（Windows 为独立进程树、不弹出窗口）中启动，stdout/stderr 为管道"""
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NO_WINDOW
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(args, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            cwd=cwd, env=env, **kwargs)
+
+
+def kill_process_tree(process):
+    """结束进程及其全部子进程（Windows 用 taskkill /T，POSIX 向独立的进程组发信号）"""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       creationflags=subprocess.CREATE_NO_WINDOW)
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    deadline = time.monotonic() + KILL_GRACE
+    while time.monotonic() < deadline:
+        try:
+            os.killpg(process.pid, 0)
+        except (ProcessLookupError, PermissionError):
+            return
+        process.poll()  # 回收直接子进程，避免其僵尸状态让进程组看起来仍然存在
+        time.sleep(0.05)
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class ProcessRunner:
+    """本地进程执行引擎（CMD/PowerShell 页面共用）
+
+    stdout/stderr 以原始字节块读取，按指定编码增量解码（多字节字符跨块不会乱码；encoding 为 auto 时自动识别），
+    stdin 接空设备，等待输入的命令不会卡住；输出按批回调，stderr 行加"错误："前缀（与 SSH 页面一致）；
+    进程在独立的进程组/进程树中启动，stop() 结束整棵进程树；measure=True 时统计进程树的资源占用（ProcessResult.usage）。
+    """
+
+    def __init__(self, args, encoding="utf-8", cwd=None, env=None, flush_interval=0.05, max_batch=2000,
+                 measure=False):
+        self.args = args
+        self.encoding = encoding
+        self.cwd = cwd
+        self.env = env
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.measure = measure
+        self.process = None
+        self.stopped = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.stopped:
+                return False
+            self.process = popen(self.args, cwd=self.cwd, env=self.env)
+        return True
+
+    def run(self, on_lines):
+        """启动并读取到进程结束（阻塞），返回 ProcessResult；启动失败抛出 OSError"""
+        started = time.monotonic()
+        if not self.start():
+            return ProcessResult(None, 0.0, True)
+        sampler = UsageSampler(self.process) if self.measure else None
+        pipes = open_pipes(self.process)
+        decoders = {False: line_decoder(self.encoding), True: line_decoder(self.encoding)}
+        batch = []
+        last_flush = time.monotonic()
+        exited_at = None
+        try:
+            while pipes.open:
+                for is_err, data in pipes.read(self.flush_interval):
+                    decoder = decoders[is_err]
+                    lines = decoder.feed(data) if data else decoder.flush()
+                    if is_err:
+                        batch.extend(f"错误：{line}" for line in lines)
+                    else:
+                        batch.extend(lines)
+                now = time.monotonic()
+                if batch and (len(batch) >= self.max_batch or now - last_flush >= self.flush_interval):
+                    on_lines(batch)
+                    batch = []
+                    last_flush = now
+                if self.stopped and self.process.poll() is not None:
+                    exited_at = exited_at or now
+                    if now - exited_at > EOF_GRACE:
+                        break
+        finally:
+            pipes.close()
+        if batch:
+            on_lines(batch)
+        if sampler:
+            exit_code, usage = sampler.finish()
+        else:
+            exit_code, usage = self.process.wait(), None
+        self.process.stdout.close()
+        self.process.stderr.close()
+        return ProcessResult(exit_code, time.monotonic() - started, self.stopped, usage)
+
+    def stop(self):
+        """可在任意线程调用：在后台结束整棵进程树（不阻塞调用方），run() 随后返回"""
+        with self.lock:
+            self.stopped = True
+            process = self.process
+        if process is not None:
+            threading.Thread(target=kill_process_tree, args=(process,), name="process-kill", daemon=True).start()
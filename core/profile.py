@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+import pymysql
+from app.config import config
+from app.config_manager import config_manager
+from app.store import store
+from utils.logger import logger
+
+
+# 健康状态排序：可用 < 未知 < 不可达
+HEALTH_RANK = {"ok": 0, "unknown": 1, "down": 2}
+
+
+class ProfileManager:
+    """数据库连接配置管理（完整凭据）：内存中为 config.data["db_profiles"]，逐条保存在数据库的 profiles 表"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.migrate_db_saved()
+
+    def migrate_db_saved(self):
+        """把旧版 db_saved 的 host:port 字符串迁移为完整配置"""
+        saved = config.data.pop("db_saved", None)
+        profiles = config.data.setdefault("db_profiles", [])
+        if saved is None:
+            return
+        config.save()
+        if not saved:
+            return
+        names = {p["name"] for p in profiles}
+        for item in saved:
+            host, _, port = str(item).partition(":")
+            if not host or item in names or not (port or "3306").isdigit():
+                logger.warning(f"跳过无法迁移的旧版数据库连接记录：{item}")
+                continue
+            profile = self.make_profile(item, host, port or "3306", "root", "", "")
+            profiles.append(profile)
+            store.save_profile(profile)
+        logger.info(f"已迁移 {len(saved)} 条旧版数据库连接记录")
+
+    @staticmethod
+    def make_profile(name, host, port, user, pwd, dbname):
+        return {
+            "name": name,
+            "host": host,
+            "port": int(port),
+            "user": user,
+            "password": pwd,
+            "dbname": dbname,
+            "last_used": 0
+        }
+
+    def list_profiles(self):
+        with self.lock:
+            return [dict(p) for p in config.data.get("db_profiles", [])]
+
+    def get_profile(self, name):
+        with self.lock:
+            for p in config.data.get("db_profiles", []):
+                if p["name"] == name:
+                    return dict(p)
+        return None
+
+    def save_profile(self, name, host, port, user, pwd, dbname):
+        """新增或覆盖同名配置"""
+        profile = self.make_profile(name, host, port, user, pwd, dbname)
+        with self.lock:
+            profiles = config.data.setdefault("db_profiles", [])
+            for i, p in enumerate(profiles):
+                if p["name"] == name:
+                    profile["last_used"] = p.get("last_used", 0)
+                    profiles[i] = profile
+                    break
+            else:
+                profiles.append(profile)
+            store.save_profile(profile)
+        return profile
+
+    def delete_profile(self, name):
+        with self.lock:
+            profiles = config.data.get("db_profiles", [])
+            config.data["db_profiles"] = [p for p in profiles if p["name"] != name]
+            store.delete_profile(name)
+
+    def touch(self, name):
+        """记录最近使用时间（决定哪些配置保持预热连接）"""
+        with self.lock:
+            for p in config.data.get("db_profiles", []):
+                if p["name"] == name:
+                    p["last_used"] = time.time()
+                    store.touch_profile(name, p["last_used"])
+                    return
+
+    def recent_profiles(self, count):
+        profiles = [p for p in self.list_profiles() if p.get("last_used")]
+        profiles.sort(key=lambda p: p["last_used"], reverse=True)
+        return profiles[:count]
+
+
+class ProfileProber:
+    """后台探测器：定期检测各配置的可达性与往返延迟，并为最近使用的配置保持预热连接"""
+
+    def __init__(self, manager, workers=4, warm_count=2):
+        self.manager = manager
+        self.warm_count = warm_count
+        self.workers = workers
+        self.pool = None
+        self.status = {}  # name -> {"health", "latency", "checked", "error"}
+        self.warm = {}  # name -> (连接参数, pymysql连接)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.running = True
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="db-probe")
+        self.thread = threading.Thread(target=self.run, name="db-prober", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """停止探测并关闭预热连接（程序退出时调用）；不等待进行中的探测，它们结束后不再保留连接"""
+        self.running = False
+        self.wakeup.set()
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            warm, self.warm = self.warm, {}
+        for _, conn in warm.values():
+            self.close_quietly(conn)
+
+    def probe_now(self):
+        """立即触发一轮探测（如新增配置后）"""
+        self.wakeup.set()
+
+    def run(self):
+        while self.running:
+            self.probe_all()
+            self.wakeup.wait(config_manager.get("profile_probe_interval"))
+            self.wakeup.clear()
+
+    def probe_all(self):
+        profiles = self.manager.list_profiles()
+        recent = {p["name"] for p in self.manager.recent_profiles(self.warm_count)}
+        try:
+            futures = [self.pool.submit(self.probe_one, p, p["name"] in recent) for p in profiles]
+        except RuntimeError:
+            # 探测期间已停止（线程池已关闭）
+            return
+        for f in futures:
+            try:
+                f.result()
+            except CancelledError:
+                continue
+            except Exception as e:
+                logger.error(f"连接探测异常：{str(e)}")
+        self.drop_stale_warm(recent)
+
+    def probe_one(self, profile, keep_warm):
+        name = profile["name"]
+        if keep_warm:
+            latency, error = self.ping_warm(profile)
+        else:
+            latency, error = self.tcp_probe(profile["host"], profile["port"])
+        with self.lock:
+            self.status[name] = {
+                "health": "down" if error else "ok",
+                "latency": latency,
+                "checked": time.time(),
+                "error": error
+            }
+
+    @staticmethod
+    def tcp_probe(host, port, timeout=3):
+        """TCP握手耗时（毫秒），不做认证"""
+        start = time.perf_counter()
+        try:
+            sock = socket.create_connection((host, int(port)), timeout=timeout)
+            sock.close()
+            return (time.perf_counter() - start) * 1000, ""
+        except Exception as e:
+            return None, str(e)
+
+    @staticmethod
+    def conn_key(profile):
+        return (profile["host"], profile["port"], profile["user"], profile["password"], profile["dbname"])
+
+    def ping_warm(self, profile):
+        """对预热连接执行 ping（断开自动重连），返回应用层往返延迟"""
+        name = profile["name"]
+        key = self.conn_key(profile)
+        with self.lock:
+            entry = self.warm.pop(name, None)
+        if entry and entry[0] != key:
+            self.close_quietly(entry[1])
+            entry = None
+        try:
+            if entry is None:
+                conn = pymysql.connect(
+                    host=profile["host"],
+                    port=int(profile["port"]),
+                    user=profile["user"],
+                    password=profile["password"],
+                    database=profile["dbname"] or None,
+                    charset="utf8mb4",
+                    connect_timeout=5,
+                    # 取走后即用于执行SQL，按"SQL执行超时"设置读超时，避免探测卡死在无响应的端口上
+                    read_timeout=config_manager.get("sql_timeout")
+                )
+            else:
+                conn = entry[1]
+            start = time.perf_counter()
+            conn.ping(reconnect=True)
+            latency = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            return None, str(e)
+        with self.lock:
+            keep = self.running
+            if keep:
+                self.warm[name] = (key, conn)
+        if not keep:
+            self.close_quietly(conn)
+        return latency, ""
+
+    def drop_stale_warm(self, recent):
+        with self.lock:
+            stale = [n for n in self.warm if n not in recent]
+            conns = [self.warm.pop(n)[1] for n in stale]
+        for conn in conns:
+            self.close_quietly(conn)
+
+    def take_warm_connection(self, host, port, user, pwd, dbname):
+        """取走一条匹配的预热连接（调用方负责关闭），没有或 ping 不通时返回 None
+
+        预热连接可能在两轮探测之间被服务端断开（wait_timeout 等），交出前先 ping 一次（断开则重连）。
+        """
+        key = (host, int(port), user, pwd, dbname)
+        conn = None
+        with self.lock:
+            for name, (k, c) in list(self.warm.items()):
+                if k == key:
+                    del self.warm[name]
+                    conn = c
+                    break
+        if conn is None:
+            return None
+        try:
+            conn.ping(reconnect=True)
+            return conn
+        except Exception as e:
+            logger.warning(f"预热连接不可用，改为新建连接：{str(e)}")
+            self.close_quietly(conn)
+            return None
+
+    @staticmethod
+    def close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def get_status(self, name):
+        with self.lock:
+            return dict(self.status.get(name) or {"health": "unknown", "latency": None})
+
+    def ranked_profiles(self):
+        """按健康状态、延迟、名称排序的配置列表（附带探测状态）"""
+        result = []
+        for p in self.manager.list_profiles():
+            p["status"] = self.get_status(p["name"])
+            result.append(p)
+        result.sort(key=lambda p: (
+            HEALTH_RANK.get(p["status"]["health"], 1),
+            p["status"]["latency"] if p["status"]["latency"] is not None else float("inf"),
+            p["name"]
+        ))
+        return result
+
+
+# 全局实例（探测线程在页面首次使用时启动）
+profile_manager = ProfileManager()
+profile_prober = ProfileProber(profile_manager)
@@ -1 +1,15 @@
+# -*- coding: utf-8 -*-
 
+from core.stream import AUTO
+
+# 把 PowerShell 的管道输出编码设为 UTF-8；脚本中调用的外部程序仍可能按控制台代码页输出，
+# 因此解码用自动识别（先按 UTF-8，非法的行再按代码页）
+UTF8_PREAMBLE = "[Console]::OutputEncoding = [System.Text.Encoding]::UTF8; $OutputEncoding = [System.Text.Encoding]::UTF8; "
+PS1_ENCODING = AUTO
+PS1_INPUT_ENCODING = "utf-8"
+
+
+def ps1_args(command):
+    """PowerShell 命令的启动参数：不加载配置文件、非交互、当前进程内允许执行脚本"""
+    return ["powershell", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass",
+            "-Command", UTF8_PREAMBLE + command]
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import bisect
+import json
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from datetime import datetime
+from utils.logger import get_exe_dir, logger
+
+
+RECORD_DIR_NAME = "recordings"
+CHUNK_BYTES = 256 * 1024  # 原始数据攒满约 256KB 压缩为一块
+CHUNK_SECONDS = 2.0  # 或距本块第一条事件超过 2 秒
+
+
+def get_record_dir():
+    """录像目录：与 log 目录并列（打包后在 exe 所在目录）"""
+    path = os.path.join(get_exe_dir(), RECORD_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class SessionRecorder:
+    """SSH 命令会话录像（类似 asciicast）：事件 [相对秒数, 类型, 文本]，类型 o=输出、m=提示信息
+
+    .rec 文件由独立压缩的 zlib 块顺序拼接；.idx 第一行为会话信息，之后每块一行
+    {偏移, 压缩长度, 起止时间, 事件数}，每写完一块就追加，程序异常退出时已写入的部分仍可回放。
+    压缩与写盘在后台线程完成，record() 只把数据放入队列。
+    """
+
+    def __init__(self, host, user, command):
+        self.started = time.time()
+        self.start_monotonic = time.monotonic()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_host = re.sub(r"[^\w.-]", "_", host)
+        base = os.path.join(get_record_dir(), f"{stamp}_{safe_host}_{os.getpid()}_{id(self) & 0xffff:04x}")
+        self.rec_path = base + ".rec"
+        self.idx_path = base + ".idx"
+        self.header = {"version": 1, "host": host, "user": user, "command": command, "started": self.started}
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.write_loop, name="ssh-recorder", daemon=True)
+        self.thread.start()
+
+    def record(self, lines, kind="o"):
+        """记录一批行（可在任意线程调用）"""
+        if lines:
+            self.queue.put((time.monotonic() - self.start_monotonic, kind, lines))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def write_loop(self):
+        events = []
+        raw_size = 0
+        chunk_start = None
+        try:
+            with open(self.rec_path, "wb") as rec, open(self.idx_path, "w", encoding="utf-8") as idx:
+                idx.write(json.dumps(self.header, ensure_ascii=False) + "\n")
+                idx.flush()
+                while True:
+                    try:
+                        item = self.queue.get(timeout=CHUNK_SECONDS)
+                    except queue.Empty:
+                        item = ()
+                    if item:
+                        t, kind, lines = item
+                        if chunk_start is None:
+                            chunk_start = t
+                        t = round(t, 3)
+                        for line in lines:
+                            events.append([t, kind, line])
+                            raw_size += len(line) + 16
+                    closing = item is None
+                    if events and (closing or raw_size >= CHUNK_BYTES
+                                   or time.monotonic() - self.start_monotonic - chunk_start >= CHUNK_SECONDS):
+                        self.write_chunk(rec, idx, events)
+                        events = []
+                        raw_size = 0
+                        chunk_start = None
+                    if closing:
+                        break
+        except Exception as e:
+            logger.error(f"会话录像写入失败：{self.rec_path}：{str(e)}")
+
+    @staticmethod
+    def write_chunk(rec, idx, events):
+        data = zlib.compress("\n".join(json.dumps(e, ensure_ascii=False) for e in events).encode("utf-8"), 6)
+        offset = rec.tell()
+        rec.write(data)
+        rec.flush()
+        entry = {"offset": offset, "length": len(data), "t0": events[0][0], "t1": events[-1][0],
+                 "events": len(events)}
+        idx.write(json.dumps(entry) + "\n")
+        idx.flush()
+
+
+class Recording:
+    """读取录像：只加载索引，按时间二分定位块，按需解压"""
+
+    def __init__(self, idx_path):
+        self.idx_path = idx_path
+        self.rec_path = idx_path[:-4] + ".rec"
+        self.chunks = []
+        with open(idx_path, "r", encoding="utf-8") as f:
+            self.header = json.loads(f.readline())
+            for line in f:
+                try:
+                    self.chunks.append(json.loads(line))
+                except ValueError:
+                    # 写到一半的最后一行
+                    break
+        self.starts = [c["t0"] for c in self.chunks]
+
+    @property
+    def duration(self):
+        return self.chunks[-1]["t1"] if self.chunks else 0.0
+
+    @property
+    def event_count(self):
+        return sum(c["events"] for c in self.chunks)
+
+    def chunk_index(self, t):
+        """包含时间 t 的块序号"""
+        return max(bisect.bisect_right(self.starts, t) - 1, 0)
+
+    def read_chunk(self, rec, index):
+        chunk = self.chunks[index]
+        rec.seek(chunk["offset"])
+        data = zlib.decompress(rec.read(chunk["length"]))
+        return [json.loads(line) for line in data.decode("utf-8").split("\n")]
+
+    def events(self, start=0.0):
+        """从定位到的块开始按顺序产出事件 [t, 类型, 文本]（含该块中 start 之前的事件，供回放时作为上下文）"""
+        if not self.chunks:
+            return
+        with open(self.rec_path, "rb") as rec:
+            for index in range(self.chunk_index(start), len(self.chunks)):
+                yield from self.read_chunk(rec, index)
+
+
+def list_recordings():
+    """录像列表（新的在前）：[(索引文件路径, 会话信息)]"""
+    record_dir = get_record_dir()
+    result = []
+    for name in sorted(os.listdir(record_dir), reverse=True):
+        if not name.endswith(".idx"):
+            continue
+        path = os.path.join(record_dir, name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            continue
+        result.append((path, header))
+    return result
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+import posixpath
+import queue
+import stat
+import threading
+import time
+from collections import OrderedDict, deque
+from paramiko import SFTPAttributes, SFTPError
+from paramiko.sftp import CMD_OPENDIR, CMD_READDIR, CMD_CLOSE, CMD_HANDLE, CMD_NAME
+from utils.logger import logger
+
+
+def is_dir(attrs):
+    return attrs.st_mode is not None and stat.S_ISDIR(attrs.st_mode)
+
+
+def sort_entries(entries):
+    """目录在前，再按名称排序"""
+    entries.sort(key=lambda a: (not is_dir(a), a.filename.lower()))
+
+
+class DirectoryReader:
+    """可随时关闭的目录读取（代替 listdir_iter：其生成器中途放弃时不会关闭服务端的目录句柄）
+
+    每次 read 内保持至多 read_aheads 个 READDIR 请求在途，返回前把在途的响应全部收完缓存起来，
+    这样两次 read 之间同一 SFTP 通道上的其他请求不会收走这里的响应。只应在使用该通道的线程中调用。
+    """
+
+    def __init__(self, client, path, read_aheads=8):
+        self.client = client
+        self.read_aheads = read_aheads
+        self.buffer = deque()
+        self.handle = None
+        self.eof = False
+        t, msg = client._request(CMD_OPENDIR, client._adjust_cwd(path))
+        if t != CMD_HANDLE:
+            raise SFTPError("Expected handle")
+        self.handle = msg.get_binary()
+
+    @property
+    def closed(self):
+        return self.handle is None
+
+    @property
+    def done(self):
+        """已读到末尾且缓冲的条目都已取走"""
+        return self.eof and not self.buffer
+
+    def read(self, count):
+        """读取至多 count 条（不含 . 和 ..）；读到末尾时关闭句柄"""
+        pending = deque()
+        try:
+            while len(self.buffer) < count and not self.eof and self.handle is not None:
+                while len(pending) < self.read_aheads:
+                    pending.append(self.client._async_request(type(None), CMD_READDIR, self.handle))
+                self.eof = self.read_response(pending.popleft())
+            # 收完在途响应再返回（目录读完后它们同样是 EOF）
+            while pending:
+                self.eof = self.read_response(pending.popleft()) or self.eof
+        except Exception:
+            self.close()
+            raise
+        if self.eof:
+            self.close()
+        return [self.buffer.popleft() for _ in range(min(count, len(self.buffer)))]
+
+    def read_response(self, num):
+        """收取一个 READDIR 响应放入缓冲，目录已读完返回 True"""
+        try:
+            t, msg = self.client._read_response(num)
+        except EOFError:
+            return True
+        if t != CMD_NAME:
+            raise SFTPError("Expected name response")
+        for _ in range(msg.get_int()):
+            filename = msg.get_text()
+            longname = msg.get_text()
+            attrs = SFTPAttributes._from_msg(msg, filename, longname)
+            if filename not in (".", ".."):
+                self.buffer.append(attrs)
+        return False
+
+    def close(self):
+        if self.handle is None:
+            return
+        handle, self.handle = self.handle, None
+        try:
+            self.client._request(CMD_CLOSE, handle)
+        except Exception as e:
+            logger.debug(f"关闭远程目录句柄失败：{str(e)}")
+
+
+class DirectoryListing:
+    """一个目录的分页列表：首页立即返回，其余条目按需从 DirectoryReader 继续读取"""
+
+    def __init__(self, path, reader):
+        self.path = path
+        self.reader = reader
+        self.entries = []
+        self.complete = False
+        self.seen = None  # 重新打开句柄续读时，跳过已读过的文件名
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def resumable(self):
+        """未读完但句柄已关闭（被淘汰或由预取读取）：需要在前台重新打开才能继续"""
+        return not self.complete and (self.reader is None or self.reader.closed and not self.reader.eof)
+
+    def load_more(self, count):
+        """再读取至多 count 条，返回新增的条目；全部读完时若只有一页则整体排序"""
+        with self.lock:
+            if self.complete or self.reader is None:
+                return []
+            new_entries = []
+            while len(new_entries) < count and not self.reader.done:
+                batch = self.reader.read(count - len(new_entries))
+                if self.seen:
+                    batch = [a for a in batch if a.filename not in self.seen]
+                new_entries.extend(batch)
+            if self.reader.done:
+                self.complete = True
+                self.reader = None
+                self.seen = None
+            first_page = not self.entries
+            if first_page and self.complete:
+                sort_entries(new_entries)
+            self.entries.extend(new_entries)
+        return new_entries
+
+    def resume(self, reader):
+        with self.lock:
+            self.reader = reader
+            self.seen = {a.filename for a in self.entries}
+
+    def close(self):
+        """关闭服务端目录句柄（须在打开它的通道所属线程中调用）"""
+        with self.lock:
+            if self.reader:
+                self.reader.close()
+
+
+class RemoteFS:
+    """SFTP 远程目录浏览：目录列表短 TTL 缓存（LRU 上限），后台预取子目录，大目录分页加载
+
+    前台浏览与后台预取各用一个 SFTP 通道，预取不会阻塞当前目录的请求。
+    目录句柄只在打开它的线程中使用：预取只读首页后立即关闭句柄，未读完的目录在前台需要更多时重新打开；
+    被淘汰或失效的前台列表先记下，由前台在下一次操作时关闭句柄。
+    """
+
+    def __init__(self, session, ttl=10, page_size=1000, max_dirs=200, prefetch_limit=20):
+        self.session = session
+        self.ttl = ttl
+        self.page_size = page_size
+        self.max_dirs = max_dirs
+        self.prefetch_limit = prefetch_limit
+        self.client = session.open_sftp()
+        self.prefetch_client = None
+        self.cache = OrderedDict()  # 路径 -> DirectoryListing
+        self.discarded = []  # 被淘汰、待前台关闭句柄的列表
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.prefetch_queue = queue.Queue()
+        self.running = True
+        self.prefetch_thread = threading.Thread(target=self.prefetch_loop, name="sftp-prefetch", daemon=True)
+        self.prefetch_thread.start()
+
+    def close(self):
+        """关闭前台通道（调用前前台操作应已结束）；预取线程自行关闭它的通道"""
+        self.running = False
+        self.prefetch_queue.put(None)
+        with self.lock:
+            self.discarded.extend(self.cache.values())
+            self.cache.clear()
+        self.close_discarded()
+        self.session.release_channel(self.client.get_channel())
+
+    def normalize(self, path):
+        return self.client.normalize(path or ".")
+
+    def cached(self, path):
+        """未过期的缓存列表，没有则返回 None"""
+        with self.lock:
+            listing = self.cache.get(path)
+            # 预取的大目录只有首页且句柄已关闭，按未命中处理，由前台重新读取
+            if listing and time.monotonic() - listing.loaded_at < self.ttl and not listing.resumable:
+                self.cache.move_to_end(path)
+                return listing
+        return None
+
+    def store(self, listing):
+        with self.lock:
+            old = self.cache.get(listing.path)
+            if old is not None and old is not listing:
+                self.discarded.append(old)
+            self.cache[listing.path] = listing
+            self.cache.move_to_end(listing.path)
+            while len(self.cache) > self.max_dirs:
+                self.discarded.append(self.cache.popitem(last=False)[1])
+
+    def close_discarded(self):
+        """关闭被淘汰的前台列表的目录句柄（在前台操作中调用）"""
+        with self.lock:
+            discarded, self.discarded = self.discarded, []
+        for listing in discarded:
+            if listing.reader and listing.reader.client is self.client:
+                listing.close()
+
+    def fetch(self, client, path, keep_open=True):
+        listing = DirectoryListing(path, DirectoryReader(client, path))
+        try:
+            listing.load_more(self.page_size)
+        finally:
+            if not keep_open:
+                listing.close()
+        self.store(listing)
+        return listing
+
+    def list_dir(self, path):
+        """目录列表（至少首页）：缓存命中直接返回，否则从服务端读取；随后预取其子目录"""
+        self.close_discarded()
+        listing = self.cached(path)
+        if listing:
+            self.hits += 1
+        else:
+            self.misses += 1
+            listing = self.fetch(self.client, path)
+        self.prefetch_children(listing)
+        return listing
+
+    def load_more(self, listing):
+        """继续读取下一页；句柄已关闭的（被淘汰、预取所得）在前台通道上重新打开后跳过已读条目续读"""
+        self.close_discarded()
+        if listing.resumable:
+            listing.resume(DirectoryReader(self.client, listing.path))
+            with self.lock:
+                cached = listing.path in self.cache
+            if not cached:
+                self.store(listing)
+        entries = listing.load_more(self.page_size)
+        with self.lock:
+            orphan = self.cache.get(listing.path) is not listing
+        if orphan:
+            # 不在缓存中（已被更新的列表取代）：不保留打开的句柄，下次需要时再续读
+            listing.close()
+        return entries
+
+    def invalidate(self, path):
+        """上传、删除等修改后使目录缓存失效"""
+        with self.lock:
+            listing = self.cache.pop(path, None)
+            if listing is not None:
+                self.discarded.append(listing)
+
+    def invalidate_file(self, file_path):
+        self.invalidate(posixpath.dirname(file_path) or ".")
+
+    def remove(self, path, attrs):
+        if is_dir(attrs):
+            self.client.rmdir(path)
+            self.invalidate(path)
+        else:
+            self.client.remove(path)
+        self.invalidate_file(path)
+
+    # ========== 后台预取 ==========
+    def prefetch_children(self, listing):
+        # 以提交时的快照为准，新的目录会排在后面；只取前 prefetch_limit 个子目录
+        children = [posixpath.join(listing.path, a.filename) for a in listing.entries if is_dir(a)]
+        for child in children[:self.prefetch_limit]:
+            if not self.cached(child):
+                self.prefetch_queue.put(child)
+
+    def prefetch_loop(self):
+        while self.running:
+            path = self.prefetch_queue.get()
+            if path is None or not self.running:
+                break
+            if self.cached(path):
+                continue
+            try:
+                if self.prefetch_client is None:
+                    self.prefetch_client = self.session.open_sftp()
+                self.fetch(self.prefetch_client, path, keep_open=False)
+            except IOError:
+                # 无权限等：跳过该目录
+                continue
+            except Exception as e:
+                logger.error(f"预取远程目录失败：{path}：{str(e)}")
+                break
+        if self.prefetch_client:
+            self.session.release_channel(self.prefetch_client.get_channel())
+            self.prefetch_client = None
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app.store import store
+from utils.logger import logger
+from core.pipeline import PipelineRunner, normalize_step
+
+
+MISFIRE_POLICIES = ("run_once", "skip")  # 错过的触发：补执行一次（多次错过合并为一次）/ 跳过
+MAX_OUTPUT_LINES = 200  # 每条历史记录保留的输出行数（最后的部分）
+MAX_WAIT = 60  # 调度线程最长休眠时间（秒），系统时间被调整后最迟这么久就会重新计算
+EVERY = re.compile(r"^@every\s+(\d+)\s*([smhd]?)$", re.IGNORECASE)
+UNIT_SECONDS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+class Schedule:
+    """调度表达式：5 段 cron（分 时 日 月 周，支持 * , - /，周 0 和 7 都是周日），
+    @hourly/@daily/@weekly/@monthly，或固定间隔 @every 30s / 5m / 2h / 1d"""
+
+    FIELDS = (("分", 0, 59), ("时", 0, 23), ("日", 1, 31), ("月", 1, 12), ("周", 0, 7))
+
+    def __init__(self, expr):
+        self.expr = expr.strip()
+        self.interval = None
+        text = ALIASES.get(self.expr.lower(), self.expr)
+        m = EVERY.match(text)
+        if m:
+            self.interval = int(m.group(1)) * UNIT_SECONDS[m.group(2).lower()]
+            if self.interval <= 0:
+                raise ScheduleError("间隔必须大于 0")
+            return
+        parts = text.split()
+        if len(parts) != 5:
+            raise ScheduleError(f"调度表达式需要 5 段（分 时 日 月 周）：{self.expr}")
+        sets = [self.parse_field(part, *field) for part, field in zip(parts, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = sets
+        self.weekdays = {d % 7 for d in weekdays}
+        # 日和周都有限定时满足其一即可（与 cron 一致），否则两者都要满足
+        self.days_any = parts[2] == "*"
+        self.weekdays_any = parts[4] == "*"
+
+    @staticmethod
+    def parse_field(text, name, low, high):
+        values = set()
+        for part in text.split(","):
+            step = 1
+            if "/" in part:
+                part, _, step_text = part.partition("/")
+                if not step_text.isdigit() or int(step_text) == 0:
+                    raise ScheduleError(f"{name}字段的步长无效：{text}")
+                step = int(step_text)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                a, _, b = part.partition("-")
+                if not (a.isdigit() and b.isdigit()):
+                    raise ScheduleError(f"{name}字段无效：{text}")
+                start, end = int(a), int(b)
+            elif part.isdigit():
+                start = int(part)
+                end = high if step > 1 else start
+            else:
+                raise ScheduleError(f"{name}字段无效：{text}")
+            if start < low or end > high or start > end:
+                raise ScheduleError(f"{name}字段超出范围 {low}-{high}：{text}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def day_matches(self, t):
+        day_ok = t.day in self.days
+        weekday_ok = (t.weekday() + 1) % 7 in self.weekdays
+        if self.days_any or self.weekdays_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, ts):
+        """ts（时间戳）之后的下一次触发时间戳；不可能触发（如 2 月 30 日）时返回 None"""
+        if self.interval:
+            return ts + self.interval
+        t = datetime.fromtimestamp(ts).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t.year + 5
+        while t.year <= limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t.timestamp()
+        return None
+
+
+def make_job(name, job_type, command, schedule, host="", profile="", timeout=0, max_instances=1,
+             misfire="run_once", misfire_grace=60, history_max=50, enabled=True, job_id=None):
+    """创建/校验一个任务定义；定义有误抛出 ValueError（ScheduleError/PipelineError）"""
+    Schedule(schedule)
+    if misfire not in MISFIRE_POLICIES:
+        raise ScheduleError(f"错过触发的处理方式无效：{misfire}")
+    job = {
+        "id": job_id or uuid.uuid4().hex[:12],
+        "name": name.strip() or (command.strip().splitlines() or [""])[0][:40],
+        "type": job_type,
+        "command": command,
+        "host": host,
+        "profile": profile,
+        "schedule": schedule.strip(),
+        "timeout": float(timeout or 0),
+        "max_instances": max(1, int(max_instances)),
+        "misfire": misfire,
+        "misfire_grace": max(0, int(misfire_grace)),
+        "history_max": max(1, int(history_max)),
+        "enabled": bool(enabled),
+        "next_run": None,
+        "last_run": None,
+        "last_status": ""
+    }
+    job_step(job)
+    return job
+
+
+def job_step(job):
+    """把任务转成流水线步骤，复用流水线的 CMD/PS1/SSH/SQL 执行和超时处理"""
+    return normalize_step({
+        "id": job["name"] or job["id"],
+        "type": job["type"],
+        "command": job["command"],
+        "sql": job["command"],
+        "host": job["host"],
+        "profile": job["profile"],
+        "timeout": job["timeout"]
+    })
+
+
+class JobScheduler:
+    """定时任务调度器：任务表保存在数据库 jobs 表（重启后继续按计划执行，程序未运行期间错过的触发按
+    misfire 处理），执行历史按任务保存在 job_runs 表并限制条数；每次变更只写对应的一行
+
+    到期任务提交到有上限的线程池执行；同一任务同时执行的实例数不超过 max_instances（默认 1，即不重叠），
+    超出时本次触发记为跳过；每次执行可设超时。
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.pool = None
+        self.workers = 0
+        self.stopping = False
+        self.jobs = {job["id"]: job for job in store.list_jobs()}
+        self.running = {}  # 任务id -> {执行id: PipelineRunner}
+
+    # ========== 启停 ==========
+    def start(self, workers=4):
+        with self.lock:
+            if self.thread:
+                return
+            self.stopping = False
+            self.workers = workers
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+            self.thread = threading.Thread(target=self.loop, name="scheduler", daemon=True)
+            self.thread.start()
+        logger.info(f"定时任务调度器已启动：{len(self.jobs)} 个任务，工作线程 {workers} 个")
+
+    def shutdown(self):
+        """停止调度并取消正在执行的任务（程序退出时调用）"""
+        with self.lock:
+            if not self.thread:
+                return
+            self.stopping = True
+            runners = [r for runs in self.running.values() for r in runs.values()]
+            thread, pool = self.thread, self.pool
+            self.thread = self.pool = None
+        self.wakeup.set()
+        for runner in runners:
+            runner.cancel()
+        thread.join()
+        # 不在界面线程等待正在执行的任务结束（已取消，随后自行退出），排队中的直接丢弃
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # ========== 调度 ==========
+    @staticmethod
+    def compute_next(job, after):
+        try:
+            return Schedule(job["schedule"]).next_after(after)
+        except ScheduleError:
+            return None
+
+    def loop(self):
+        while True:
+            self.wakeup.clear()  # 先清除再检查，检查期间的任务变更会让下面的 wait 立即返回
+            with self.lock:
+                if self.stopping:
+                    return
+                now = time.time()
+                for job in self.jobs.values():
+                    if not job["enabled"]:
+                        continue
+                    if job["next_run"] is None:
+                        job["next_run"] = self.compute_next(job, now)
+                        if job["next_run"] is not None:
+                            store.save_job(job)
+                    elif job["next_run"] <= now:
+                        self.fire(job, now)
+                pending = [j["next_run"] for j in self.jobs.values() if j["enabled"] and j["next_run"]]
+                delay = min([MAX_WAIT] + [t - now for t in pending])
+            self.wakeup.wait(max(0.0, delay))
+
+    def fire(self, job, now):
+        """到期触发（调用方持有锁）：超过宽限期的（程序未运行、系统休眠等）按 misfire 策略补执行或跳过，
+        其间错过的多次触发合并为一次"""
+        missed = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job["next_run"]))
+        late = now - job["next_run"]
+        job["next_run"] = self.compute_next(job, now)
+        store.save_job(job)
+        if late <= job["misfire_grace"]:
+            self.dispatch(job, "schedule")
+        elif job["misfire"] == "skip":
+            self.add_record(job, {"status": "missed", "trigger": "misfire", "start": now, "duration": 0.0,
+                                  "exit_code": None, "output": [f"错过了 {missed} 的触发，已跳过"]})
+        else:
+            self.dispatch(job, "misfire", f"补执行错过的 {missed} 的触发")
+
+    def dispatch(self, job, trigger, note=None):
+        """提交一次执行（调用方持有锁）；达到并发上限时本次触发记为跳过"""
+        runs = self.running.setdefault(job["id"], {})
+        if len(runs) >= job["max_instances"]:
+            self.add_record(job, {"status": "skipped", "trigger": trigger, "start": time.time(), "duration": 0.0,
+                                  "exit_code": None,
+                                  "output": [f"已有 {len(runs)} 个实例在执行（上限 {job['max_instances']}），本次跳过"]})
+            return False
+        run_id = uuid.uuid4().hex[:8]
+        runner = PipelineRunner([job_step(job)], max_parallel=1)
+        runs[run_id] = runner
+        self.pool.submit(self.execute, dict(job), run_id, runner, trigger, note)
+        return True
+
+    def execute(self, job, run_id, runner, trigger, note):
+        lines = [note] if note else []
+
+        def on_event(step_id, event, data):
+            if event == "lines":
+                lines.extend(data)
+                if len(lines) > MAX_OUTPUT_LINES:
+                    del lines[:len(lines) - MAX_OUTPUT_LINES]
+
+        start = time.time()
+        try:
+            result = runner.run_step(runner.steps[0], {}, on_event)
+            status, exit_code = result["status"], result["exit_code"]
+        except Exception as e:
+            status, exit_code = "error", None
+            lines.append(f"执行错误：{str(e)}")
+        with self.lock:
+            self.running.get(job["id"], {}).pop(run_id, None)
+            current = self.jobs.get(job["id"])
+            if current is None:
+                return  # 执行期间任务已被删除
+            current["last_run"] = start
+            current["last_status"] = status
+            self.add_record(current, {"status": status, "trigger": trigger, "start": start,
+                                      "duration": time.time() - start, "exit_code": exit_code, "output": lines})
+            store.save_job(current)
+        logger.info(f"定时任务 {job['name']} 执行完成：{status}")
+
+    # ========== 任务管理 ==========
+    def list_jobs(self):
+        with self.lock:
+            jobs = [dict(job) for job in self.jobs.values()]
+            for job in jobs:
+                job["running"] = len(self.running.get(job["id"], {}))
+            return jobs
+
+    def get_job(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def save_job(self, job):
+        """新增或更新任务（按 id），重新计算下一次触发时间"""
+        with self.lock:
+            old = self.jobs.get(job["id"])
+            if old:
+                job["last_run"], job["last_status"] = old["last_run"], old["last_status"]
+            job["next_run"] = self.compute_next(job, time.time()) if job["enabled"] else None
+            self.jobs[job["id"]] = job
+            store.save_job(job)
+        self.wakeup.set()
+
+    def remove_job(self, job_id):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            runners = list(self.running.get(job_id, {}).values())
+            store.delete_job(job_id)
+        for runner in runners:
+            runner.cancel()
+        self.wakeup.set()
+
+    def set_enabled(self, job_id, enabled):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+            job["enabled"] = enabled
+            job["next_run"] = self.compute_next(job, time.time()) if enabled else None
+            store.save_job(job)
+        self.wakeup.set()
+
+    def run_now(self, job_id):
+        """立即执行一次（不影响计划），返回是否已提交"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job or not self.pool:
+                return False
+            return self.dispatch(job, "manual")
+
+    def cancel_job(self, job_id):
+        """取消该任务正在执行的全部实例"""
+        with self.lock:
+            runners = list(self.running.get(job_id, {}).values())
+        for runner in runners:
+            runner.cancel()
+        return len(runners)
+
+    # ========== 历史 ==========
+    def add_record(self, job, record):
+        """追加一条执行记录（插入一行），每个任务只保留最近 history_max 条"""
+        store.add_job_run(job["id"], record, job["history_max"])
+
+    def get_history(self, job_id):
+        return store.list_job_runs(job_id)
+
+    def history_version(self, job_id):
+        """执行记录的版本（有新记录或被清除时改变），界面据此判断是否需要重新加载"""
+        return store.job_runs_version(job_id)
+
+    def clear_history(self, job_id):
+        store.clear_job_runs(job_id)
+
+
+scheduler = JobScheduler()
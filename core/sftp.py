@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import itertools
+import os
+import shlex
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.store import store
+from utils.logger import logger
+from core.ssh import read_channel
+
+
+BLOCK_SIZE = 32768  # 单个 SFTP 读写请求大小（多数服务端上限）
+CHECKPOINT_BYTES = 8 * 1024 * 1024  # 上传每写满一段关闭句柄确认一次，作为续传点
+
+STATUS_TEXT = {
+    "queued": "等待",
+    "running": "传输中",
+    "verifying": "校验中",
+    "done": "完成",
+    "failed": "失败",
+    "cancelled": "已取消"
+}
+
+
+class TransferCancelled(Exception):
+    pass
+
+
+class ResumeStore:
+    """断点续传状态（数据库 transfer_states 表，每个任务一行）：任务键 -> {大小, 修改时间, 各分段 [起点, 终点, 已完成位置]}
+
+    每次保存只更新该任务的一行，不随任务数增多而变慢
+    """
+
+    def get(self, key):
+        return store.get_transfer_state(key)
+
+    def put(self, key, state):
+        store.put_transfer_state(key, state)
+
+    def remove(self, key):
+        store.delete_transfer_state(key)
+
+
+def split_ranges(size, parts, min_range):
+    """把文件切成至多 parts 段，每段不小于 min_range：[[起点, 终点, 已完成位置]]"""
+    count = max(1, min(parts, size // max(min_range, 1)))
+    step = -(-size // count) if size else 0
+    ranges = []
+    for i in range(count):
+        start = i * step
+        end = min(start + step, size)
+        if start < end or not ranges:
+            ranges.append([start, end, start])
+    return ranges
+
+
+def local_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TransferJob:
+    """一个文件的上传或下载任务（进度字段由传输线程更新、界面线程读取）"""
+
+    ids = itertools.count(1)
+
+    def __init__(self, direction, local_path, remote_path):
+        self.id = next(self.ids)
+        self.direction = direction  # "upload" / "download"
+        self.local_path = local_path
+        self.remote_path = remote_path
+        self.size = 0
+        self.done = 0
+        self.resumed = 0  # 从续传点恢复的字节数（不计入速度）
+        self.ranges = 1
+        self.status = "queued"
+        self.verified = None  # True 校验一致 / None 未校验
+        self.error = ""
+        self.started = 0.0
+        self.finished = 0.0
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+
+    def add_progress(self, count):
+        with self.lock:
+            self.done += count
+
+    def elapsed(self):
+        if not self.started:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def average_speed(self):
+        """平均速度（字节/秒），不含续传跳过的部分"""
+        elapsed = self.elapsed()
+        return (self.done - self.resumed) / elapsed if elapsed > 0 else 0.0
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise TransferCancelled()
+
+
+class TransferQueue:
+    """SFTP 传输队列：多个文件并行，大文件按区间拆分到多个 SFTP 通道并发传输
+
+    每个分段使用独立的 SFTP 通道（同一 SSH 会话）：下载用 readv 流水线预取 window 个请求，
+    上传用流水线写入；完成后比对 sha256，分段进度写入续传状态，中断后从断点继续。
+    """
+
+    def __init__(self, session, parallel_files=4, range_threads=4, min_range_mb=16, window=64):
+        self.session = session
+        self.parallel_files = parallel_files
+        self.range_threads = range_threads
+        self.min_range = min_range_mb * 1024 * 1024
+        self.window = window
+        self.jobs = []
+        self.resume = ResumeStore()
+        self.pool = ThreadPoolExecutor(max_workers=parallel_files, thread_name_prefix="sftp-job")
+        self.range_pool = ThreadPoolExecutor(
+            max_workers=parallel_files * range_threads, thread_name_prefix="sftp-range")
+        self.lock = threading.Lock()
+
+    def open_client(self):
+        """每个分段一个 SFTP 通道；通道窗口至少容纳两轮流水线请求"""
+        window_size = max(2 * 1024 * 1024, BLOCK_SIZE * self.window * 2)
+        return self.session.open_sftp(window_size, BLOCK_SIZE + 1024)
+
+    def close_client(self, client):
+        self.session.release_channel(client.get_channel())
+
+    def submit(self, direction, local_path, remote_path):
+        job = TransferJob(direction, local_path, remote_path)
+        with self.lock:
+            self.jobs.append(job)
+        self.pool.submit(self.run_job, job)
+        return job
+
+    def retry(self, job):
+        """重新排队失败/取消的任务（从续传点继续）"""
+        new_job = TransferJob(job.direction, job.local_path, job.remote_path)
+        with self.lock:
+            self.jobs[self.jobs.index(job)] = new_job
+        self.pool.submit(self.run_job, new_job)
+        return new_job
+
+    def cancel(self, job):
+        job.cancelled.set()
+
+    def shutdown(self):
+        with self.lock:
+            for job in self.jobs:
+                job.cancelled.set()
+        self.pool.shutdown(wait=False)
+        self.range_pool.shutdown(wait=False)
+
+    def resume_key(self, job):
+        host, port, user = self.session.key
+        return f"{job.direction}|{user}@{host}:{port}|{job.local_path}|{job.remote_path}"
+
+    # ========== 任务 ==========
+    def run_job(self, job):
+        if job.cancelled.is_set():
+            job.status = "cancelled"
+            return
+        job.status = "running"
+        job.started = time.monotonic()
+        client = None
+        try:
+            client = self.open_client()
+            if job.direction == "download":
+                self.download(job, client)
+            else:
+                self.upload(job, client)
+            job.status = "done"
+            logger.info(f"SFTP传输完成：{job.local_path} <-> {job.remote_path}，"
+                        f"{job.size / 1048576:.1f} MB，{job.average_speed() / 1048576:.1f} MB/s")
+        except TransferCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e) or e.__class__.__name__
+            logger.error(f"SFTP传输失败：{job.remote_path}：{job.error}")
+        finally:
+            job.finished = time.monotonic()
+            if client:
+                self.close_client(client)
+
+    def prepare_ranges(self, job, size, mtime, part_exists):
+        """读取续传状态；文件大小/修改时间变化或临时文件缺失时重新分段"""
+        key = self.resume_key(job)
+        state = self.resume.get(key)
+        if state and part_exists and state["size"] == size and state["mtime"] == mtime:
+            ranges = state["ranges"]
+            job.resumed = sum(pos - start for start, _, pos in ranges)
+        else:
+            ranges = split_ranges(size, self.range_threads, self.min_range)
+            job.resumed = 0
+            state = None
+        job.done = job.resumed
+        job.ranges = len(ranges)
+        return key, {"size": size, "mtime": mtime, "ranges": ranges}, state is not None
+
+    def run_ranges(self, job, key, state, worker):
+        """并发执行各分段，定期保存续传状态"""
+        futures = [self.range_pool.submit(worker, r) for r in state["ranges"] if r[2] < r[1]]
+        last_save = time.monotonic()
+        while not all(f.done() for f in futures):
+            time.sleep(0.2)
+            if time.monotonic() - last_save >= 1:
+                self.resume.put(key, state)
+                last_save = time.monotonic()
+            if any(f.done() and f.exception() for f in futures):
+                # 任一分段出错，通知其余分段尽快停止
+                job.cancelled.set()
+        self.resume.put(key, state)
+        errors = [f.exception() for f in futures if f.exception()]
+        for error in errors:
+            if not isinstance(error, TransferCancelled):
+                raise error
+        job.check_cancelled()
+
+    def download(self, job, client):
+        attrs = client.stat(job.remote_path)
+        if stat.S_ISDIR(attrs.st_mode):
+            raise IOError("暂不支持下载目录")
+        job.size = attrs.st_size
+        part = job.local_path + ".part"
+        key, state, resumed = self.prepare_ranges(job, attrs.st_size, int(attrs.st_mtime), os.path.exists(part))
+        if not resumed:
+            os.makedirs(os.path.dirname(os.path.abspath(part)), exist_ok=True)
+            # 预分配临时文件，各分段直接写入各自的偏移
+            with open(part, "wb") as f:
+                f.truncate(job.size)
+
+        def worker(r):
+            range_client = self.open_client()
+            try:
+                with range_client.open(job.remote_path, "rb") as remote, open(part, "r+b") as local:
+                    while r[2] < r[1]:
+                        job.check_cancelled()
+                        # 一次提交 window 个读请求，由 readv 流水线预取
+                        chunks = []
+                        pos = r[2]
+                        while pos < r[1] and len(chunks) < self.window:
+                            length = min(BLOCK_SIZE, r[1] - pos)
+                            chunks.append((pos, length))
+                            pos += length
+                        local.seek(r[2])
+                        for data in remote.readv(chunks):
+                            local.write(data)
+                            job.add_progress(len(data))
+                        r[2] = pos
+            finally:
+                self.close_client(range_client)
+
+        self.run_ranges(job, key, state, worker)
+        self.verify(job, part)
+        os.replace(part, job.local_path)
+        self.resume.remove(key)
+
+    def upload(self, job, client):
+        st = os.stat(job.local_path)
+        job.size = st.st_size
+        part = job.remote_path + ".part"
+        try:
+            part_exists = client.stat(part).st_size == st.st_size
+        except IOError:
+            part_exists = False
+        key, state, resumed = self.prepare_ranges(job, st.st_size, int(st.st_mtime), part_exists)
+        if not resumed:
+            with client.open(part, "wb") as remote:
+                remote.truncate(job.size)
+
+        def worker(r):
+            range_client = self.open_client()
+            try:
+                with open(job.local_path, "rb") as local:
+                    while r[2] < r[1]:
+                        job.check_cancelled()
+                        # 流水线写一段后关闭句柄：关闭时等待全部写确认，之后的位置才可作为续传点
+                        segment_end = min(r[2] + CHECKPOINT_BYTES, r[1])
+                        local.seek(r[2])
+                        with range_client.open(part, "r+b") as remote:
+                            remote.set_pipelined(True)
+                            remote.seek(r[2])
+                            pos = r[2]
+                            while pos < segment_end:
+                                data = local.read(min(BLOCK_SIZE, segment_end - pos))
+                                if not data:
+                                    raise IOError("本地文件在传输过程中被截断")
+                                remote.write(data)
+                                pos += len(data)
+                                job.add_progress(len(data))
+                        r[2] = segment_end
+            finally:
+                self.close_client(range_client)
+
+        self.run_ranges(job, key, state, worker)
+        self.verify(job, job.local_path, remote_path=part)
+        try:
+            client.posix_rename(part, job.remote_path)
+        except IOError:
+            # 不支持 posix-rename 扩展的服务端：先删除目标再改名
+            try:
+                client.remove(job.remote_path)
+            except IOError:
+                pass
+            client.rename(part, job.remote_path)
+        self.resume.remove(key)
+
+    # ========== 校验 ==========
+    def verify(self, job, local_path, remote_path=None):
+        """远端 sha256sum 与本地并行计算后比对；远端没有 sha256sum 时记为未校验"""
+        job.status = "verifying"
+        remote_path = remote_path or job.remote_path
+        channel = self.session.open_channel()
+        try:
+            channel.exec_command(f"sha256sum -- {shlex.quote(remote_path)}")
+            local_digest = local_sha256(local_path)
+            lines = []
+            exit_code = read_channel(channel, lines.extend, lambda: not job.cancelled.is_set())
+        finally:
+            self.session.release_channel(channel)
+        job.check_cancelled()
+        if exit_code != 0 or not lines:
+            job.verified = None
+            return
+        remote_digest = lines[0].split()[0].lower()
+        if remote_digest != local_digest:
+            # 校验失败的临时文件不再续传
+            self.resume.remove(self.resume_key(job))
+            raise IOError("sha256 校验不一致，文件已损坏，请重新传输")
+        job.verified = True
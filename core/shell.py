@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+import base64
+import os
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from core.process import ProcessResult, popen, open_pipes, kill_process_tree
+from core.stream import line_decoder
+from core.cmd import cmd_encoding, cmd_input_encoding
+from core.ps1 import UTF8_PREAMBLE, PS1_ENCODING, PS1_INPUT_ENCODING
+
+
+MARKER = "__STUDY_END_"  # 命令结束标记：标记 + 本次随机令牌 + "_" + 退出码
+START_TIMEOUT = 15  # 启动 shell 并完成首次握手的超时（秒）
+
+
+def find_powershell():
+    return shutil.which("pwsh") or shutil.which("powershell")
+
+
+class ShellSession:
+    """持久 shell 会话：一个长期运行的 shell 进程，命令经 stdin 逐条发送，省去每次启动 shell 的开销，
+    并保留工作目录和环境变量
+
+    每条命令后追加哨兵：stdout 输出"标记+令牌_退出码"，stderr 输出"标记+令牌_"，两路都读到哨兵即为本条结束
+    （令牌每条随机生成，不会与命令输出混淆）。shell 退出或被停止后，下次执行时自动重新启动。
+    kind 为 "cmd"（Windows 为 cmd.exe，其他系统为 bash/sh）或 "ps1"（pwsh 优先，其次 powershell）。
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.process = None
+        self.pipes = None
+        self.decoders = None
+        self.name = ""
+        self.starts = 0
+        self.stopped = False
+        self.lock = threading.Lock()  # 同一时间只执行一条命令
+
+    # ========== 启动 ==========
+    def shell_args(self):
+        if self.kind == "ps1":
+            exe = find_powershell()
+            if not exe:
+                raise OSError("未找到 PowerShell（pwsh/powershell）")
+            return [exe, "-NoLogo", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass", "-Command", "-"]
+        if os.name == "nt":
+            return ["cmd.exe", "/d", "/q"]
+        bash = shutil.which("bash")
+        return [bash, "--noprofile", "--norc"] if bash else ["/bin/sh"]
+
+    @property
+    def encoding(self):
+        return PS1_ENCODING if self.kind == "ps1" else cmd_encoding()
+
+    @property
+    def input_encoding(self):
+        return PS1_INPUT_ENCODING if self.kind == "ps1" else cmd_input_encoding()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.process is not None:
+            self.close_pipes()
+        args = self.shell_args()
+        self.process = popen(args, stdin=subprocess.PIPE)
+        self.pipes = open_pipes(self.process)
+        self.decoders = {False: line_decoder(self.encoding), True: line_decoder(self.encoding)}
+        self.name = os.path.basename(args[0])
+        self.starts += 1
+        if self.kind == "ps1":
+            self.write(UTF8_PREAMBLE + "\n")
+        # 握手：丢弃启动横幅等输出，直到第一个哨兵
+        exit_code, _ = self.execute("", lambda lines: None, timeout=START_TIMEOUT)
+        if exit_code is None:
+            self.kill()
+            raise OSError(f"{self.name} 会话启动失败")
+
+    # ========== 命令 ==========
+    def wrap(self, command, token):
+        """把命令包装为一段 stdin 输入：执行命令，再在 stdout/stderr 各输出一次哨兵"""
+        end = MARKER + token + "_"
+        if self.kind == "ps1":
+            encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+            # 编码成一行交给 Invoke-Expression，多行脚本不会被 -Command - 的逐行读取打断
+            return (f"$global:LASTEXITCODE = 0; $Error.Clear(); "
+                    f"try {{ Invoke-Expression ([Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}'))) | Out-Default }} "
+                    f"catch {{ [Console]::Error.WriteLine($_.ToString()) }}; "
+                    f"$__code = if ($global:LASTEXITCODE) {{ $global:LASTEXITCODE }} elseif ($Error.Count) {{ 1 }} else {{ 0 }}; "
+                    f"[Console]::Out.WriteLine(\"{end}$__code\"); [Console]::Error.WriteLine(\"{end}\")\n")
+        if os.name == "nt":
+            lines = [line for line in command.splitlines() if line.strip()]
+            return "".join(line + "\r\n" for line in lines) + f"echo {end}%errorlevel%\r\necho {end} 1>&2\r\n"
+        # eval 保证语法错误也只影响本条；命令的 stdin 接 /dev/null，不会读走后面的哨兵
+        return (f"eval {shlex.quote(command)} </dev/null\n"
+                f"__rc=$?; printf '%s\\n' \"{end}$__rc\"; printf '%s\\n' \"{end}\" >&2\n")
+
+    def write(self, text):
+        self.process.stdin.write(text.encode(self.input_encoding, errors="replace"))
+        self.process.stdin.flush()
+
+    def execute(self, command, on_lines, flush_interval=0.05, max_batch=2000, timeout=None):
+        """发送一条命令并读取到哨兵为止，返回 (退出码, 会话是否仍存活)；会话中途退出时退出码为 shell 的退出码"""
+        token = uuid.uuid4().hex[:16]
+        end = MARKER + token + "_"
+        try:
+            self.write(self.wrap(command, token))
+        except OSError:
+            return self.finish_dead(), False
+        exit_code = None
+        stderr_done = False
+        batch = []
+        started = last_flush = time.monotonic()
+        while exit_code is None or not stderr_done:
+            if not self.pipes.open:
+                return self.finish_dead(batch, on_lines), False
+            if timeout and time.monotonic() - started > timeout:
+                return None, False
+            for is_err, data in self.pipes.read(flush_interval):
+                decoder = self.decoders[is_err]
+                for line in (decoder.feed(data) if data else decoder.flush()):
+                    pos = line.find(end)
+                    if pos >= 0:
+                        # 哨兵前的内容是未以换行结尾的最后一行输出
+                        line, rest = line[:pos], line[pos + len(end):].strip()
+                        if is_err:
+                            stderr_done = True
+                        else:
+                            exit_code = int(rest) if rest.lstrip("-").isdigit() else 0
+                        if not line:
+                            continue
+                    batch.append(f"错误：{line}" if is_err else line)
+            now = time.monotonic()
+            if batch and (len(batch) >= max_batch or now - last_flush >= flush_interval):
+                on_lines(batch)
+                batch = []
+                last_flush = now
+        if batch:
+            on_lines(batch)
+        return exit_code, True
+
+    def finish_dead(self, batch=None, on_lines=None):
+        """shell 已退出：输出剩余内容，返回其退出码"""
+        if batch:
+            on_lines(batch)
+        exit_code = self.process.wait()
+        self.close_pipes()
+        return exit_code
+
+    def run(self, command, on_lines):
+        """在会话中执行一条命令（阻塞），返回 ProcessResult；会话不存在或已退出时先（重新）启动"""
+        with self.lock:
+            self.stopped = False
+            started = time.monotonic()
+            if not self.is_alive():
+                restarted = self.starts > 0
+                self.start()
+                note = "已重新启动" if restarted else "已启动"
+                on_lines([f"===== {self.name} 会话{note}（工作目录和环境变量从初始状态开始） ====="])
+            exit_code, alive = self.execute(command, on_lines)
+            if not alive and not self.stopped:
+                on_lines([f"===== {self.name} 会话已退出，下次执行时自动重新启动 ====="])
+            return ProcessResult(exit_code, time.monotonic() - started, self.stopped)
+
+    # ========== 停止/关闭 ==========
+    def stop(self):
+        """停止当前命令：命令在 shell 内执行，只能结束整个会话（后台进行，不阻塞调用方）"""
+        self.stopped = True
+        process = self.process
+        if process is not None:
+            threading.Thread(target=kill_process_tree, args=(process,), name="shell-kill", daemon=True).start()
+
+    def kill(self):
+        if self.process is not None:
+            kill_process_tree(self.process)
+            self.process.wait()
+            self.close_pipes()
+
+    def close_pipes(self):
+        if self.pipes:
+            self.pipes.close()
+            self.pipes = None
+        for pipe in (self.process.stdin, self.process.stdout, self.process.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def close(self):
+        """关闭会话（可在任意线程调用）：关闭 stdin 让 shell 自行退出，随后结束其进程树"""
+        self.stopped = True
+        process = self.process
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        threading.Thread(target=kill_process_tree, args=(process,), name="shell-kill", daemon=True).start()
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import select
+import threading
+import time
+import paramiko
+from app.config_manager import config_manager
+from core.net import timed_connect, elapsed_ms
+from core.stream import LineDecoder
+from utils.logger import logger
+
+
+def load_private_key(key_file, passphrase=None):
+    """按常见类型依次尝试加载私钥文件"""
+    error = None
+    for key_class in (paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey):
+        try:
+            return key_class.from_private_key_file(key_file, password=passphrase)
+        except paramiko.SSHException as e:
+            error = e
+    raise error
+
+
+DEFAULT_KEY_FILES = ("id_ed25519", "id_ecdsa", "id_rsa")  # ~/.ssh 下依次尝试的默认私钥
+
+
+def fallback_keys(passphrase=None):
+    """ssh-agent 中的密钥与 ~/.ssh 下的默认私钥（与 SSHClient.connect 的 allow_agent/look_for_keys 一致）"""
+    keys = []
+    try:
+        keys.extend(paramiko.Agent().get_keys())
+    except Exception:
+        pass
+    for name in DEFAULT_KEY_FILES:
+        path = os.path.join(os.path.expanduser("~"), ".ssh", name)
+        if not os.path.isfile(path):
+            continue
+        try:
+            keys.append(load_private_key(path, passphrase))
+        except (paramiko.SSHException, OSError):
+            pass
+    return keys
+
+
+def authenticate(transport, user, pwd):
+    """密码认证；没有密码、密码被拒或服务器不接受密码时，依次尝试 agent 密钥与默认私钥（密码兼作私钥口令）"""
+    error = None
+    if pwd:
+        try:
+            transport.auth_password(user, pwd)
+            return
+        except paramiko.SSHException as e:
+            error = e
+    for key in fallback_keys(pwd or None):
+        if not transport.is_active():
+            break
+        try:
+            transport.auth_publickey(user, key)
+            return
+        except paramiko.SSHException as e:
+            error = error or e
+    raise error or paramiko.AuthenticationException("没有可用的认证方式（未填写密码，也没有可用的私钥）")
+
+
+class SSHManager:
+    @staticmethod
+    def connect_timed(host, port, user, pwd, timeout=10, key_file=None):
+        """分阶段建立SSH连接（指定 key_file 时用密钥认证，pwd 作为私钥口令；否则见 authenticate），
+        返回 (是否成功, 信息, {阶段: 毫秒}, Transport或None)"""
+        phases = {}
+        sock = None
+        transport = None
+        try:
+            sock = timed_connect(host, port, timeout, phases)
+
+            # 版本协商 + 密钥交换
+            start = time.perf_counter()
+            transport = paramiko.Transport(sock)
+            transport.banner_timeout = timeout
+            transport.start_client(timeout=timeout)
+            phases["密钥交换"] = elapsed_ms(start)
+
+            start = time.perf_counter()
+            if key_file:
+                transport.auth_publickey(user, load_private_key(key_file, pwd or None))
+            else:
+                authenticate(transport, user, pwd)
+            phases["认证"] = elapsed_ms(start)
+            return True, "SSH连接成功！", phases, transport
+        except Exception as e:
+            if transport:
+                transport.close()
+            elif sock:
+                sock.close()
+            return False, str(e) or e.__class__.__name__, phases, None
+
+
+NO_EXIT_STATUS = -1  # read_channel：连接断开或通道关闭时对端未给出退出码（如被信号终止），用会话是否存活区分
+
+
+def read_channel(channel, on_lines, is_running, flush_interval=0.05, max_batch=2000, chunk_size=65536,
+                 stats=None):
+    """事件驱动读取通道输出，返回退出码（中途停止返回 None，连接断开或无退出码返回 NO_EXIT_STATUS）
+
+    select 等待通道可读，再用非阻塞 recv/recv_stderr 每轮各取一块（最多 chunk_size 字节），
+    stdout/stderr 交替读取、按到达顺序交错（stderr 行加"错误："前缀），两路同时读取不会因 stderr 写满而死锁；
+    解码后的行攒成批次，每 flush_interval 秒或满 max_batch 行回调一次 on_lines(行列表)，
+    每读一轮都检查批次与 is_running()，持续有数据时也能按批刷新、及时停止；
+    传入 stats 字典时累计 stdout 完整行数（stats["stdout_lines"]），供断线后按行号续传
+    """
+    out_decoder = LineDecoder()
+    err_decoder = LineDecoder()
+    batch = []
+    last_flush = time.monotonic()
+    while is_running():
+        received = False
+        if channel.recv_ready():
+            lines = out_decoder.feed(channel.recv(chunk_size))
+            batch.extend(lines)
+            if stats is not None:
+                stats["stdout_lines"] = stats.get("stdout_lines", 0) + len(lines)
+            received = True
+        if channel.recv_stderr_ready():
+            batch.extend(f"错误：{line}" for line in err_decoder.feed(channel.recv_stderr(chunk_size)))
+            received = True
+
+        finished = not received and (channel.eof_received or channel.closed) \
+            and not channel.recv_ready() and not channel.recv_stderr_ready()
+        now = time.monotonic()
+        if batch and (finished or len(batch) >= max_batch or now - last_flush >= flush_interval):
+            on_lines(batch)
+            batch = []
+            last_flush = now
+        if finished:
+            break
+        if not received:
+            select.select([channel], [], [], flush_interval)
+    else:
+        return None
+
+    transport = channel.get_transport()
+    if transport is None or not transport.is_active():
+        # 连接断开：未结束的半行不输出，续传时会从该行开头重新读取
+        return NO_EXIT_STATUS
+    tail = out_decoder.flush() + [f"错误：{line}" for line in err_decoder.flush()]
+    if tail:
+        on_lines(tail)
+    return channel.recv_exit_status()
+
+
+class SSHSession:
+    """一个已认证的 Transport，多个命令以独立通道并发复用它
+
+    会话由各页面/对话框共享，channels 为正在使用的通道数；退役（retire）后不再分配给新的使用者，
+    等最后一个通道释放后才关闭，不会中断其他使用者正在进行的操作。
+    """
+
+    def __init__(self, key, transport, password, key_file=None):
+        self.key = key  # (host, port, user)
+        self.transport = transport
+        self.password = password
+        self.key_file = key_file
+        self.channels = 0
+        self.last_used = time.time()
+        self.retired = False
+        self.missed_probes = 0  # 连续无应答的探测轮数
+        self.probe = None  # (探测线程, 应答 Event)：上一次探测未结束时不重复发送
+        self.lock = threading.Lock()
+
+    def is_active(self):
+        return self.transport is not None and self.transport.is_active()
+
+    def open_channel(self, timeout=None):
+        channel = self.transport.open_session(timeout=timeout)
+        with self.lock:
+            self.channels += 1
+            self.last_used = time.time()
+        return channel
+
+    def open_sftp(self, window_size=None, max_packet_size=None):
+        """新开一个 SFTP 通道（与命令通道一样计数，用完调用 release_channel(client.get_channel())）"""
+        client = paramiko.SFTPClient.from_transport(
+            self.transport, window_size=window_size, max_packet_size=max_packet_size)
+        with self.lock:
+            self.channels += 1
+            self.last_used = time.time()
+        return client
+
+    def release_channel(self, channel):
+        try:
+            channel.close()
+        finally:
+            with self.lock:
+                self.channels = max(self.channels - 1, 0)
+                self.last_used = time.time()
+                close = self.retired and not self.channels
+            if close:
+                self.close()
+
+    def retire(self):
+        """没有通道在用时立即关闭，否则在最后一个通道释放后关闭"""
+        with self.lock:
+            self.retired = True
+            close = not self.channels
+        if close:
+            self.close()
+
+    def idle_seconds(self):
+        with self.lock:
+            return 0 if self.channels else time.time() - self.last_used
+
+    def start_probe(self):
+        """发送一次需要服务端应答的 keepalive@openssh.com 请求，返回收到应答时置位的 Event
+        （Transport 自带的保活不等应答，网络中断而 TCP 未报错时无法发现）
+        上一次的请求仍在等待应答时不再发送新的，返回同一个 Event"""
+        with self.lock:
+            if self.probe and self.probe[0].is_alive():
+                return self.probe[1]
+        answered = threading.Event()
+
+        def request():
+            try:
+                self.transport.global_request("keepalive@openssh.com", wait=True)
+            except Exception:
+                return
+            if self.transport.is_active():
+                answered.set()
+
+        thread = threading.Thread(target=request, name="ssh-probe", daemon=True)
+        with self.lock:
+            self.probe = (thread, answered)
+        thread.start()
+        return answered
+
+    def close(self):
+        if self.transport:
+            self.transport.close()
+
+
+class SSHSessionManager:
+    """按 (主机, 端口, 用户) 复用 SSH 会话：保活、空闲超时回收，各页面共享"""
+
+    def __init__(self):
+        self.sessions = {}
+        self.key_locks = {}
+        self.lock = threading.Lock()
+        self.reaper = None
+
+    def key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def get_session(self, host, port, user, pwd, key_file=None, timeout=None):
+        """获取会话：已有且存活则直接复用（无需重新握手），否则新建（连接超时默认取 ssh_timeout 设置）
+        返回 (是否成功, 信息, {阶段: 毫秒}, SSHSession或None)"""
+        key = (host, int(port), user)
+        with self.key_lock(key):
+            with self.lock:
+                session = self.sessions.get(key)
+            if session and session.is_active() and session.password == pwd and session.key_file == key_file:
+                session.last_used = time.time()
+                return True, "复用已建立的SSH会话（无需重新握手）", {}, session
+            if session:
+                # 凭据不同或已断开：换成新会话，旧会话上其他使用者的通道照常进行，用完后关闭
+                self.retire_session(session)
+
+            success, msg, phases, transport = SSHManager.connect_timed(
+                host, port, user, pwd, timeout=timeout or config_manager.get("ssh_timeout"), key_file=key_file
+            )
+            if not success:
+                return False, msg, phases, None
+            transport.set_keepalive(config_manager.get("ssh_keepalive"))
+            session = SSHSession(key, transport, pwd, key_file)
+            with self.lock:
+                self.sessions[key] = session
+            self.start_reaper()
+            logger.info(f"新建SSH会话：{user}@{host}:{port}")
+            return True, msg, phases, session
+
+    def find_session(self, host, port, user):
+        with self.lock:
+            session = self.sessions.get((host, int(port), user))
+        return session if session and session.is_active() else None
+
+    def close_session(self, key):
+        with self.lock:
+            session = self.sessions.pop(key, None)
+        if session:
+            session.close()
+            logger.info(f"关闭SSH会话：{key[2]}@{key[0]}:{key[1]}")
+
+    def retire_session(self, session):
+        """从池中移除并退役（见 SSHSession.retire），用于某个使用者断开：不影响其他使用者仍在用的通道"""
+        with self.lock:
+            if self.sessions.get(session.key) is session:
+                del self.sessions[session.key]
+        session.retire()
+        logger.info(f"释放SSH会话：{session.key[2]}@{session.key[0]}:{session.key[1]}")
+
+    def discard(self, session):
+        """关闭指定会话（同一键下已换成新会话时不受影响）"""
+        with self.lock:
+            if self.sessions.get(session.key) is session:
+                del self.sessions[session.key]
+        session.close()
+        logger.info(f"关闭SSH会话：{session.key[2]}@{session.key[0]}:{session.key[1]}")
+
+    def reconnect(self, session, is_running, on_retry=None):
+        """断线重连：按指数退避（带抖动）反复尝试，成功返回新会话，is_running() 为假时放弃返回 None
+        on_retry(第几次, 等待秒数, 失败原因) 在每次等待前回调"""
+        host, port, user = session.key
+        delay = 1.0
+        attempt = 0
+        while is_running():
+            attempt += 1
+            success, msg, _, new_session = self.get_session(host, port, user, session.password, session.key_file)
+            if success:
+                logger.info(f"SSH会话已重连：{user}@{host}:{port}（第 {attempt} 次尝试）")
+                return new_session
+            wait = min(delay, config_manager.get("ssh_reconnect_max_delay")) * random.uniform(0.8, 1.2)
+            if on_retry:
+                on_retry(attempt, wait, msg)
+            deadline = time.monotonic() + wait
+            while is_running() and time.monotonic() < deadline:
+                time.sleep(0.2)
+            delay *= 2
+        return None
+
+    def close_all(self):
+        with self.lock:
+            keys = list(self.sessions)
+        for key in keys:
+            self.close_session(key)
+
+    def list_sessions(self):
+        """会话概况：[(主机, 端口, 用户, 通道数, 是否存活)]"""
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return [(*s.key, s.channels, s.is_active()) for s in sessions]
+
+    def start_reaper(self):
+        with self.lock:
+            if self.reaper:
+                return
+            self.reaper = threading.Thread(target=self.reap_loop, name="ssh-reaper", daemon=True)
+            self.reaper.start()
+
+    def reap_loop(self):
+        """回收空闲超时或已断开的会话；正在使用的会话并发探测，连续 ssh_probe_misses 轮超时无应答才视为断开
+        （传输繁忙时应答可能排在大量数据之后，单次超时不足以判定断开）
+        池空时退出；退出判断与 start_reaper 都在锁内进行，新会话不会错过回收线程"""
+        while True:
+            with self.lock:
+                if not self.sessions:
+                    self.reaper = None
+                    return
+            time.sleep(10)
+            idle_timeout = config_manager.get("ssh_idle_timeout")
+            with self.lock:
+                sessions = list(self.sessions.values())
+            probes = []
+            for session in sessions:
+                if not session.is_active() or session.idle_seconds() > idle_timeout:
+                    self.discard(session)
+                elif session.channels:
+                    probes.append((session, session.start_probe()))
+            deadline = time.monotonic() + config_manager.get("ssh_probe_timeout")
+            max_misses = config_manager.get("ssh_probe_misses")
+            for session, answered in probes:
+                if answered.wait(max(deadline - time.monotonic(), 0)):
+                    session.missed_probes = 0
+                    continue
+                session.missed_probes += 1
+                host, port, user = session.key
+                if session.missed_probes < max_misses:
+                    logger.warning(f"SSH会话探测无应答（连续 {session.missed_probes} 次）：{user}@{host}:{port}")
+                    continue
+                logger.error(f"SSH会话连续 {session.missed_probes} 次无响应，判定为断开：{user}@{host}:{port}")
+                # 关闭后其上的通道立即结束，读取线程据此触发重连
+                self.discard(session)
+
+
+# 全局实例（SSH页面、批量执行等功能共享会话）
+ssh_sessions = SSHSessionManager()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import codecs
+import locale
+import os
+
+
+AUTO = "auto"  # 编码配置为该值时自动识别
+DETECT_BYTES = 4  # 识别 BOM/UTF-16 至少需要的开头字节数
+SAMPLE_BYTES = 4096  # 判断无 BOM 的 UTF-16 时采样的字节数
+REPLACEMENT = "\ufffd"
+REPLACEMENT_BYTES = REPLACEMENT.encode("utf-8")
+
+
+def console_encoding():
+    """控制台代码页：Windows 下为 OEM 代码页（cmd 内部命令等控制台程序写管道时使用，中文系统为 cp936），
+    其他系统为 locale 编码"""
+    if os.name == "nt":
+        try:
+            import ctypes
+            encoding = f"cp{ctypes.windll.kernel32.GetOEMCP()}"
+            codecs.lookup(encoding)
+            return encoding
+        except (OSError, AttributeError, LookupError):
+            pass
+    return locale.getpreferredencoding(False)
+
+
+def line_decoder(encoding=AUTO, fallback=None):
+    """按编码配置创建行解码器：auto 时自动识别，否则固定编码"""
+    if not encoding or encoding == AUTO:
+        return AutoLineDecoder(fallback)
+    return LineDecoder(encoding)
+
+
+class LineDecoder:
+    """字节块 -> 文本行：增量解码（多字节字符可跨块拆分），未结束的行留到下一块"""
+
+    def __init__(self, encoding="utf-8", errors="replace"):
+        self.encoding = encoding
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        self.pending = ""
+
+    def feed(self, data):
+        """输入一块原始字节，返回其中已完整的行（不含换行符）"""
+        text = self.decoder.decode(data)
+        if "\n" not in text:
+            self.pending += text
+            return []
+        lines = (self.pending + text).split("\n")
+        self.pending = lines.pop()
+        return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+    def flush(self):
+        """流结束：返回剩余的半行（如有）"""
+        text = self.pending + self.decoder.decode(b"", final=True)
+        self.pending = ""
+        return [text.rstrip("\r")] if text else []
+
+
+class AutoLineDecoder:
+    """自动识别编码的行解码器，接口同 LineDecoder
+
+    开头有 BOM（UTF-8/UTF-16）或呈现 UTF-16 的 0 字节规律时固定按该编码解码；否则按完整行成块解码：
+    整块先按 UTF-8 严格解码（纯 ASCII/UTF-8 输出只做一次 C 层解码），遇到非法字节时只把所在的行
+    改用控制台代码页（如 GBK）解码，之后的行重新先试 UTF-8。这样同一输出中混有 UTF-8 与 GBK 的
+    行（如 chcp 65001 前后、调用不同程序）也能逐行正确显示。
+
+    换行字节 0x0A 不会出现在 UTF-8 与 GBK 等双字节编码的多字节字符内部，按它切分不会拆开字符；
+    末尾未结束的行（含被拆开的多字节字符）以字节形式留到下一块。
+    """
+
+    def __init__(self, fallback=None, errors="replace"):
+        self.fallback = fallback or console_encoding()
+        self.errors = errors
+        self.head = b""  # 识别前缓冲的开头字节，识别后为 None
+        self.inner = None  # BOM/UTF-16 时交给固定编码的 LineDecoder
+        self.pending = bytearray()
+        self.encoding = None  # 最近一块使用的编码（含代码页解码的行时为代码页）
+
+    def detect(self, data):
+        """根据开头字节识别 BOM/UTF-16，返回去掉 BOM 后的数据"""
+        for bom, encoding in ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"),
+                              (codecs.BOM_UTF16_BE, "utf-16-be")):
+            if data.startswith(bom):
+                data = data[len(bom):]
+                if encoding != "utf-8":
+                    self.inner = LineDecoder(encoding, self.errors)
+                self.encoding = encoding
+                return data
+        # 无 BOM 的 UTF-16（如 cmd /u、wmic）：ASCII 字符的高字节为 0；UTF-8/GBK 文本中不会出现 0 字节
+        sample = data[:SAMPLE_BYTES]
+        half = len(sample) // 2
+        for encoding, zeros, others in (("utf-16-le", sample[1::2], sample[0::2]),
+                                        ("utf-16-be", sample[0::2], sample[1::2])):
+            if zeros.count(0) >= half * 0.5 and others.count(0) <= half * 0.1:
+                self.inner = LineDecoder(encoding, self.errors)
+                self.encoding = encoding
+                break
+        return data
+
+    def decode(self, block):
+        """解码由完整行组成的字节块：整块按 UTF-8 解码，出现替换字符（非法字节）的行改用控制台代码页
+
+        两种解码都整块在 C 层完成（errors="replace" 不逐行抛异常），再按行挑选；替换不会吞掉换行，
+        两份结果的行一一对应。代码页解码行数对不上或原文本身含 U+FFFD 时退回逐行解码。
+        """
+        text = block.decode("utf-8", "replace")
+        if REPLACEMENT not in text:
+            self.encoding = "utf-8"
+            return text
+        lines = text.split("\n")
+        decoded = block.decode(self.fallback, self.errors).split("\n")
+        if len(decoded) != len(lines) or REPLACEMENT_BYTES in block:
+            decoded = [line if REPLACEMENT_BYTES in raw else raw.decode(self.fallback, self.errors)
+                       for line, raw in zip(lines, bytes(block).split(b"\n"))]
+        self.encoding = self.fallback
+        return "\n".join([other if REPLACEMENT in line else line for line, other in zip(lines, decoded)])
+
+    def feed(self, data):
+        """输入一块原始字节，返回其中已完整的行（不含换行符）"""
+        if self.head is not None:
+            self.head += data
+            if len(self.head) < DETECT_BYTES:
+                return []
+            data = self.detect(self.head)
+            self.head = None
+        if self.inner:
+            return self.inner.feed(data)
+        end = data.rfind(b"\n")
+        if end < 0:
+            self.pending += data
+            return []
+        self.pending += data[:end]
+        text = self.decode(self.pending)
+        self.pending = bytearray(data[end + 1:])
+        return [line[:-1] if line.endswith("\r") else line for line in text.split("\n")]
+
+    def flush(self):
+        """流结束：返回剩余的行（如有）"""
+        lines = []
+        if self.head is not None:  # 输出不足识别长度
+            data = self.detect(self.head)
+            self.head = None
+            lines = self.feed(data)
+        if self.inner:
+            return lines + self.inner.flush()
+        text = self.decode(self.pending)
+        self.pending = bytearray()
+        return lines + ([text.rstrip("\r")] if text else [])
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import threading
+import time
+from app.store import store
+
+
+SAMPLE_INTERVAL = 0.2  # /proc 采样间隔（秒）
+PROC = "/proc"
+
+
+class ResourceUsage:
+    """一次执行的资源占用；无法获取的项为 None
+
+    CPU/上下文切换/块 I/O 取 wait4 的 rusage（进程及其已回收的子孙进程）与 /proc 采样累计值中较大者；
+    峰值内存取采样到的进程树 RSS 之和的最大值与单个进程 VmHWM 的最大值中较大者
+    （rusage 的 ru_maxrss 会计入 fork 后、exec 前复制自本程序的内存，只在没有 /proc 时使用）
+    """
+
+    FIELDS = ("wall", "user", "system", "peak_rss", "read_bytes", "write_bytes",
+              "voluntary_switches", "involuntary_switches", "processes")
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field))
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @property
+    def cpu(self):
+        if self.user is None or self.system is None:
+            return None
+        return self.user + self.system
+
+    def kind(self):
+        """粗略判断耗时主要花在哪里：计算 / 磁盘 I/O / 等待（网络、休眠、锁、子进程输出等）"""
+        if self.cpu is None or not self.wall or self.wall < 0.1:
+            return None  # 太短的执行没有参考意义
+        ratio = self.cpu / self.wall
+        io = (self.read_bytes or 0) + (self.write_bytes or 0)
+        if ratio >= 0.7:
+            return "计算密集"
+        if io >= 16 * 1024 * 1024 and io / self.wall >= 4 * 1024 * 1024:
+            return "磁盘 I/O 密集"
+        if ratio < 0.2:
+            return "主要在等待"
+        return "混合"
+
+    def summary(self):
+        parts = []
+        if self.cpu is not None:
+            ratio = f"（占墙钟 {self.cpu / self.wall:.0%}）" if self.wall else ""
+            parts.append(f"CPU 用户 {self.user:.2f} 秒 / 系统 {self.system:.2f} 秒{ratio}")
+        if self.peak_rss is not None:
+            parts.append(f"峰值内存 {format_bytes(self.peak_rss)}")
+        if self.read_bytes is not None:
+            parts.append(f"块 I/O 读 {format_bytes(self.read_bytes)} / 写 {format_bytes(self.write_bytes or 0)}")
+        if self.voluntary_switches is not None:
+            parts.append(f"上下文切换 自愿 {self.voluntary_switches} / 非自愿 {self.involuntary_switches or 0}")
+        if self.processes:
+            parts.append(f"进程 {self.processes} 个")
+        kind = self.kind()
+        if kind:
+            parts.append(kind)
+        return "，".join(parts)
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def compare(usage, previous):
+    """与上次同一命令的记录对比，返回变化说明（变化不足 10% 的项不列出）"""
+    changes = []
+    for label, now, before in (("耗时", usage.wall, previous.get("wall")),
+                               ("CPU", usage.cpu, _sum(previous.get("user"), previous.get("system"))),
+                               ("峰值内存", usage.peak_rss, previous.get("peak_rss"))):
+        if now is None or not before:
+            continue
+        delta = (now - before) / before
+        if abs(delta) >= 0.1:
+            changes.append(f"{label} {delta:+.0%}")
+    return "，".join(changes)
+
+
+def _sum(a, b):
+    return None if a is None or b is None else a + b
+
+
+# ========== 采样 ==========
+def read_proc_stat(pid):
+    """读取 /proc/<pid>/stat，返回 (进程组, 启动时间, utime 时钟数, stime 时钟数, rss 页数)"""
+    with open(f"{PROC}/{pid}/stat", "rb") as f:
+        data = f.read()
+    # 进程名可能含空格和括号，从最后一个 ')' 之后开始按字段切分（第 3 个字段起）
+    fields = data[data.rfind(b")") + 2:].split()
+    return int(fields[2]), int(fields[19]), int(fields[11]), int(fields[12]), int(fields[21])
+
+
+def read_proc_io(pid):
+    values = {}
+    try:
+        with open(f"{PROC}/{pid}/io", "rb") as f:
+            for line in f:
+                key, _, value = line.partition(b":")
+                values[key] = int(value)
+    except (OSError, ValueError):
+        return None
+    return values.get(b"read_bytes", 0), values.get(b"write_bytes", 0)
+
+
+def read_proc_status(pid):
+    """读取 /proc/<pid>/status，返回 (VmHWM 字节, 自愿切换, 非自愿切换)；VmHWM 为 exec 之后的峰值 RSS"""
+    hwm = voluntary = involuntary = 0
+    with open(f"{PROC}/{pid}/status", "rb") as f:
+        for line in f:
+            if line.startswith(b"VmHWM"):
+                hwm = int(line.split()[1]) * 1024
+            elif line.startswith(b"voluntary_ctxt_switches"):
+                voluntary = int(line.split()[1])
+            elif line.startswith(b"nonvoluntary_ctxt_switches"):
+                involuntary = int(line.split()[1])
+    return hwm, voluntary, involuntary
+
+
+class UsageSampler:
+    """执行期间定时采样进程树（进程在独立进程组中启动，按进程组识别）的资源占用，结束时结合 wait4 汇总
+
+    Linux 读 /proc；其他 POSIX 系统只有 wait4 的 rusage；Windows 只统计根进程（GetProcessTimes 等）
+    """
+
+    def __init__(self, process, interval=SAMPLE_INTERVAL):
+        self.process = process
+        self.interval = interval
+        self.started = time.monotonic()
+        self.enabled = os.path.isdir(PROC) and os.name != "nt"
+        self.ticks = os.sysconf("SC_CLK_TCK") if self.enabled else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if self.enabled else 4096
+        self.seen = {}  # (pid, 启动时间) -> (utime, stime, 自愿切换, 非自愿切换)
+        self.peak_rss = 0
+        self.root_io = None
+        self.done = threading.Event()
+        self.thread = None
+        if self.enabled:
+            self.sample()
+            self.thread = threading.Thread(target=self.loop, name="usage-sampler", daemon=True)
+            self.thread.start()
+
+    def loop(self):
+        while not self.done.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        root = self.process.pid
+        rss = 0
+        for name in os.listdir(PROC):
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            try:
+                pgrp, start, utime, stime, pages = read_proc_stat(pid)
+                if pgrp != root:
+                    continue
+                hwm, voluntary, involuntary = read_proc_status(pid)
+            except (OSError, ValueError, IndexError):
+                continue  # 进程已退出
+            rss += pages
+            self.seen[(pid, start)] = (utime, stime, voluntary, involuntary)
+            self.peak_rss = max(self.peak_rss, hwm)
+            if pid == root:
+                # 根进程的 io 计数包含它已回收的子进程，作为 wait4 不可用时的近似值
+                self.root_io = read_proc_io(pid) or self.root_io
+        self.peak_rss = max(self.peak_rss, rss * self.page_size)
+
+    def finish(self):
+        """进程结束后调用（替代 process.wait()），返回 (退出码, ResourceUsage)"""
+        self.done.set()
+        if self.thread:
+            self.thread.join()
+            self.sample()  # 根进程此时通常是尚未回收的僵尸进程，计数仍可读取
+        exit_code, rusage = wait_process(self.process)
+        usage = ResourceUsage(wall=time.monotonic() - self.started)
+        if os.name == "nt":
+            windows_usage(self.process, usage)
+            return exit_code, usage
+        if self.seen:
+            totals = [sum(values) for values in zip(*self.seen.values())]
+            usage.user, usage.system = totals[0] / self.ticks, totals[1] / self.ticks
+            usage.voluntary_switches, usage.involuntary_switches = totals[2], totals[3]
+            usage.peak_rss = self.peak_rss or None  # 进程在首次采样前已退出（僵尸进程没有 VmHWM）
+            usage.processes = len(self.seen)
+            if self.root_io:
+                usage.read_bytes, usage.write_bytes = self.root_io
+        if rusage is not None:
+            if not self.seen:
+                # ru_maxrss：Linux 为 KB，macOS 为字节
+                usage.peak_rss = rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+            usage.read_bytes = max(usage.read_bytes or 0, rusage.ru_inblock * 512)
+            usage.write_bytes = max(usage.write_bytes or 0, rusage.ru_oublock * 512)
+            usage.voluntary_switches = max(usage.voluntary_switches or 0, rusage.ru_nvcsw)
+            usage.involuntary_switches = max(usage.involuntary_switches or 0, rusage.ru_nivcsw)
+            # 被结束或脱离的子进程不会计入 rusage，此时采样累计值更大
+            if usage.cpu is None or rusage.ru_utime + rusage.ru_stime >= usage.cpu:
+                usage.user, usage.system = rusage.ru_utime, rusage.ru_stime
+        return exit_code, usage
+
+
+def wait_process(process):
+    """等待进程结束；POSIX 上用 wait4 同时取得 rusage（已被其他线程回收时为 None）"""
+    if os.name == "nt" or process.returncode is not None:
+        return process.wait(), None
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # 结束进程树时的 poll() 已经回收了进程
+        return process.wait(), None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, rusage
+
+
+def windows_usage(process, usage):
+    """Windows：根进程的 CPU 时间、峰值工作集和 I/O 字节数（不含子进程）"""
+    import ctypes
+    from ctypes import wintypes
+
+    class IOCounters(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in (
+            "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+            "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+    class MemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    handle = wintypes.HANDLE(int(process._handle))
+    creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+    if ctypes.windll.kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                              ctypes.byref(kernel), ctypes.byref(user)):
+        # FILETIME 单位为 100 纳秒
+        usage.user = ((user.dwHighDateTime << 32) + user.dwLowDateTime) / 1e7
+        usage.system = ((kernel.dwHighDateTime << 32) + kernel.dwLowDateTime) / 1e7
+    memory = MemoryCounters()
+    memory.cb = ctypes.sizeof(MemoryCounters)
+    if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(memory), memory.cb):
+        usage.peak_rss = memory.PeakWorkingSetSize
+    io = IOCounters()
+    if ctypes.windll.kernel32.GetProcessIoCounters(handle, ctypes.byref(io)):
+        usage.read_bytes, usage.write_bytes = io.ReadTransferCount, io.WriteTransferCount
+    usage.processes = 1
+
+
+class UsageHistory:
+    """命令资源占用历史（数据库 usage_records 表，每条记录一行），新记录在前，超出上限丢弃最旧的"""
+
+    def add(self, command, exit_code, usage, max_count=500):
+        """追加一条记录，返回同一命令的上一条记录（没有则为 None），用于对比"""
+        record = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "command": command, "exit_code": exit_code}
+        record.update(usage.to_dict())
+        return store.add_usage_record(record, max_count)
+
+    def list_records(self):
+        return store.list_usage_records()
+
+    def clear(self):
+        store.clear_usage_records()
+
+
+usage_history = UsageHistory()
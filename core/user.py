@@ -19,10 +19,10 @@ class UserManager:
     @staticmethod
     def save_user_info(info):
         config.data["user_info"] = info
-        config.save()
+        config.save("user_info")
         signals.user_info_changed.emit()
 
     @staticmethod
     def change_password(new_pwd):
         config.data["admin"]["password"] = new_pwd
-        config.save()
\ No newline at end of file
+        config.save("admin")
\ No newline at end of file
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+import os
+from collections import Counter
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSpinBox, QSplitter,
+    QPlainTextEdit, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QWidget
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QFont, QColor
+from utils.ui_util import show_info, show_warn, show_error
+from utils.logger import logger
+from app.config_manager import config_manager
+from core.batch import BatchRunner, parse_inputs, export_results
+from ui.widgets.console import ConsoleWidget
+from ui import styles
+
+
+STATUS_TEXT = {
+    "waiting": "等待",
+    "running": "执行中",
+    "ok": "成功",
+    "failed": "失败",
+    "timeout": "超时",
+    "error": "启动失败",
+    "cancelled": "已取消"
+}
+STATUS_COLOR = {"ok": "#1e8e3e", "failed": "#d93025", "timeout": "#e37400", "error": "#d93025"}
+
+
+# 批量执行线程
+class BatchThread(QThread):
+    result_signal = pyqtSignal(dict)
+    finished_signal = pyqtSignal()
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+
+    def run(self):
+        try:
+            self.runner.run(self.result_signal.emit)
+        finally:
+            self.finished_signal.emit()
+
+
+class BatchDialog(QDialog):
+    """批量执行：命令模板 + 输入列表，在进程池中并发执行，结果表可导出"""
+
+    def __init__(self, kind, template="", parent=None):
+        super().__init__(parent)
+        self.kind = kind
+        self.setWindowTitle("PowerShell 批量执行" if kind == "ps1" else "CMD 批量执行")
+        self.resize(1200, 800)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.thread = None
+        self.runner = None
+        self.results = {}
+        self.init_ui(template)
+
+    def init_ui(self, template):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+
+        top = QSplitter(Qt.Horizontal)
+        template_box = QWidget()
+        template_layout = QVBoxLayout(template_box)
+        template_layout.setContentsMargins(0, 0, 0, 0)
+        template_layout.addWidget(QLabel(
+            "命令模板（{item} 整行输入，{1} {2}... 第 n 列，{index} 序号；值原样代入，"
+            "{q:item} {q:1} 自动加引号，{{item}} 表示字面的 {item}）："))
+        self.template_edit = QPlainTextEdit(template)
+        self.template_edit.setStyleSheet(styles.EDITOR)
+        template_layout.addWidget(self.template_edit)
+        top.addWidget(template_box)
+
+        input_box = QWidget()
+        input_layout = QVBoxLayout(input_box)
+        input_layout.setContentsMargins(0, 0, 0, 0)
+        input_header = QHBoxLayout()
+        input_header.addWidget(QLabel("输入列表（每行一项，# 开头为注释）："))
+        input_header.addStretch()
+        import_btn = QPushButton("从文件导入")
+        import_btn.setStyleSheet(styles.SECONDARY_BTN)
+        import_btn.clicked.connect(self.import_inputs)
+        input_header.addWidget(import_btn)
+        input_layout.addLayout(input_header)
+        self.input_edit = QPlainTextEdit()
+        self.input_edit.setStyleSheet(styles.EDITOR)
+        input_layout.addWidget(self.input_edit)
+        top.addWidget(input_box)
+        top.setSizes([600, 600])
+        layout.addWidget(top, 2)
+
+        params = QHBoxLayout()
+        params.addWidget(QLabel("并发数："))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 256)
+        self.concurrency_spin.setValue(config_manager.get("batch_concurrency"))
+        self.concurrency_spin.setStyleSheet(styles.INPUT)
+        params.addWidget(self.concurrency_spin)
+        params.addWidget(QLabel("单项超时(秒)："))
+        self.timeout_spin = QSpinBox()
+        self.timeout_spin.setRange(1, 86400)
+        self.timeout_spin.setValue(config_manager.get("batch_timeout"))
+        self.timeout_spin.setStyleSheet(styles.INPUT)
+        params.addWidget(self.timeout_spin)
+        params.addWidget(QLabel("失败重试次数："))
+        self.retries_spin = QSpinBox()
+        self.retries_spin.setRange(0, 10)
+        self.retries_spin.setValue(config_manager.get("batch_retries"))
+        self.retries_spin.setStyleSheet(styles.INPUT)
+        params.addWidget(self.retries_spin)
+        params.addStretch()
+
+        self.run_btn = QPushButton("执行")
+        self.run_btn.setStyleSheet(styles.PRIMARY_BTN)
+        self.run_btn.clicked.connect(self.start)
+        params.addWidget(self.run_btn)
+        self.stop_btn = QPushButton("停止")
+        self.stop_btn.setStyleSheet(styles.WARN_BTN)
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop)
+        params.addWidget(self.stop_btn)
+        self.export_btn = QPushButton("导出结果")
+        self.export_btn.setStyleSheet(styles.SECONDARY_BTN)
+        self.export_btn.setEnabled(False)
+        self.export_btn.clicked.connect(self.export)
+        params.addWidget(self.export_btn)
+        layout.addLayout(params)
+
+        self.progress_label = QLabel("")
+        self.progress_label.setStyleSheet("color: #34495e;")
+        layout.addWidget(self.progress_label)
+
+        bottom = QSplitter(Qt.Horizontal)
+        self.result_table = QTableWidget(0, 6)
+        self.result_table.setHorizontalHeaderLabels(["#", "输入", "状态", "退出码", "耗时(秒)", "尝试次数"])
+        self.result_table.verticalHeader().setVisible(False)
+        self.result_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.result_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.result_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.result_table.setStyleSheet(styles.TABLE)
+        self.result_table.itemSelectionChanged.connect(self.show_selected_output)
+        bottom.addWidget(self.result_table)
+        self.output_console = ConsoleWidget(min_height=200)
+        bottom.addWidget(self.output_console)
+        bottom.setSizes([600, 600])
+        layout.addWidget(bottom, 3)
+
+    def import_inputs(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "导入输入列表", os.path.expanduser("~"), "文本文件 (*.txt *.csv *.list);;所有文件 (*.*)")
+        if not file_path:
+            return
+        try:
+            with open(file_path, "r", encoding="utf-8-sig", errors="replace") as f:
+                self.input_edit.setPlainText(f.read())
+        except OSError as e:
+            show_error("失败", f"读取文件失败：{str(e)}")
+
+    # ========== 执行 ==========
+    def start(self):
+        template = self.template_edit.toPlainText().strip()
+        items = parse_inputs(self.input_edit.toPlainText())
+        if not template:
+            show_warn("警告", "请输入命令模板！")
+            return
+        if not items:
+            show_warn("警告", "输入列表为空！")
+            return
+
+        self.results = {}
+        self.output_console.clear()
+        self.result_table.setRowCount(len(items))
+        for row, item in enumerate(items):
+            values = [str(row + 1), item, STATUS_TEXT["waiting"], "", "", ""]
+            for col, value in enumerate(values):
+                self.result_table.setItem(row, col, QTableWidgetItem(value))
+
+        self.runner = BatchRunner(
+            self.kind, template, items,
+            concurrency=self.concurrency_spin.value(),
+            timeout=self.timeout_spin.value(),
+            retries=self.retries_spin.value()
+        )
+        self.thread = BatchThread(self.runner, self)
+        self.thread.result_signal.connect(self.on_result)
+        self.thread.finished_signal.connect(self.on_finished)
+        self.thread.start()
+        self.run_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.export_btn.setEnabled(False)
+        self.update_progress()
+        logger.info(f"批量执行（{self.kind}）：{len(items)} 项，模板：{template}")
+
+    def stop(self):
+        if self.runner:
+            self.runner.cancel()
+        self.stop_btn.setEnabled(False)
+
+    def on_result(self, result):
+        row = result["index"] - 1
+        self.results[result["index"]] = result
+        status = result["status"]
+        status_item = self.result_table.item(row, 2)
+        status_item.setText(STATUS_TEXT.get(status, status))
+        status_item.setForeground(QColor(STATUS_COLOR.get(status, "#202124")))
+        if status != "running":
+            self.result_table.item(row, 3).setText("" if result["exit_code"] is None else str(result["exit_code"]))
+            self.result_table.item(row, 4).setText(f"{result['duration']:.2f}")
+            self.result_table.item(row, 5).setText(str(result["attempts"]))
+            if self.result_table.currentRow() == row:
+                self.show_selected_output()
+        self.update_progress()
+
+    def update_progress(self):
+        counts = Counter(r["status"] for r in self.results.values())
+        done = sum(n for s, n in counts.items() if s != "running")
+        detail = "，".join(f"{STATUS_TEXT[s]} {counts[s]}" for s in STATUS_TEXT if counts.get(s))
+        self.progress_label.setText(f"完成 {done}/{self.result_table.rowCount()}    {detail}")
+
+    def show_selected_output(self):
+        row = self.result_table.currentRow()
+        result = self.results.get(row + 1)
+        self.output_console.clear()
+        if not result:
+            return
+        self.output_console.append_line(f"# {result['command']}")
+        if result["error"]:
+            self.output_console.append_line(f"错误：{result['error']}")
+        if result["output"]:
+            self.output_console.append_lines(result["output"].split("\n"))
+
+    def on_finished(self):
+        self.thread.wait()
+        self.run_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.export_btn.setEnabled(bool(self.results))
+        self.update_progress()
+        logger.info(f"批量执行完成：{self.progress_label.text()}")
+
+    def export(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出结果", os.path.join(os.path.expanduser("~"), "batch_results.csv"),
+            "CSV 文件 (*.csv);;JSON 文件 (*.json)")
+        if not file_path:
+            return
+        try:
+            export_results(file_path, [self.results[i] for i in sorted(self.results)])
+            show_info("成功", f"结果已导出到：{file_path}")
+        except OSError as e:
+            show_error("失败", f"导出失败：{str(e)}")
+
+    def done(self, result):
+        """关闭（含 Esc、关闭按钮）时取消执行，正在运行的进程随即结束；不在界面线程等待"""
+        self.stop()
+        super().done(result)
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
+    QPushButton, QComboBox, QSpinBox, QSplitter, QTreeWidget,
+    QTreeWidgetItem, QPlainTextEdit
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QFont
+from utils.ui_util import show_info, show_warn
+from utils.logger import logger
+from app.config_manager import config_manager
+from core.inventory import inventory
+from core.fanout import FanoutExecutor, ResultGrouper
+from ui.widgets.console import ConsoleWidget
+from ui import styles
+
+
+STATUS_TEXT = {
+    "ok": "成功",
+    "failed": "失败",
+    "timeout": "超时",
+    "error": "连接错误",
+    "unknown": "无退出码",
+    "cancelled": "已取消"
+}
+
+
+# 批量执行线程
+class FanoutThread(QThread):
+    result_signal = pyqtSignal(dict)
+    finished_signal = pyqtSignal()
+
+    def __init__(self, executor, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+
+    def run(self):
+        try:
+            self.executor.run(self.result_signal.emit)
+        finally:
+            self.finished_signal.emit()
+
+
+class InventoryDialog(QDialog):
+    """主机清单编辑：每行一台主机"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("编辑主机清单")
+        self.resize(760, 520)
+        layout = QVBoxLayout(self)
+
+        tip = QLabel("每行一台主机：user@host:port 分组1,分组2 password=密码 或 key=/path/id_rsa（# 开头为注释）；"
+                     "已保存的密码显示为 ********，保持不变即沿用原密码")
+        tip.setWordWrap(True)
+        tip.setStyleSheet("color: #7f8c8d;")
+        layout.addWidget(tip)
+
+        self.editor = QPlainTextEdit(inventory.export_text())
+        self.editor.setStyleSheet(styles.EDITOR)
+        layout.addWidget(self.editor, 1)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        save_btn = QPushButton("保存")
+        save_btn.setStyleSheet(styles.PRIMARY_BTN)
+        save_btn.clicked.connect(self.save)
+        btn_layout.addWidget(save_btn)
+        cancel_btn = QPushButton("取消")
+        cancel_btn.setStyleSheet(styles.SECONDARY_BTN)
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+        layout.addLayout(btn_layout)
+
+    def save(self):
+        count = inventory.replace_text(self.editor.toPlainText())
+        show_info("成功", f"主机清单已保存，共 {count} 台主机")
+        self.accept()
+
+
+class FanoutDialog(QDialog):
+    """批量执行：同一命令在一组主机上并发执行，输出相同的主机合并显示"""
+
+    def __init__(self, command="", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("SSH 批量执行")
+        self.resize(1100, 720)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.thread = None
+        self.executor = None
+        self.grouper = None
+        self.group_items = {}
+        self.results = {}
+        self.total = 0
+        self.init_ui(command)
+        self.load_groups()
+
+    def init_ui(self, command):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+
+        # 目标主机
+        target_layout = QHBoxLayout()
+        target_layout.addWidget(QLabel("目标分组："))
+        self.group_combo = QComboBox()
+        self.group_combo.setStyleSheet(styles.INPUT)
+        self.group_combo.setMinimumWidth(200)
+        self.group_combo.currentIndexChanged.connect(self.update_host_count)
+        target_layout.addWidget(self.group_combo)
+        self.host_count_label = QLabel("")
+        target_layout.addWidget(self.host_count_label)
+        target_layout.addStretch()
+        edit_btn = QPushButton("编辑主机清单")
+        edit_btn.setStyleSheet(styles.SECONDARY_BTN)
+        edit_btn.clicked.connect(self.edit_inventory)
+        target_layout.addWidget(edit_btn)
+        layout.addLayout(target_layout)
+
+        # 命令与执行参数
+        cmd_layout = QHBoxLayout()
+        cmd_layout.addWidget(QLabel("命令："))
+        self.cmd_edit = QLineEdit(command)
+        self.cmd_edit.setStyleSheet(styles.INPUT)
+        cmd_layout.addWidget(self.cmd_edit, 1)
+        cmd_layout.addWidget(QLabel("并发数："))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 500)
+        self.concurrency_spin.setValue(config_manager.get("fanout_concurrency"))
+        self.concurrency_spin.setStyleSheet(styles.INPUT)
+        cmd_layout.addWidget(self.concurrency_spin)
+        cmd_layout.addWidget(QLabel("单机超时(秒)："))
+        self.timeout_spin = QSpinBox()
+        self.timeout_spin.setRange(1, 3600)
+        self.timeout_spin.setValue(config_manager.get("fanout_timeout"))
+        self.timeout_spin.setStyleSheet(styles.INPUT)
+        cmd_layout.addWidget(self.timeout_spin)
+
+        self.run_btn = QPushButton("执行")
+        self.run_btn.setStyleSheet(styles.PRIMARY_BTN)
+        self.run_btn.clicked.connect(self.start)
+        cmd_layout.addWidget(self.run_btn)
+        self.stop_btn = QPushButton("停止")
+        self.stop_btn.setStyleSheet(styles.WARN_BTN)
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop)
+        cmd_layout.addWidget(self.stop_btn)
+        layout.addLayout(cmd_layout)
+
+        self.progress_label = QLabel("")
+        self.progress_label.setStyleSheet("color: #34495e;")
+        layout.addWidget(self.progress_label)
+
+        # 左：按输出分组的结果；右：选中分组的输出
+        splitter = QSplitter(Qt.Horizontal)
+        self.result_tree = QTreeWidget()
+        self.result_tree.setHeaderLabels(["结果分组", "主机数"])
+        self.result_tree.setColumnWidth(0, 380)
+        self.result_tree.setStyleSheet(styles.TABLE)
+        self.result_tree.currentItemChanged.connect(self.show_item_output)
+        splitter.addWidget(self.result_tree)
+        self.output_console = ConsoleWidget(min_height=200)
+        splitter.addWidget(self.output_console)
+        splitter.setSizes([450, 650])
+        layout.addWidget(splitter, 1)
+
+    # ========== 主机清单 ==========
+    def load_groups(self):
+        current = self.group_combo.currentData()
+        self.group_combo.blockSignals(True)
+        self.group_combo.clear()
+        self.group_combo.addItem("全部主机", "")
+        for group in inventory.groups():
+            self.group_combo.addItem(group, group)
+        self.group_combo.setCurrentIndex(max(self.group_combo.findData(current), 0))
+        self.group_combo.blockSignals(False)
+        self.update_host_count()
+
+    def update_host_count(self):
+        hosts = inventory.list_hosts(self.group_combo.currentData())
+        self.host_count_label.setText(f"共 {len(hosts)} 台主机")
+
+    def edit_inventory(self):
+        if InventoryDialog(self).exec_():
+            inventory.load()
+            self.load_groups()
+
+    # ========== 执行 ==========
+    def start(self):
+        command = self.cmd_edit.text().strip()
+        hosts = inventory.list_hosts(self.group_combo.currentData())
+        if not command:
+            show_warn("警告", "请输入要执行的命令！")
+            return
+        if not hosts:
+            show_warn("警告", "目标分组中没有主机，请先编辑主机清单！")
+            return
+
+        self.result_tree.clear()
+        self.output_console.clear()
+        self.grouper = ResultGrouper()
+        self.group_items = {}
+        self.results = {}
+        self.total = len(hosts)
+        self.update_progress()
+
+        self.executor = FanoutExecutor(
+            hosts, command,
+            concurrency=self.concurrency_spin.value(),
+            timeout=self.timeout_spin.value()
+        )
+        self.thread = FanoutThread(self.executor, self)
+        self.thread.result_signal.connect(self.on_result)
+        self.thread.finished_signal.connect(self.on_finished)
+        self.thread.start()
+        self.run_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        config_manager.increment_stat("ssh_command_count")
+        logger.info(f"SSH批量执行：{command}（{len(hosts)} 台主机）")
+
+    def stop(self):
+        if self.executor:
+            self.executor.cancel()
+        self.stop_btn.setEnabled(False)
+
+    def on_result(self, result):
+        """逐台返回结果：并入对应的输出分组"""
+        self.results[result["name"]] = result
+        digest = self.grouper.add(result)
+        group = self.grouper.groups[digest]
+        item = self.group_items.get(digest)
+        if item is None:
+            item = QTreeWidgetItem(self.result_tree)
+            item.setData(0, Qt.UserRole, digest)
+            self.group_items[digest] = item
+        item.setText(0, self.group_title(group["sample"]))
+        item.setData(1, Qt.DisplayRole, len(group["hosts"]))
+        child = QTreeWidgetItem(item, [result["name"], f"{result['duration']:.1f}s"])
+        child.setData(0, Qt.UserRole, digest)
+        child.setData(1, Qt.UserRole, result["name"])
+        self.result_tree.sortItems(1, Qt.DescendingOrder)
+        self.update_progress()
+
+    def group_title(self, sample):
+        status = STATUS_TEXT.get(sample["status"], sample["status"])
+        if sample["exit_code"] is not None:
+            status += f"（退出码 {sample['exit_code']}）"
+        first_line = (sample["error"] or sample["output"]).strip().split("\n")[0][:80]
+        return f"{status}：{first_line}" if first_line else status
+
+    def update_progress(self):
+        done = len(self.results)
+        summary = "，".join(
+            f"{len(g['hosts'])} 台：{STATUS_TEXT.get(g['sample']['status'], '')}"
+            for _, g in self.grouper.summary()[:5]
+        ) if self.grouper else ""
+        self.progress_label.setText(f"完成 {done}/{self.total}    {summary}")
+
+    def show_item_output(self, item, _previous=None):
+        if item is None:
+            return
+        digest = item.data(0, Qt.UserRole)
+        group = self.grouper.groups.get(digest) if self.grouper else None
+        if not group:
+            return
+        sample = group["sample"]
+        self.output_console.clear()
+        self.output_console.append_line(f"# 主机（{len(group['hosts'])} 台）：{', '.join(group['hosts'])}")
+        if sample["error"]:
+            self.output_console.append_line(f"错误：{sample['error']}")
+        if sample["output"]:
+            self.output_console.append_lines(sample["output"].split("\n"))
+
+    def on_finished(self):
+        self.run_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.thread.wait()
+        self.update_progress()
+        logger.info(f"SSH批量执行完成：{len(self.results)}/{self.total}")
+
+    def done(self, result):
+        """关闭（含 Esc、关闭按钮）时取消执行；不在界面线程等待，执行线程随后自行结束"""
+        self.stop()
+        super().done(result)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
+    QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView, QGridLayout
+)
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont, QColor
+from utils.ui_util import show_warn
+from utils.logger import logger
+from app.config_manager import config_manager
+from core.inventory import inventory
+from core.metrics import MetricsSampler
+from ui.widgets.sparkline import Sparkline
+from ui import styles
+
+
+COLUMNS = ["主机", "CPU", "内存", "磁盘", "负载", "接收", "发送", "采样耗时", "状态"]
+
+
+def format_rate(value):
+    if value is None:
+        return "-"
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB/s"
+
+
+def format_percent(value):
+    return "-" if value is None else f"{value:.1f}%"
+
+
+class MetricsDialog(QDialog):
+    """主机监控：周期采集一组主机的 CPU/内存/磁盘/网络，表格展示最新值，选中主机显示趋势图"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("主机监控")
+        self.resize(1100, 760)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.sampler = None
+        self.rows = {}  # 主机名 -> 行号
+        self.init_ui()
+        # 界面按固定频率拉取最新数据，与主机数量和采样回调次数无关
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+
+        top = QHBoxLayout()
+        top.addWidget(QLabel("目标分组："))
+        self.group_combo = QComboBox()
+        self.group_combo.setStyleSheet(styles.INPUT)
+        self.group_combo.setMinimumWidth(180)
+        self.group_combo.addItem("全部主机", "")
+        for group in inventory.groups():
+            self.group_combo.addItem(group, group)
+        top.addWidget(self.group_combo)
+        top.addWidget(QLabel("采样间隔(秒)："))
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 3600)
+        self.interval_spin.setValue(config_manager.get("metrics_interval"))
+        self.interval_spin.setStyleSheet(styles.INPUT)
+        top.addWidget(self.interval_spin)
+        top.addStretch()
+
+        self.start_btn = QPushButton("开始监控")
+        self.start_btn.setStyleSheet(styles.PRIMARY_BTN)
+        self.start_btn.clicked.connect(self.start)
+        top.addWidget(self.start_btn)
+        self.stop_btn = QPushButton("停止")
+        self.stop_btn.setStyleSheet(styles.WARN_BTN)
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop)
+        top.addWidget(self.stop_btn)
+        layout.addLayout(top)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setStyleSheet(styles.TABLE)
+        self.table.itemSelectionChanged.connect(self.refresh_charts)
+        layout.addWidget(self.table, 1)
+
+        self.chart_title = QLabel("选中主机查看趋势")
+        self.chart_title.setStyleSheet("color: #34495e; font-weight: bold;")
+        layout.addWidget(self.chart_title)
+        charts = QGridLayout()
+        self.charts = {
+            "cpu": Sparkline("CPU %", "#4285f4", 100, lambda v: f"{v:.1f}%"),
+            "mem": Sparkline("内存 %", "#34a853", 100, lambda v: f"{v:.1f}%"),
+            "rx": Sparkline("接收", "#fbbc05", None, format_rate),
+            "tx": Sparkline("发送", "#ea4335", None, format_rate),
+        }
+        for i, chart in enumerate(self.charts.values()):
+            charts.addWidget(chart, i // 2, i % 2)
+        layout.addLayout(charts)
+
+    def start(self):
+        hosts = inventory.list_hosts(self.group_combo.currentData())
+        if not hosts:
+            show_warn("警告", "目标分组中没有主机，请先在批量执行中编辑主机清单！")
+            return
+
+        self.rows = {}
+        self.table.setRowCount(len(hosts))
+        for row, host in enumerate(hosts):
+            self.rows[host["name"]] = row
+            self.table.setItem(row, 0, QTableWidgetItem(host["name"]))
+            for col in range(1, len(COLUMNS)):
+                self.table.setItem(row, col, QTableWidgetItem("-"))
+
+        interval = self.interval_spin.value()
+        self.sampler = MetricsSampler(
+            hosts, interval,
+            history=config_manager.get("metrics_history"),
+            concurrency=config_manager.get("fanout_concurrency"),
+            timeout=max(interval, config_manager.get("ssh_timeout"))
+        )
+        self.sampler.start()
+        self.timer.start(1000)
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.group_combo.setEnabled(False)
+        self.interval_spin.setEnabled(False)
+        logger.info(f"开始主机监控：{len(hosts)} 台主机，间隔 {interval} 秒")
+
+    def stop(self):
+        if self.sampler and not self.sampler.stop_event.is_set():
+            self.sampler.stop()
+            logger.info("主机监控已停止")
+        self.timer.stop()
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.group_combo.setEnabled(True)
+        self.interval_spin.setEnabled(True)
+
+    def refresh(self):
+        if not self.sampler:
+            return
+        for name, row in self.rows.items():
+            series = self.sampler.series[name]
+            values = [
+                format_percent(series.latest("cpu")),
+                format_percent(series.latest("mem")),
+                format_percent(series.latest("disk")),
+                "-" if series.latest("load") is None else f"{series.latest('load'):.2f}",
+                format_rate(series.latest("rx")),
+                format_rate(series.latest("tx")),
+                f"{series.duration * 1000:.0f} ms" if series.updated else "-",
+                series.error or ("正常" if series.updated else "等待采样")
+            ]
+            for col, text in enumerate(values, 1):
+                item = self.table.item(row, col)
+                if item.text() != text:
+                    item.setText(text)
+            self.table.item(row, len(COLUMNS) - 1).setForeground(
+                QColor("#ea4335") if series.error else QColor("#202124"))
+        self.refresh_charts()
+
+    def refresh_charts(self):
+        if not self.sampler:
+            return
+        items = self.table.selectedItems()
+        if not items:
+            return
+        name = self.table.item(items[0].row(), 0).text()
+        series = self.sampler.series.get(name)
+        if not series:
+            return
+        self.chart_title.setText(f"{name} 趋势（最近 {len(series.times)} 次采样）")
+        for metric, chart in self.charts.items():
+            chart.set_values(series.history(metric))
+
+    def done(self, result):
+        """关闭（含 Esc、关闭按钮）时停止采样"""
+        self.stop()
+        super().done(result)
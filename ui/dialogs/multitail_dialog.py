@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
+    QPushButton, QComboBox, QDoubleSpinBox
+)
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QFont
+from utils.ui_util import show_warn
+from utils.logger import logger
+from app.config_manager import config_manager
+from core.inventory import inventory
+from core.multitail import MultiTail
+from ui.widgets.console import ConsoleWidget
+from ui import styles
+
+
+# 多机日志跟踪线程：收取各通道数据并按时间归并
+class MultiTailThread(QThread):
+    lines_received = pyqtSignal(list)
+    finished_signal = pyqtSignal()
+
+    def __init__(self, tail, parent=None):
+        super().__init__(parent)
+        self.tail = tail
+
+    def run(self):
+        try:
+            self.tail.start()
+            while self.tail.running:
+                lines = self.tail.poll(timeout=0.1)
+                if lines:
+                    self.lines_received.emit(lines)
+                if self.tail.is_finished():
+                    break
+        finally:
+            self.finished_signal.emit()
+
+
+class MultiTailDialog(QDialog):
+    """多机日志：在一组主机上跟踪相同路径的日志，按时间顺序合并显示"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("多机日志跟踪")
+        self.resize(1100, 720)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.thread = None
+        self.tail = None
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+
+        row1 = QHBoxLayout()
+        row1.addWidget(QLabel("目标分组："))
+        self.group_combo = QComboBox()
+        self.group_combo.setStyleSheet(styles.INPUT)
+        self.group_combo.setMinimumWidth(180)
+        self.group_combo.addItem("全部主机", "")
+        for group in inventory.groups():
+            self.group_combo.addItem(group, group)
+        row1.addWidget(self.group_combo)
+        row1.addWidget(QLabel("日志路径："))
+        self.paths_edit = QLineEdit("/var/log/nginx/access.log")
+        self.paths_edit.setPlaceholderText("多个路径用空格分隔")
+        self.paths_edit.setStyleSheet(styles.INPUT)
+        row1.addWidget(self.paths_edit, 1)
+        layout.addLayout(row1)
+
+        row2 = QHBoxLayout()
+        row2.addWidget(QLabel("过滤(正则)："))
+        self.pattern_edit = QLineEdit()
+        self.pattern_edit.setPlaceholderText("在服务端用 grep -E 过滤，留空不过滤")
+        self.pattern_edit.setStyleSheet(styles.INPUT)
+        row2.addWidget(self.pattern_edit, 1)
+        row2.addWidget(QLabel("重排窗口(秒)："))
+        self.window_spin = QDoubleSpinBox()
+        self.window_spin.setRange(0.0, 30.0)
+        self.window_spin.setSingleStep(0.5)
+        self.window_spin.setValue(2.0)
+        self.window_spin.setStyleSheet(styles.INPUT)
+        row2.addWidget(self.window_spin)
+
+        self.start_btn = QPushButton("开始跟踪")
+        self.start_btn.setStyleSheet(styles.PRIMARY_BTN)
+        self.start_btn.clicked.connect(self.start)
+        row2.addWidget(self.start_btn)
+        self.stop_btn = QPushButton("停止")
+        self.stop_btn.setStyleSheet(styles.WARN_BTN)
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop)
+        row2.addWidget(self.stop_btn)
+        layout.addLayout(row2)
+
+        self.console = ConsoleWidget(min_height=300)
+        layout.addWidget(self.console, 1)
+
+    def start(self):
+        hosts = inventory.list_hosts(self.group_combo.currentData())
+        paths = self.paths_edit.text().split()
+        if not hosts:
+            show_warn("警告", "目标分组中没有主机，请先在批量执行中编辑主机清单！")
+            return
+        if not paths:
+            show_warn("警告", "请输入日志路径！")
+            return
+
+        self.console.clear()
+        self.tail = MultiTail(hosts, paths, self.pattern_edit.text().strip(), self.window_spin.value())
+        self.thread = MultiTailThread(self.tail, self)
+        self.thread.lines_received.connect(self.console.append_lines)
+        self.thread.finished_signal.connect(self.on_finished)
+        self.thread.start()
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        logger.info(f"开始多机日志跟踪：{len(hosts)} 台主机，{len(paths)} 个文件")
+
+    def stop(self):
+        if self.tail:
+            self.tail.stop()
+        self.stop_btn.setEnabled(False)
+
+    def on_finished(self):
+        self.thread.wait()
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        logger.info("多机日志跟踪已停止")
+
+    def done(self, result):
+        """关闭（含 Esc、关闭按钮）时停止跟踪；不在界面线程等待，跟踪线程随后自行结束"""
+        self.stop()
+        super().done(result)
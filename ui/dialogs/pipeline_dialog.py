@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+import os
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSpinBox, QSplitter,
+    QPlainTextEdit, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QTabWidget
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QFont, QColor
+from utils.ui_util import show_info, show_warn, show_error
+from utils.logger import logger
+from app.config_manager import config_manager
+from app.store import store
+from core.pipeline import PipelineRunner, PipelineError, ResultCache, parse_pipeline, EXAMPLE
+from ui.widgets.console import ConsoleWidget
+from ui import styles
+
+
+STATUS_TEXT = {
+    "waiting": "等待",
+    "running": "执行中",
+    "ok": "成功",
+    "cached": "缓存命中",
+    "failed": "失败",
+    "timeout": "超时",
+    "error": "执行错误",
+    "skipped": "跳过",
+    "cancelled": "已取消"
+}
+STATUS_COLOR = {"ok": "#1e8e3e", "cached": "#1a73e8", "failed": "#d93025", "timeout": "#e37400",
+                "error": "#d93025", "skipped": "#80868b"}
+
+
+# 流水线执行线程
+class PipelineThread(QThread):
+    status_signal = pyqtSignal(str, dict)
+    lines_signal = pyqtSignal(str, list)
+    finished_signal = pyqtSignal()
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+
+    def on_event(self, step_id, event, data):
+        if event == "lines":
+            self.lines_signal.emit(step_id, data)
+        else:
+            self.status_signal.emit(step_id, data)
+
+    def run(self):
+        try:
+            self.runner.run(self.on_event)
+        finally:
+            self.finished_signal.emit()
+
+
+class PipelineDialog(QDialog):
+    """命令流水线：JSON 定义 CMD/PS1/SSH/SQL 步骤及依赖，无依赖关系的步骤并行执行，每步输出到独立的控制台"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("命令流水线")
+        self.resize(1200, 850)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.thread = None
+        self.runner = None
+        self.cache = ResultCache()
+        self.rows = {}  # 步骤id -> 表格行
+        self.consoles = {}  # 步骤id -> ConsoleWidget
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+
+        header = QHBoxLayout()
+        header.addWidget(QLabel("流水线定义（JSON）："))
+        header.addStretch()
+        open_btn = QPushButton("打开")
+        open_btn.setStyleSheet(styles.SECONDARY_BTN)
+        open_btn.clicked.connect(self.open_file)
+        header.addWidget(open_btn)
+        save_btn = QPushButton("另存为")
+        save_btn.setStyleSheet(styles.SECONDARY_BTN)
+        save_btn.clicked.connect(self.save_file)
+        header.addWidget(save_btn)
+        layout.addLayout(header)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.definition_edit = QPlainTextEdit(store.get_settings("pipeline").get("last_definition") or EXAMPLE)
+        self.definition_edit.setStyleSheet(styles.EDITOR)
+        splitter.addWidget(self.definition_edit)
+
+        bottom = QSplitter(Qt.Horizontal)
+        self.step_table = QTableWidget(0, 5)
+        self.step_table.setHorizontalHeaderLabels(["步骤", "类型", "状态", "退出码", "耗时(秒)"])
+        self.step_table.verticalHeader().setVisible(False)
+        self.step_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.step_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.step_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.step_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.step_table.setStyleSheet(styles.TABLE)
+        self.step_table.itemSelectionChanged.connect(self.show_selected_console)
+        bottom.addWidget(self.step_table)
+        self.console_tabs = QTabWidget()
+        bottom.addWidget(self.console_tabs)
+        bottom.setSizes([400, 800])
+        splitter.addWidget(bottom)
+        splitter.setSizes([300, 550])
+        layout.addWidget(splitter)
+
+        params = QHBoxLayout()
+        params.addWidget(QLabel("最大并行数："))
+        self.parallel_spin = QSpinBox()
+        self.parallel_spin.setRange(1, 64)
+        self.parallel_spin.setValue(config_manager.get("pipeline_parallel"))
+        self.parallel_spin.setStyleSheet(styles.INPUT)
+        params.addWidget(self.parallel_spin)
+        self.progress_label = QLabel("")
+        self.progress_label.setStyleSheet("color: #34495e;")
+        params.addWidget(self.progress_label)
+        params.addStretch()
+
+        self.run_btn = QPushButton("执行")
+        self.run_btn.setStyleSheet(styles.PRIMARY_BTN)
+        self.run_btn.clicked.connect(self.start)
+        params.addWidget(self.run_btn)
+        self.stop_btn = QPushButton("停止")
+        self.stop_btn.setStyleSheet(styles.WARN_BTN)
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop)
+        params.addWidget(self.stop_btn)
+        clear_cache_btn = QPushButton("清除缓存")
+        clear_cache_btn.setStyleSheet(styles.SECONDARY_BTN)
+        clear_cache_btn.clicked.connect(self.clear_cache)
+        params.addWidget(clear_cache_btn)
+        layout.addLayout(params)
+
+    # ========== 文件 ==========
+    def open_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "打开流水线", os.path.expanduser("~"), "JSON 文件 (*.json);;所有文件 (*.*)")
+        if not file_path:
+            return
+        try:
+            with open(file_path, "r", encoding="utf-8-sig") as f:
+                self.definition_edit.setPlainText(f.read())
+        except OSError as e:
+            show_error("失败", f"读取文件失败：{str(e)}")
+
+    def save_file(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "保存流水线", os.path.join(os.path.expanduser("~"), "pipeline.json"), "JSON 文件 (*.json)")
+        if not file_path:
+            return
+        try:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(self.definition_edit.toPlainText())
+            show_info("成功", f"流水线已保存到：{file_path}")
+        except OSError as e:
+            show_error("失败", f"保存失败：{str(e)}")
+
+    def clear_cache(self):
+        self.cache.clear()
+        show_info("成功", "步骤结果缓存已清除")
+
+    # ========== 执行 ==========
+    def start(self):
+        text = self.definition_edit.toPlainText()
+        try:
+            steps = parse_pipeline(text)
+        except PipelineError as e:
+            show_warn("警告", str(e))
+            return
+        store.set_setting("pipeline", "last_definition", text)
+        config_manager.set("pipeline_parallel", self.parallel_spin.value())
+
+        self.rows = {}
+        self.consoles = {}
+        self.console_tabs.clear()
+        self.step_table.setRowCount(len(steps))
+        for row, step in enumerate(steps):
+            self.rows[step["id"]] = row
+            values = [step["id"], step["type"].upper(), STATUS_TEXT["waiting"], "", ""]
+            for col, value in enumerate(values):
+                self.step_table.setItem(row, col, QTableWidgetItem(value))
+            console = ConsoleWidget(min_height=200)
+            self.consoles[step["id"]] = console
+            self.console_tabs.addTab(console, step["id"])
+
+        self.runner = PipelineRunner(steps, max_parallel=self.parallel_spin.value(), cache=self.cache)
+        self.thread = PipelineThread(self.runner, self)
+        self.thread.status_signal.connect(self.on_status)
+        self.thread.lines_signal.connect(self.on_lines)
+        self.thread.finished_signal.connect(self.on_finished)
+        self.thread.start()
+        self.run_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.update_progress()
+        logger.info(f"执行流水线：{len(steps)} 个步骤，最大并行数 {self.parallel_spin.value()}")
+
+    def stop(self):
+        if self.runner:
+            self.runner.cancel()
+        self.stop_btn.setEnabled(False)
+
+    def on_status(self, step_id, result):
+        row = self.rows[step_id]
+        status = result["status"]
+        status_item = self.step_table.item(row, 2)
+        status_item.setText(STATUS_TEXT.get(status, status))
+        status_item.setForeground(QColor(STATUS_COLOR.get(status, "#202124")))
+        status_item.setData(Qt.UserRole, status)
+        if status != "running":
+            self.step_table.item(row, 3).setText("" if result["exit_code"] is None else str(result["exit_code"]))
+            self.step_table.item(row, 4).setText(f"{result['duration']:.2f}")
+            if result["error"]:
+                status_item.setToolTip(result["error"])
+            if status == "skipped":
+                self.consoles[step_id].append_line(f"===== 跳过：{result['error']} =====")
+        self.update_progress()
+
+    def on_lines(self, step_id, lines):
+        self.consoles[step_id].append_lines(lines)
+
+    def update_progress(self):
+        statuses = [self.step_table.item(row, 2).data(Qt.UserRole) for row in range(self.step_table.rowCount())]
+        done = sum(1 for s in statuses if s and s != "running")
+        detail = "，".join(f"{STATUS_TEXT[s]} {statuses.count(s)}" for s in STATUS_TEXT if statuses.count(s))
+        self.progress_label.setText(f"完成 {done}/{len(statuses)}    {detail}")
+
+    def show_selected_console(self):
+        row = self.step_table.currentRow()
+        if row >= 0:
+            self.console_tabs.setCurrentIndex(row)
+
+    def on_finished(self):
+        self.thread.wait()
+        self.run_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.update_progress()
+        logger.info(f"流水线执行完成：{self.progress_label.text()}")
+
+    def done(self, result):
+        """关闭（含 Esc、关闭按钮）时停止执行；不在界面线程等待，执行线程随后自行结束"""
+        self.stop()
+        super().done(result)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+from datetime import datetime
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
+    QSlider, QSplitter, QTableWidget, QTableWidgetItem, QHeaderView, QWidget
+)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+from utils.ui_util import show_error
+from app.config_manager import config_manager
+from core.recorder import Recording, list_recordings
+from ui.widgets.console import ConsoleWidget
+from ui import styles
+
+
+SPEEDS = [("1x", 1), ("2x", 2), ("5x", 5), ("10x", 10), ("50x", 50), ("最快", 0)]
+IDLE_LIMIT = 2.0  # 回放时超过该秒数的空闲间隔压缩为该值
+MAX_EVENTS_PER_TICK = 20000
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ReplayDialog(QDialog):
+    """会话录像回放：按索引瞬间定位到任意时间点，支持加速回放"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("会话录像")
+        self.resize(1200, 760)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.recordings = list_recordings()
+        self.recording = None
+        self.events = None
+        self.next_event = None
+        self.vtime = 0.0
+        self.last_tick = 0.0
+        self.init_ui()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    def init_ui(self):
+        layout = QHBoxLayout(self)
+        splitter = QSplitter(Qt.Horizontal)
+
+        self.list_table = QTableWidget(len(self.recordings), 3)
+        self.list_table.setHorizontalHeaderLabels(["开始时间", "主机", "命令"])
+        self.list_table.verticalHeader().setVisible(False)
+        self.list_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.list_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.list_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.list_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.list_table.setStyleSheet(styles.TABLE)
+        for row, (_, header) in enumerate(self.recordings):
+            started = datetime.fromtimestamp(header["started"]).strftime("%Y-%m-%d %H:%M:%S")
+            self.list_table.setItem(row, 0, QTableWidgetItem(started))
+            self.list_table.setItem(row, 1, QTableWidgetItem(f"{header['user']}@{header['host']}"))
+            self.list_table.setItem(row, 2, QTableWidgetItem(header["command"]))
+        self.list_table.itemSelectionChanged.connect(self.open_selected)
+        splitter.addWidget(self.list_table)
+
+        right = QWidget()
+        right_layout = QVBoxLayout(right)
+        right_layout.setContentsMargins(0, 0, 0, 0)
+        controls = QHBoxLayout()
+        self.play_btn = QPushButton("播放")
+        self.play_btn.setStyleSheet(styles.PRIMARY_BTN)
+        self.play_btn.setEnabled(False)
+        self.play_btn.clicked.connect(self.toggle_play)
+        controls.addWidget(self.play_btn)
+        controls.addWidget(QLabel("速度："))
+        self.speed_combo = QComboBox()
+        self.speed_combo.setStyleSheet(styles.INPUT)
+        for text, speed in SPEEDS:
+            self.speed_combo.addItem(text, speed)
+        self.speed_combo.setCurrentIndex(3)
+        controls.addWidget(self.speed_combo)
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setEnabled(False)
+        self.slider.sliderReleased.connect(lambda: self.seek(self.slider.value() / 10))
+        controls.addWidget(self.slider, 1)
+        self.time_label = QLabel("00:00:00 / 00:00:00")
+        controls.addWidget(self.time_label)
+        right_layout.addLayout(controls)
+
+        self.info_label = QLabel("选择左侧录像开始回放")
+        self.info_label.setStyleSheet("color: #7f8c8d;")
+        right_layout.addWidget(self.info_label)
+        self.console = ConsoleWidget(min_height=300)
+        right_layout.addWidget(self.console, 1)
+        splitter.addWidget(right)
+        splitter.setSizes([420, 780])
+        layout.addWidget(splitter)
+
+    def open_selected(self):
+        rows = self.list_table.selectionModel().selectedRows()
+        if not rows:
+            return
+        path = self.recordings[rows[0].row()][0]
+        try:
+            self.recording = Recording(path)
+        except (OSError, ValueError) as e:
+            show_error("错误", f"无法打开录像：{str(e)}")
+            return
+        size = os.path.getsize(self.recording.rec_path) if os.path.exists(self.recording.rec_path) else 0
+        self.info_label.setText(
+            f"{self.recording.header['command']} | {self.recording.event_count} 行 | "
+            f"{len(self.recording.chunks)} 块 | 压缩后 {size / 1048576:.2f} MB")
+        self.slider.setRange(0, int(self.recording.duration * 10))
+        self.slider.setEnabled(True)
+        self.play_btn.setEnabled(True)
+        self.seek(0)
+
+    def seek(self, t):
+        """跳到时间 t：按索引只解压目标块，块内 t 之前的行作为上下文立即显示"""
+        if not self.recording:
+            return
+        self.console.clear()
+        self.events = self.recording.events(t)
+        self.vtime = t
+        context = []
+        self.next_event = next(self.events, None)
+        while self.next_event is not None and self.next_event[0] < t:
+            context.append(self.next_event[2])
+            self.next_event = next(self.events, None)
+        self.console.append_lines(context)
+        self.last_tick = time.monotonic()
+        self.update_position()
+
+    def toggle_play(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.play_btn.setText("播放")
+        else:
+            if self.next_event is None:
+                self.seek(0)
+            self.last_tick = time.monotonic()
+            self.timer.start(33)
+            self.play_btn.setText("暂停")
+
+    def tick(self):
+        now = time.monotonic()
+        speed = self.speed_combo.currentData()
+        if self.next_event is not None:
+            if speed:
+                self.vtime += (now - self.last_tick) * speed
+                # 长时间无输出的间隔压缩，不必空等
+                if self.next_event[0] - self.vtime > IDLE_LIMIT:
+                    self.vtime = self.next_event[0] - IDLE_LIMIT
+            else:
+                self.vtime = float("inf")
+        self.last_tick = now
+
+        lines = []
+        while self.next_event is not None and self.next_event[0] <= self.vtime and len(lines) < MAX_EVENTS_PER_TICK:
+            lines.append(self.next_event[2])
+            self.next_event = next(self.events, None)
+        if lines:
+            self.console.append_lines(lines)
+        if not speed and self.next_event is not None:
+            self.vtime = self.next_event[0]
+        if self.next_event is None:
+            self.vtime = self.recording.duration
+            self.timer.stop()
+            self.play_btn.setText("播放")
+        self.update_position()
+
+    def update_position(self):
+        position = min(self.vtime, self.recording.duration)
+        if not self.slider.isSliderDown():
+            self.slider.setValue(int(position * 10))
+        self.time_label.setText(f"{format_duration(position)} / {format_duration(self.recording.duration)}")
+
+    def done(self, result):
+        """关闭（含 Esc、关闭按钮）时停止播放定时器"""
+        self.timer.stop()
+        super().done(result)
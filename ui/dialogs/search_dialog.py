@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import re
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
+    QCheckBox, QSplitter, QListWidget, QListWidgetItem, QPlainTextEdit, QTextEdit
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QTextCursor, QTextCharFormat, QColor
+from utils.ui_util import show_warn
+from app.config_manager import config_manager
+from ui import styles
+
+
+CONTEXT_LINES = 100  # 跳转时显示匹配行前后各 100 行
+SNIPPET_CHARS = 160
+
+
+class CaptureSearchDialog(QDialog):
+    """在控制台的完整捕获输出中搜索（不受界面行数上限影响），点击结果按偏移只读取附近的行显示"""
+
+    def __init__(self, store, title="搜索输出", parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.matches = []
+        self.setWindowTitle(title)
+        self.resize(1100, 720)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+
+        row = QHBoxLayout()
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("输入要查找的文本，回车搜索")
+        self.query_edit.setStyleSheet(styles.INPUT)
+        self.query_edit.returnPressed.connect(self.search)
+        row.addWidget(self.query_edit, 1)
+        self.regex_check = QCheckBox("正则")
+        row.addWidget(self.regex_check)
+        self.case_check = QCheckBox("区分大小写")
+        row.addWidget(self.case_check)
+        search_btn = QPushButton("搜索")
+        search_btn.setStyleSheet(styles.PRIMARY_BTN)
+        search_btn.clicked.connect(self.search)
+        row.addWidget(search_btn)
+        layout.addLayout(row)
+
+        self.info_label = QLabel(f"已捕获 {self.store.line_count} 行")
+        self.info_label.setStyleSheet("color: #7f8c8d;")
+        layout.addWidget(self.info_label)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.result_list = QListWidget()
+        self.result_list.setStyleSheet("font-family: Consolas, \"Courier New\", monospace;")
+        self.result_list.currentRowChanged.connect(self.show_match)
+        splitter.addWidget(self.result_list)
+        self.context_edit = QPlainTextEdit()
+        self.context_edit.setReadOnly(True)
+        self.context_edit.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.context_edit.setStyleSheet(styles.EDITOR)
+        splitter.addWidget(self.context_edit)
+        splitter.setSizes([260, 460])
+        layout.addWidget(splitter, 1)
+
+    def search(self):
+        query = self.query_edit.text()
+        if not query:
+            return
+        try:
+            self.matches, info = self.store.search(
+                query, regex=self.regex_check.isChecked(), case_sensitive=self.case_check.isChecked(),
+                max_results=config_manager.get("capture_max_results"))
+        except re.error as e:
+            show_warn("提示", f"正则表达式有误：{str(e)}")
+            return
+
+        self.result_list.clear()
+        self.context_edit.clear()
+        for line_no, start, end in self.matches:
+            text = self.store.read_range(line_no, line_no + 1).rstrip("\n")
+            left = max(start - SNIPPET_CHARS // 2, 0)
+            snippet = text[left:left + SNIPPET_CHARS]
+            self.result_list.addItem(QListWidgetItem(f"{line_no + 1:>8}: {snippet}"))
+        more = "（仅显示前面的结果）" if info["truncated"] else ""
+        self.info_label.setText(
+            f"共 {self.store.line_count} 行，匹配 {len(self.matches)} 处{more} | "
+            f"耗时 {info['elapsed_ms']:.1f} ms，扫描 {info['scanned_blocks']}/{info['total_blocks']} 块")
+        if self.matches:
+            self.result_list.setCurrentRow(0)
+
+    def show_match(self, row):
+        """只读取匹配行附近的行，高亮匹配位置并居中"""
+        if row < 0 or row >= len(self.matches):
+            return
+        line_no, start, end = self.matches[row]
+        first = max(line_no - CONTEXT_LINES, 0)
+        lines = self.store.read_lines(first, line_no + CONTEXT_LINES + 1)
+        width = len(str(first + len(lines)))
+        prefix = width + 2
+        self.context_edit.setPlainText("\n".join(f"{first + i + 1:>{width}}  {line}" for i, line in enumerate(lines)))
+
+        block = self.context_edit.document().findBlockByNumber(line_no - first)
+        line_selection = QTextEdit.ExtraSelection()
+        line_selection.format.setBackground(QColor("#fff8c5"))
+        line_selection.format.setProperty(QTextCharFormat.FullWidthSelection, True)
+        line_selection.cursor = QTextCursor(block)
+        match_selection = QTextEdit.ExtraSelection()
+        match_selection.format.setBackground(QColor("#f9ab00"))
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + prefix + start)
+        cursor.setPosition(block.position() + prefix + end, QTextCursor.KeepAnchor)
+        match_selection.cursor = cursor
+        self.context_edit.setExtraSelections([line_selection, match_selection])
+        self.context_edit.setTextCursor(QTextCursor(block))
+        self.context_edit.centerCursor()
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+import os
+import posixpath
+import stat
+import time
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QWidget,
+    QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QFileDialog, QSplitter
+)
+from PyQt5.QtCore import Qt, QTimer, QThread, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QFont, QColor
+from utils.ui_util import show_warn, ask_confirm
+from utils.logger import logger
+from app.config_manager import config_manager
+from core.sftp import TransferQueue, STATUS_TEXT
+from core.remote_fs import RemoteFS, is_dir
+from ui import styles
+
+
+COLUMNS = ["编号", "方向", "本地文件", "远端文件", "大小", "进度", "速度", "状态"]
+
+
+def format_size(value):
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+# 远程文件操作线程：列目录、加载下一页、删除等网络请求不占用界面线程
+class RemoteTaskThread(QThread):
+    result_signal = pyqtSignal(object)
+    error_signal = pyqtSignal(str)
+
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        try:
+            self.result_signal.emit(self.func())
+        except Exception as e:
+            self.error_signal.emit(str(e) or e.__class__.__name__)
+
+
+class RemoteDirModel(QAbstractTableModel):
+    """远程目录列表模型：滚动到底部时通过 canFetchMore/fetchMore 请求下一页"""
+
+    more_requested = pyqtSignal()
+    HEADERS = ["名称", "大小", "修改时间", "权限"]
+
+    def __init__(self):
+        super().__init__()
+        self.listing = None
+        self.rows = []
+        self.loading = False
+
+    def set_listing(self, listing):
+        self.beginResetModel()
+        self.listing = listing
+        self.rows = list(listing.entries)
+        self.loading = False
+        self.endResetModel()
+
+    def append_entries(self, entries):
+        self.loading = False
+        if not entries:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(entries) - 1)
+        self.rows.extend(entries)
+        self.endInsertRows()
+
+    def entry(self, row):
+        return self.rows[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        attrs = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == 0:
+                return attrs.filename + ("/" if is_dir(attrs) else "")
+            if column == 1:
+                return "" if is_dir(attrs) else format_size(attrs.st_size or 0)
+            if column == 2:
+                return time.strftime("%Y-%m-%d %H:%M", time.localtime(attrs.st_mtime or 0))
+            return stat.filemode(attrs.st_mode or 0)
+        if role == Qt.ForegroundRole and is_dir(attrs):
+            return QColor("#1a73e8")
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return bool(self.listing) and not self.listing.complete and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        self.loading = True
+        self.more_requested.emit()
+
+
+class SFTPDialog(QDialog):
+    """文件传输：远程目录浏览 + 上传/下载队列，显示每个任务的进度与 MB/s（关闭窗口不影响后台传输）"""
+
+    def __init__(self, session, parent=None):
+        super().__init__(parent)
+        self.session = session
+        host, port, user = session.key
+        self.setWindowTitle(f"文件传输 - {user}@{host}:{port}")
+        self.resize(1100, 760)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.queue = TransferQueue(
+            session,
+            parallel_files=config_manager.get("sftp_parallel_files"),
+            range_threads=config_manager.get("sftp_range_threads"),
+            min_range_mb=config_manager.get("sftp_range_min_mb"),
+            window=config_manager.get("sftp_window")
+        )
+        self.samples = {}  # 任务编号 -> (已传字节, 时间)，用于计算瞬时速度
+        self.finished_uploads = set()  # 已处理过缓存失效的上传任务
+        self.fs = None
+        self.current_path = None
+        self.task_thread = None
+        self.pending_task = None
+        self.init_ui()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+        self.navigate(".")
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+
+        # 远程目录浏览
+        path_layout = QHBoxLayout()
+        up_btn = QPushButton("上级目录")
+        up_btn.setStyleSheet(styles.SECONDARY_BTN)
+        up_btn.clicked.connect(self.go_up)
+        path_layout.addWidget(up_btn)
+        self.path_edit = QLineEdit(".")
+        self.path_edit.setPlaceholderText("远端目录（回车跳转，相对路径以登录用户主目录为起点）")
+        self.path_edit.setStyleSheet(styles.INPUT)
+        self.path_edit.returnPressed.connect(lambda: self.navigate(self.path_edit.text().strip()))
+        path_layout.addWidget(self.path_edit, 1)
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.setStyleSheet(styles.SECONDARY_BTN)
+        refresh_btn.clicked.connect(self.reload)
+        path_layout.addWidget(refresh_btn)
+        layout.addLayout(path_layout)
+
+        splitter = QSplitter(Qt.Vertical)
+        browser = QWidget()
+        browser_layout = QVBoxLayout(browser)
+        browser_layout.setContentsMargins(0, 0, 0, 0)
+        self.dir_model = RemoteDirModel()
+        self.dir_model.more_requested.connect(self.load_more)
+        self.dir_view = QTableView()
+        self.dir_view.setModel(self.dir_model)
+        self.dir_view.verticalHeader().setVisible(False)
+        self.dir_view.setSelectionBehavior(QTableView.SelectRows)
+        self.dir_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.dir_view.setStyleSheet(styles.TABLE)
+        self.dir_view.doubleClicked.connect(self.open_entry)
+        browser_layout.addWidget(self.dir_view, 1)
+
+        browser_btns = QHBoxLayout()
+        self.browser_label = QLabel("")
+        self.browser_label.setStyleSheet("color: #7f8c8d;")
+        browser_btns.addWidget(self.browser_label)
+        browser_btns.addStretch()
+        upload_btn = QPushButton("上传到此目录...")
+        upload_btn.setStyleSheet(styles.PRIMARY_BTN)
+        upload_btn.clicked.connect(self.upload_files)
+        browser_btns.addWidget(upload_btn)
+        download_btn = QPushButton("下载选中到...")
+        download_btn.setStyleSheet(styles.PRIMARY_BTN)
+        download_btn.clicked.connect(self.download_files)
+        browser_btns.addWidget(download_btn)
+        delete_btn = QPushButton("删除选中")
+        delete_btn.setStyleSheet(styles.WARN_BTN)
+        delete_btn.clicked.connect(self.delete_selected)
+        browser_btns.addWidget(delete_btn)
+        browser_layout.addLayout(browser_btns)
+        splitter.addWidget(browser)
+
+        transfers = QWidget()
+        transfers_layout = QVBoxLayout(transfers)
+        transfers_layout.setContentsMargins(0, 0, 0, 0)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.table.setStyleSheet(styles.TABLE)
+        transfers_layout.addWidget(self.table, 1)
+
+        btn_layout = QHBoxLayout()
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet("color: #34495e;")
+        btn_layout.addWidget(self.summary_label)
+        btn_layout.addStretch()
+        cancel_btn = QPushButton("取消选中")
+        cancel_btn.setStyleSheet(styles.WARN_BTN)
+        cancel_btn.clicked.connect(self.cancel_selected)
+        btn_layout.addWidget(cancel_btn)
+        retry_btn = QPushButton("续传选中")
+        retry_btn.setStyleSheet(styles.SECONDARY_BTN)
+        retry_btn.clicked.connect(self.retry_selected)
+        btn_layout.addWidget(retry_btn)
+        clear_btn = QPushButton("清除已完成")
+        clear_btn.setStyleSheet(styles.SECONDARY_BTN)
+        clear_btn.clicked.connect(self.clear_finished)
+        btn_layout.addWidget(clear_btn)
+        transfers_layout.addLayout(btn_layout)
+        splitter.addWidget(transfers)
+        splitter.setSizes([420, 260])
+        layout.addWidget(splitter, 1)
+
+    # ========== 远程目录 ==========
+    def run_task(self, func, on_result):
+        """同一时间只执行一个远程操作（前台 SFTP 通道不并发使用）；忙时只保留最后一个待执行操作"""
+        if self.task_thread and not self.task_thread.isFinished():
+            self.pending_task = (func, on_result)
+            return
+        self.task_thread = RemoteTaskThread(func)
+        self.task_thread.result_signal.connect(on_result)
+        self.task_thread.error_signal.connect(self.on_task_error)
+        self.task_thread.finished.connect(self.run_pending_task)
+        self.task_thread.start()
+
+    def run_pending_task(self):
+        if self.pending_task:
+            func, on_result = self.pending_task
+            self.pending_task = None
+            self.run_task(func, on_result)
+
+    def on_task_error(self, msg):
+        self.dir_model.loading = False
+        self.browser_label.setText(f"操作失败：{msg}")
+        logger.error(f"远程文件操作失败：{msg}")
+
+    def ensure_fs(self):
+        if self.fs is None:
+            self.fs = RemoteFS(
+                self.session,
+                ttl=config_manager.get("sftp_listing_ttl"),
+                page_size=config_manager.get("sftp_page_size")
+            )
+        return self.fs
+
+    def navigate(self, path):
+        """进入目录：缓存命中时直接显示，否则后台读取首页"""
+        if self.fs and path.startswith("/"):
+            listing = self.fs.cached(path)
+            if listing:
+                self.show_listing(self.fs.list_dir(path))
+                return
+        self.browser_label.setText("加载中...")
+
+        def load():
+            fs = self.ensure_fs()
+            return fs.list_dir(fs.normalize(path))
+
+        self.run_task(load, self.show_listing)
+
+    def show_listing(self, listing):
+        self.current_path = listing.path
+        self.path_edit.setText(listing.path)
+        self.dir_model.set_listing(listing)
+        self.update_browser_label()
+
+    def update_browser_label(self):
+        listing = self.dir_model.listing
+        if not listing:
+            return
+        count = len(self.dir_model.rows)
+        more = "" if listing.complete else "+（滚动加载更多，按服务器顺序）"
+        self.browser_label.setText(
+            f"{count}{more} 项 | 缓存命中 {self.fs.hits} / 未命中 {self.fs.misses}")
+
+    def load_more(self):
+        listing = self.dir_model.listing
+        self.run_task(lambda: self.fs.load_more(listing), self.on_more_loaded)
+
+    def on_more_loaded(self, entries):
+        if self.dir_model.listing is None or not self.dir_model.loading:
+            return
+        self.dir_model.append_entries(entries)
+        self.update_browser_label()
+
+    def reload(self):
+        if self.current_path:
+            self.fs.invalidate(self.current_path)
+            self.navigate(self.current_path)
+        else:
+            self.navigate(self.path_edit.text().strip())
+
+    def go_up(self):
+        if self.current_path:
+            self.navigate(posixpath.dirname(self.current_path.rstrip("/")) or "/")
+
+    def open_entry(self, index):
+        attrs = self.dir_model.entry(index.row())
+        if is_dir(attrs):
+            self.navigate(posixpath.join(self.current_path, attrs.filename))
+
+    def selected_entries(self):
+        rows = sorted({index.row() for index in self.dir_view.selectionModel().selectedRows()})
+        return [self.dir_model.entry(row) for row in rows]
+
+    def delete_selected(self):
+        entries = self.selected_entries()
+        if not entries:
+            show_warn("警告", "请先选择要删除的文件！")
+            return
+        if not ask_confirm("确认", f"确定删除选中的 {len(entries)} 项吗？（目录需为空）"):
+            return
+        path = self.current_path
+
+        def remove():
+            for attrs in entries:
+                self.fs.remove(posixpath.join(path, attrs.filename), attrs)
+            return path
+
+        self.run_task(remove, self.navigate)
+
+    # ========== 提交任务 ==========
+    def upload_files(self):
+        if not self.current_path:
+            show_warn("警告", "远程目录尚未加载！")
+            return
+        paths, _ = QFileDialog.getOpenFileNames(self, "选择要上传的文件")
+        remote_dir = self.current_path
+        for path in paths:
+            self.queue.submit("upload", path, posixpath.join(remote_dir, os.path.basename(path)))
+        if paths:
+            logger.info(f"SFTP上传排队：{len(paths)} 个文件 -> {remote_dir}")
+            self.refresh()
+
+    def download_files(self):
+        remote_files = [posixpath.join(self.current_path, a.filename)
+                        for a in self.selected_entries() if not is_dir(a)]
+        if not remote_files:
+            show_warn("警告", "请先在远程目录中选择要下载的文件！")
+            return
+        local_dir = QFileDialog.getExistingDirectory(self, "选择保存目录")
+        if not local_dir:
+            return
+        self.queue_downloads(remote_files, local_dir)
+
+    def queue_downloads(self, remote_files, local_dir):
+        for remote in remote_files:
+            self.queue.submit("download", os.path.join(local_dir, posixpath.basename(remote)), remote)
+        logger.info(f"SFTP下载排队：{len(remote_files)} 个文件 -> {local_dir}")
+        self.refresh()
+
+    def selected_jobs(self):
+        rows = sorted({item.row() for item in self.table.selectedItems()})
+        jobs = list(self.queue.jobs)
+        return [jobs[row] for row in rows if row < len(jobs)]
+
+    def cancel_selected(self):
+        for job in self.selected_jobs():
+            self.queue.cancel(job)
+
+    def retry_selected(self):
+        for job in self.selected_jobs():
+            if job.status in ("failed", "cancelled"):
+                self.queue.retry(job)
+        self.refresh()
+
+    def clear_finished(self):
+        with self.queue.lock:
+            self.queue.jobs = [j for j in self.queue.jobs if j.status != "done"]
+        self.refresh()
+
+    # ========== 刷新 ==========
+    def job_speed(self, job):
+        """瞬时速度：与上次刷新时的进度相减；结束的任务显示平均速度"""
+        now = time.monotonic()
+        last_done, last_time = self.samples.get(job.id, (job.done, now))
+        self.samples[job.id] = (job.done, now)
+        if job.status != "running":
+            return job.average_speed() if job.status == "done" else 0.0
+        elapsed = now - last_time
+        return (job.done - last_done) / elapsed if elapsed > 0 else 0.0
+
+    def invalidate_uploads(self, jobs):
+        """上传完成后使目标目录缓存失效，当前目录则重新加载"""
+        for job in jobs:
+            if job.direction != "upload" or job.status != "done" or job.id in self.finished_uploads:
+                continue
+            self.finished_uploads.add(job.id)
+            if self.fs:
+                self.fs.invalidate_file(job.remote_path)
+                if posixpath.dirname(job.remote_path) == self.current_path:
+                    self.navigate(self.current_path)
+
+    def refresh(self):
+        jobs = list(self.queue.jobs)
+        self.invalidate_uploads(jobs)
+        self.table.setRowCount(len(jobs))
+        total_speed = 0.0
+        active = 0
+        for row, job in enumerate(jobs):
+            speed = self.job_speed(job)
+            if job.status in ("running", "verifying"):
+                active += 1
+                total_speed += speed
+            percent = job.done * 100 / job.size if job.size else (100 if job.status == "done" else 0)
+            status = STATUS_TEXT[job.status]
+            if job.status == "done":
+                status += "（已校验）" if job.verified else "（未校验）"
+            elif job.status == "failed":
+                status += f"：{job.error}"
+            elif job.status == "running" and job.ranges > 1:
+                status += f"（{job.ranges} 段并发）"
+            values = [
+                str(job.id),
+                "上传" if job.direction == "upload" else "下载",
+                job.local_path,
+                job.remote_path,
+                format_size(job.size) if job.size else "-",
+                f"{percent:.1f}%",
+                f"{speed / 1048576:.1f} MB/s" if speed else "-",
+                status
+            ]
+            for col, text in enumerate(values):
+                item = self.table.item(row, col)
+                if item is None:
+                    self.table.setItem(row, col, QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+        self.summary_label.setText(
+            f"共 {len(jobs)} 个任务，进行中 {active} 个，总速度 {total_speed / 1048576:.1f} MB/s")
+
+    def shutdown(self):
+        self.timer.stop()
+        self.queue.shutdown()
+        self.pending_task = None
+        if self.task_thread:
+            self.task_thread.wait()
+        if self.fs:
+            self.fs.close()
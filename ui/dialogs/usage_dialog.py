@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from utils.ui_util import show_info
+from app.config_manager import config_manager
+from core.usage import usage_history, format_bytes
+from ui import styles
+
+
+COLUMNS = [
+    ("时间", "time"), ("命令", "command"), ("退出码", "exit_code"), ("耗时(秒)", "wall"),
+    ("用户CPU(秒)", "user"), ("系统CPU(秒)", "system"), ("峰值内存", "peak_rss"),
+    ("读", "read_bytes"), ("写", "write_bytes"), ("自愿切换", "voluntary_switches"),
+    ("非自愿切换", "involuntary_switches"), ("进程数", "processes")
+]
+BYTE_FIELDS = ("peak_rss", "read_bytes", "write_bytes")
+SECOND_FIELDS = ("wall", "user", "system")
+
+
+class SortItem(QTableWidgetItem):
+    """按原始数值排序（显示文本为格式化后的值）"""
+
+    def __lt__(self, other):
+        a, b = self.data(Qt.UserRole), other.data(Qt.UserRole)
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            return a < b
+        return super().__lt__(other)
+
+
+class UsageHistoryDialog(QDialog):
+    """CMD 命令资源占用历史：按命令筛选，点击表头排序，便于对比多次执行"""
+
+    def __init__(self, command="", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("资源占用记录")
+        self.resize(1300, 700)
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.init_ui(command)
+        self.load()
+
+    def init_ui(self, command):
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(QLabel("命令筛选："))
+        self.filter_edit = QLineEdit(command)
+        self.filter_edit.setPlaceholderText("包含该文本的命令")
+        self.filter_edit.setStyleSheet(styles.INPUT)
+        self.filter_edit.textChanged.connect(self.load)
+        toolbar.addWidget(self.filter_edit, 1)
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.setStyleSheet(styles.SECONDARY_BTN)
+        refresh_btn.clicked.connect(self.load)
+        toolbar.addWidget(refresh_btn)
+        clear_btn = QPushButton("清空记录")
+        clear_btn.setStyleSheet(styles.WARN_BTN)
+        clear_btn.clicked.connect(self.clear)
+        toolbar.addWidget(clear_btn)
+        layout.addLayout(toolbar)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _ in COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.setStyleSheet(styles.TABLE)
+        layout.addWidget(self.table)
+
+        self.count_label = QLabel("")
+        self.count_label.setStyleSheet("color: #34495e;")
+        layout.addWidget(self.count_label)
+
+    def load(self):
+        keyword = self.filter_edit.text().strip()
+        records = [r for r in usage_history.list_records() if keyword in r["command"]]
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(records))
+        for row, record in enumerate(records):
+            for col, (_, field) in enumerate(COLUMNS):
+                value = record.get(field)
+                if value is None:
+                    text = "-"
+                elif field in BYTE_FIELDS:
+                    text = format_bytes(value)
+                elif field in SECOND_FIELDS:
+                    text = f"{value:.2f}"
+                else:
+                    text = str(value)
+                item = SortItem(text.replace("\n", " ↵ ") if field == "command" else text)
+                item.setData(Qt.UserRole, value)
+                if field == "command":
+                    item.setToolTip(value)
+                self.table.setItem(row, col, item)
+        self.table.setSortingEnabled(True)
+        self.count_label.setText(f"共 {len(records)} 条记录")
+
+    def clear(self):
+        usage_history.clear()
+        self.load()
+        show_info("成功", "资源占用记录已清空")
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
+import sys
 from PyQt5.QtWidgets import QMainWindow, QTabWidget, QWidget, QLabel, QVBoxLayout, QScrollArea
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont  # 补全缺失的导入！
 from app.signals import signals
+from app.config_manager import config_manager
 
 # 延迟导入页面（避免初始化卡顿）
 def lazy_import_page_my():
@@ -25,6 +27,10 @@ def lazy_import_page_ps1():
     from ui.pages.page_ps1 import PS1Page
     return PS1Page()
 
+def lazy_import_page_scheduler():
+    from ui.pages.page_scheduler import SchedulerPage
+    return SchedulerPage()
+
 def lazy_import_page_settings():
     from ui.pages.page_settings import SettingsPage
     return SettingsPage()
@@ -34,8 +40,16 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("Python多功能工具")
         self.setMinimumSize(1000, 700)  # 最小窗口尺寸，避免缩太小
+        self.scheduler = None
         self.init_ui()
         self.bind_signals()
+        # 定时任务在后台调度，不依赖是否打开过定时任务页面；窗口显示后再导入启动（调度模块会带入流水线、SSH、数据库等模块）
+        QTimer.singleShot(0, self.start_scheduler)
+
+    def start_scheduler(self):
+        from core.scheduler import scheduler
+        self.scheduler = scheduler
+        scheduler.start(config_manager.get("scheduler_workers"))
 
     def init_ui(self):
         # 创建标签页容器
@@ -48,6 +62,7 @@ class MainWindow(QMainWindow):
         self.tab_widget.addTab(self.create_placeholder("SSH操作"), "SSH操作")
         self.tab_widget.addTab(self.create_placeholder("CMD操作"), "CMD操作")
         self.tab_widget.addTab(self.create_placeholder("PS1操作"), "PS1操作")
+        self.tab_widget.addTab(self.create_placeholder("定时任务"), "定时任务")
         self.tab_widget.addTab(self.create_placeholder("设置"), "设置")
 
         # 绑定标签页切换事件
@@ -94,10 +109,32 @@ class MainWindow(QMainWindow):
             self.tab_widget.insertTab(index, lazy_import_page_ps1(), "PS1操作")
             self.tab_widget.setCurrentIndex(index)
 
+        elif tab_text == "定时任务" and "SchedulerPage" not in str(type(current_widget)):
+            self.tab_widget.removeTab(index)
+            self.tab_widget.insertTab(index, lazy_import_page_scheduler(), "定时任务")
+            self.tab_widget.setCurrentIndex(index)
+
         elif tab_text == "设置" and "SettingsPage" not in str(type(current_widget)):
             self.tab_widget.removeTab(index)
             self.tab_widget.insertTab(index, lazy_import_page_settings(), "设置")
             self.tab_widget.setCurrentIndex(index)
 
     def bind_signals(self):
-        signals.logout.connect(self.close)
\ No newline at end of file
+        signals.logout.connect(self.close)
+
+    def closeEvent(self, event):
+        if self.scheduler:
+            self.scheduler.shutdown()
+        # 只清理已经用到的模块（未打开过的页面不为退出而导入）
+        profile = sys.modules.get("core.profile")
+        if profile:
+            profile.profile_prober.stop()
+        ssh = sys.modules.get("core.ssh")
+        if ssh:
+            ssh.ssh_sessions.close_all()
+        for index in range(self.tab_widget.count()):
+            page = self.tab_widget.widget(index)
+            if hasattr(page, "close_session"):
+                page.close_session()
+        config_manager.flush_stats()
+        super().closeEvent(event)
\ No newline at end of file
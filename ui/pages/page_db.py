@@ -5,14 +5,36 @@ from PyQt5.QtWidgets import (
     QTextBrowser, QComboBox, QSplitter, QFrame,
     QSizePolicy, QListWidget  # 补全QListWidget导入，移除未使用的导入
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 from utils.ui_util import show_info, show_warn, show_error
 from utils.logger import logger
 from app.config_manager import config_manager
+from core.profile import profile_manager, profile_prober
+from core.db import DBManager
+from core.net import format_phases
 import pymysql
 
 
+# 连接测试线程（分阶段计时，避免阻塞界面）
+class DBTestThread(QThread):
+    result_signal = pyqtSignal(bool, str, dict)
+
+    def __init__(self, host, port, user, pwd, dbname):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.user = user
+        self.pwd = pwd
+        self.dbname = dbname
+
+    def run(self):
+        success, msg, phases = DBManager.test_conn_timed(
+            self.host, self.port, self.user, self.pwd, self.dbname, timeout=5
+        )
+        self.result_signal.emit(success, msg, phases)
+
+
 # SQL执行线程（修复信号发射方式）
 class SQLThread(QThread):
     result_signal = pyqtSignal(bool, str)
@@ -29,15 +51,18 @@ class SQLThread(QThread):
 
     def run(self):
         try:
-            conn = pymysql.connect(
-                host=self.host,
-                port=int(self.port),
-                user=self.user,
-                password=self.pwd,
-                database=self.dbname,
-                charset='utf8mb4',
-                connect_timeout=config_manager.get("sql_timeout")
-            )
+            # 优先使用后台探测器保持的预热连接，省去握手与认证
+            conn = profile_prober.take_warm_connection(self.host, self.port, self.user, self.pwd, self.dbname)
+            if conn is None:
+                conn = pymysql.connect(
+                    host=self.host,
+                    port=int(self.port),
+                    user=self.user,
+                    password=self.pwd,
+                    database=self.dbname,
+                    charset='utf8mb4',
+                    connect_timeout=config_manager.get("sql_timeout")
+                )
             cursor = conn.cursor()
 
             # 统计连接次数
@@ -78,9 +103,16 @@ class DBPage(QWidget):
     def __init__(self):
         super().__init__()
         self.sql_thread = None
+        self.test_thread = None
         self.init_ui()
         # 设置全局字体
         self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        # 启动后台探测，并定时按健康状态/延迟刷新配置列表
+        profile_prober.start()
+        self.load_profiles()
+        self.profile_timer = QTimer(self)
+        self.profile_timer.timeout.connect(self.load_profiles)
+        self.profile_timer.start(2000)
 
     def init_ui(self):
         # 全局自适应
@@ -159,6 +191,27 @@ class DBPage(QWidget):
         sub_title.setStyleSheet("color: #34495e; margin-bottom: 10px;")
         layout.addWidget(sub_title)
 
+        # 已保存的连接配置（按健康状态和延迟排序）
+        profile_layout = QHBoxLayout()
+        profile_layout.setSpacing(10)
+        profile_layout.addWidget(self.create_label("已保存"))
+        self.profile_combo = QComboBox()
+        self.profile_combo.setStyleSheet(self.combo_style())
+        self.profile_combo.setMinimumWidth(300)
+        self.profile_combo.activated.connect(self.select_profile)
+        profile_layout.addWidget(self.profile_combo, 1)
+
+        save_profile_btn = QPushButton("保存配置")
+        save_profile_btn.setStyleSheet(self.secondary_btn_style())
+        save_profile_btn.clicked.connect(self.save_profile)
+        profile_layout.addWidget(save_profile_btn)
+
+        del_profile_btn = QPushButton("删除配置")
+        del_profile_btn.setStyleSheet(self.secondary_btn_style())
+        del_profile_btn.clicked.connect(self.delete_profile)
+        profile_layout.addWidget(del_profile_btn)
+        layout.addLayout(profile_layout)
+
         # 表单布局
         form_layout = QFormLayout()
         form_layout.setSpacing(12)
@@ -242,8 +295,8 @@ class DBPage(QWidget):
         btn_layout.addWidget(local_btn)
 
         # 测试连接按钮（成功色）
-        test_btn = QPushButton("测试连接")
-        test_btn.setStyleSheet("""
+        self.test_btn = QPushButton("测试连接")
+        self.test_btn.setStyleSheet("""
             QPushButton {
                 background-color: #34a853;
                 color: white;
@@ -265,8 +318,8 @@ class DBPage(QWidget):
                 box-shadow: 0 1px 3px rgba(52, 168, 83, 0.3);
             }
         """)
-        test_btn.clicked.connect(self.test_connection)
-        btn_layout.addWidget(test_btn)
+        self.test_btn.clicked.connect(self.test_connection)
+        btn_layout.addWidget(self.test_btn)
 
         btn_layout.addStretch()
         layout.addLayout(btn_layout)
@@ -525,6 +578,82 @@ class DBPage(QWidget):
         self.pwd_edit.setText("root")
         show_info("提示", "已填充本地MySQL连接信息（默认密码root）！")
 
+    def load_profiles(self):
+        """刷新连接配置下拉框（保持当前选中项）
+
+        配置列表未变或下拉列表正展开时只原地更新健康标记，不清空重建，避免打断正在进行的选择。
+        """
+        combo = self.profile_combo
+        profiles = profile_prober.ranked_profiles()
+        texts = {p["name"]: self.profile_text(p) for p in profiles}
+        shown = [combo.itemData(i) for i in range(1, combo.count())]
+        if combo.view().isVisible() or shown == list(texts):
+            for i, name in enumerate(shown, start=1):
+                if name in texts and combo.itemText(i) != texts[name]:
+                    combo.setItemText(i, texts[name])
+            return
+        current = combo.currentData()
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem("选择连接配置", None)
+        for name, text in texts.items():
+            combo.addItem(text, name)
+        index = combo.findData(current)
+        combo.setCurrentIndex(max(index, 0))
+        combo.blockSignals(False)
+
+    @staticmethod
+    def profile_text(p):
+        status = p["status"]
+        if status["health"] == "ok":
+            mark = f"● {status['latency']:.0f} ms"
+        elif status["health"] == "down":
+            mark = "○ 不可达"
+        else:
+            mark = "◌ 检测中"
+        return f"{p['name']}  ({p['user']}@{p['host']}:{p['port']})  {mark}"
+
+    def select_profile(self, index):
+        """选择配置后填充连接信息"""
+        name = self.profile_combo.itemData(index)
+        profile = profile_manager.get_profile(name) if name else None
+        if not profile:
+            return
+        self.host_edit.setText(profile["host"])
+        self.port_edit.setText(str(profile["port"]))
+        self.user_edit.setText(profile["user"])
+        self.pwd_edit.setText(profile["password"])
+        self.dbname_edit.setText(profile["dbname"])
+        # 记为最近使用，下轮探测时为其保持预热连接
+        profile_manager.touch(name)
+        profile_prober.probe_now()
+        logger.info(f"加载数据库连接配置：{name}")
+
+    def save_profile(self):
+        """把当前连接信息保存为配置（名称默认 user@host:port/db）"""
+        host = self.host_edit.text().strip()
+        port = self.port_edit.text().strip()
+        user = self.user_edit.text().strip()
+        dbname = self.dbname_edit.text().strip()
+        if not host or not port.isdigit() or not user:
+            show_warn("警告", "主机/端口/用户名不能为空！")
+            return
+        name = f"{user}@{host}:{port}" + (f"/{dbname}" if dbname else "")
+        profile_manager.save_profile(name, host, port, user, self.pwd_edit.text().strip(), dbname)
+        profile_prober.probe_now()
+        self.load_profiles()
+        self.profile_combo.setCurrentIndex(max(self.profile_combo.findData(name), 0))
+        show_info("成功", f"连接配置已保存：{name}")
+
+    def delete_profile(self):
+        name = self.profile_combo.currentData()
+        if not name:
+            show_warn("警告", "请先选择要删除的连接配置！")
+            return
+        profile_manager.delete_profile(name)
+        self.load_profiles()
+        show_info("成功", f"连接配置已删除：{name}")
+
     def load_sql_template(self, text):
         if text != "选择SQL模板":
             self.sql_edit.setText(text)
@@ -558,22 +687,29 @@ class DBPage(QWidget):
             show_warn("警告", "主机/端口/用户名不能为空！")
             return
 
-        try:
-            conn = pymysql.connect(
-                host=host,
-                port=int(port),
-                user=user,
-                password=pwd,
-                database=dbname if dbname else None,
-                connect_timeout=5
-            )
-            conn.close()
-            show_info("成功", "数据库连接成功！")
+        if not port.isdigit():
+            show_warn("警告", "端口必须是数字！")
+            return
+
+        self.test_btn.setEnabled(False)
+        self.test_btn.setText("测试中...")
+        self.test_thread = DBTestThread(host, port, user, pwd, dbname)
+        self.test_thread.result_signal.connect(
+            lambda success, msg, phases: self.on_test_finished(host, port, success, msg, phases))
+        self.test_thread.start()
+
+    def on_test_finished(self, host, port, success, msg, phases):
+        """连接测试完成：展示各阶段耗时"""
+        self.test_btn.setEnabled(True)
+        self.test_btn.setText("测试连接")
+        timing = format_phases(phases)
+        if success:
+            show_info("成功", f"{msg}\n\n{timing}")
             config_manager.increment_stat("db_connections")
-            logger.info(f"数据库连接成功：{host}:{port}")
-        except Exception as e:
-            show_error("失败", f"数据库连接失败：{str(e)}")
-            logger.error(f"数据库连接失败：{str(e)}")
+            logger.info(f"数据库连接成功：{host}:{port} {phases}")
+        else:
+            show_error("失败", f"数据库连接失败：{msg}\n\n{timing}")
+            logger.error(f"数据库连接失败：{msg} {phases}")
 
     def execute_sql(self):
         host = self.host_edit.text().strip()
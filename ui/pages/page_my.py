@@ -54,9 +54,6 @@ class MyPage(QWidget):
         content_layout.setSpacing(20)
         content_layout.setSizeConstraint(QGridLayout.SetMinAndMaxSize)
 
-        # ========== 强制刷新统计数据 ==========
-        config_manager.load_stats()
-
         # ========== 统计卡片 ==========
         # 1. 数据库统计卡片
         db_card = self.create_stat_card(
@@ -93,7 +90,8 @@ class MyPage(QWidget):
                 ("PS1脚本数", config_manager.get_stat("ps1_script_count")),
                 ("总计脚本数",
                  config_manager.get_stat("cmd_script_count") + config_manager.get_stat("ps1_script_count")),
-                ("最后更新时间", config_manager.stats.get("last_update", "暂无"))
+                ("最后更新时间", config_manager.stats.get("last_update", "暂无")),
+                ("合并省去的写盘", config_manager.stats_avoided_writes)
             ],
             "#34a853"
         )
@@ -191,8 +189,7 @@ class MyPage(QWidget):
 
     def reset_stats(self):
         """重置统计数据"""
-        config_manager.stats = config_manager.default_stats
-        config_manager.save_stats()
+        config_manager.reset_stats()
         show_info("成功", "所有统计数据已重置！")
         # 强制刷新页面
         self.init_ui()
\ No newline at end of file
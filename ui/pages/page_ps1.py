@@ -2,60 +2,57 @@
 from PyQt5.QtWidgets import (
     QWidget, QFormLayout, QLineEdit, QPushButton,
     QHBoxLayout, QVBoxLayout, QLabel, QTextEdit,
-    QTextBrowser, QComboBox, QSplitter, QFrame,
-    QScrollArea, QSizePolicy, QFileDialog
+    QComboBox, QSplitter, QFrame,
+    QScrollArea, QSizePolicy, QFileDialog, QCheckBox
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 from utils.ui_util import show_info, show_warn, show_error
 from utils.logger import logger
 from app.config_manager import config_manager
-import subprocess
+from ui.widgets.console import ConsoleWidget
+from ui.dialogs.batch_dialog import BatchDialog
+from ui.dialogs.pipeline_dialog import PipelineDialog
+from core.process import ProcessRunner
+from core.shell import ShellSession
+from core.ps1 import ps1_args, PS1_ENCODING
 import os
 
 
-# PS1执行线程
+# PS1执行线程（进程引擎按批读取输出；停止时结束整棵进程树）
 class PS1Thread(QThread):
-    output_received = pyqtSignal(str)
+    lines_received = pyqtSignal(list)
+    exited = pyqtSignal(object)
     finished = pyqtSignal()
 
-    def __init__(self, command):
+    def __init__(self, command, session=None):
         super().__init__()
         self.command = command
-        self.running = True
+        # 持久会话模式下在已有 shell 中执行，否则每次启动新进程
+        self.session = session
+        self.runner = None if session else ProcessRunner(ps1_args(command), encoding=PS1_ENCODING)
 
     def run(self):
         try:
-            process = subprocess.Popen(
-                ["powershell", "-Command", self.command],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                shell=True,
-                encoding="utf-8",
-                errors="ignore"
-            )
-
-            while self.running and process.poll() is None:
-                line = process.stdout.readline()
-                if line:
-                    self.output_received.emit(line.strip())
-
-            remaining = process.stdout.read()
-            if remaining:
-                self.output_received.emit(remaining)
+            if self.session:
+                result = self.session.run(self.command, self.lines_received.emit)
+            else:
+                result = self.runner.run(self.lines_received.emit)
+            self.exited.emit(result)
         except Exception as e:
-            self.output_received.emit(f"执行错误：{str(e)}")
+            self.lines_received.emit([f"执行错误：{str(e)}"])
         finally:
             self.finished.emit()
 
     def stop(self):
-        self.running = False
+        (self.session or self.runner).stop()
 
 
 class PS1Page(QWidget):
     def __init__(self):
         super().__init__()
         self.ps1_thread = None
+        self.shell_session = None
         self.init_ui()
         self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
 
@@ -176,6 +173,22 @@ class PS1Page(QWidget):
         clear_btn.clicked.connect(lambda: self.cmd_edit.clear())
         btn_layout.addWidget(clear_btn)
 
+        batch_btn = QPushButton("批量执行")
+        batch_btn.setStyleSheet(self.secondary_btn_style())
+        batch_btn.clicked.connect(self.open_batch)
+        btn_layout.addWidget(batch_btn)
+
+        pipeline_btn = QPushButton("流水线")
+        pipeline_btn.setStyleSheet(self.secondary_btn_style())
+        pipeline_btn.clicked.connect(self.open_pipeline)
+        btn_layout.addWidget(pipeline_btn)
+
+        self.session_check = QCheckBox("保持会话")
+        self.session_check.setToolTip("在同一个 shell 进程中连续执行，保留工作目录和环境变量，省去每次启动 shell 的时间")
+        self.session_check.setChecked(config_manager.get("ps1_shell_persistent"))
+        self.session_check.toggled.connect(self.toggle_session)
+        btn_layout.addWidget(self.session_check)
+
         btn_layout.addStretch()
         layout.addLayout(btn_layout)
 
@@ -206,7 +219,7 @@ class PS1Page(QWidget):
 
         clear_log_btn = QPushButton("清空结果")
         clear_log_btn.setStyleSheet(self.secondary_btn_style())
-        clear_log_btn.clicked.connect(lambda: self.result_browser.clear())
+        clear_log_btn.clicked.connect(lambda: self.result_console.clear())
         header.addWidget(clear_log_btn)
 
         copy_log_btn = QPushButton("复制结果")
@@ -218,20 +231,8 @@ class PS1Page(QWidget):
         layout.addLayout(header)
 
         # 结果展示框
-        self.result_browser = QTextBrowser()
-        self.result_browser.setStyleSheet("""
-            QTextBrowser {
-                border: 1px solid #e0e0e0;
-                border-radius: 8px;
-                padding: 12px;
-                font-family: Consolas, "Courier New", monospace;
-                font-size: 14px;
-                background-color: #fafafa;
-                min-height: 300px;
-            }
-        """)
-        self.result_browser.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        layout.addWidget(self.result_browser, 1)
+        self.result_console = ConsoleWidget(min_height=300)
+        layout.addWidget(self.result_console, 1)
 
         return card
 
@@ -339,38 +340,68 @@ class PS1Page(QWidget):
             show_warn("警告", "请输入PowerShell命令！")
             return
 
-        self.ps1_thread = PS1Thread(cmd)
-        self.ps1_thread.output_received.connect(self.append_result)
+        self.result_console.clear()
+        session = None
+        if self.session_check.isChecked():
+            if self.shell_session is None:
+                self.shell_session = ShellSession("ps1")
+            session = self.shell_session
+        self.ps1_thread = PS1Thread(cmd, session)
+        self.ps1_thread.lines_received.connect(self.append_lines)
+        self.ps1_thread.exited.connect(self.on_ps1_exited)
         self.ps1_thread.finished.connect(self.on_ps1_finished)
         self.ps1_thread.start()
 
         self.exec_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
-        self.result_browser.clear()
         logger.info(f"执行PS1命令：{cmd}")
 
     def stop_ps1(self):
+        # 结束进程树后线程自行退出，执行按钮在 on_ps1_finished 中恢复
         if self.ps1_thread:
             self.ps1_thread.stop()
-            self.exec_btn.setEnabled(True)
             self.stop_btn.setEnabled(False)
             logger.info("停止PS1命令执行")
 
-    def append_result(self, output):
-        self.result_browser.append(output)
-        self.result_browser.moveCursor(self.result_browser.textCursor().End)
+    def open_batch(self):
+        """批量执行：当前编辑框内容作为命令模板"""
+        dialog = BatchDialog("ps1", self.cmd_edit.toPlainText().strip(), self)
+        dialog.exec_()
+
+    def open_pipeline(self):
+        dialog = PipelineDialog(self)
+        dialog.exec_()
+
+    def toggle_session(self, enabled):
+        config_manager.set("ps1_shell_persistent", enabled)
+        if not enabled:
+            self.close_session()
+
+    def close_session(self):
+        """关闭持久shell会话（关闭选项或主窗口退出时调用）"""
+        if self.shell_session:
+            self.shell_session.close()
+            self.shell_session = None
+
+    def append_lines(self, lines):
+        self.result_console.append_lines(lines)
+
+    def on_ps1_exited(self, result):
+        state = "已停止" if result.stopped else f"退出码 {result.exit_code}"
+        self.result_console.append_line(f"===== {state}，耗时 {result.duration:.2f} 秒 =====")
 
     def on_ps1_finished(self):
+        if self.ps1_thread:
+            self.ps1_thread.wait()
         self.exec_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         logger.info("PS1命令执行完成")
 
     def copy_result(self):
-        text = self.result_browser.toPlainText()
-        if not text:
+        if not self.result_console.capture.line_count:
             show_warn("警告", "结果为空！")
             return
-        from PyQt5.QtWidgets import QApplication
-        clipboard = QApplication.clipboard()
-        clipboard.setText(text)
+        if not self.result_console.copy_all():
+            show_warn("警告", "结果过大，请使用下方的“导出”保存到文件")
+            return
         show_info("成功", "结果已复制到剪贴板")
\ No newline at end of file
@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+import time
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QLineEdit, QPushButton, QComboBox,
+    QSpinBox, QCheckBox, QPlainTextEdit, QSplitter, QFrame, QSizePolicy,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont, QColor
+from utils.ui_util import show_info, show_warn
+from utils.logger import logger
+from app.config_manager import config_manager
+from core.scheduler import scheduler, make_job, Schedule, MISFIRE_POLICIES
+from core.inventory import inventory
+from core.profile import profile_manager
+from ui.widgets.console import ConsoleWidget
+from ui import styles
+
+
+TYPE_NAMES = {"cmd": "CMD", "ps1": "PowerShell", "ssh": "SSH", "sql": "SQL"}
+MISFIRE_NAMES = {"run_once": "补执行一次", "skip": "跳过"}
+STATUS_TEXT = {
+    "ok": "成功",
+    "failed": "失败",
+    "timeout": "超时",
+    "error": "执行错误",
+    "cancelled": "已取消",
+    "skipped": "跳过（上次未结束）",
+    "missed": "错过"
+}
+STATUS_COLOR = {"ok": "#1e8e3e", "failed": "#d93025", "timeout": "#e37400", "error": "#d93025",
+                "skipped": "#80868b", "missed": "#80868b"}
+TRIGGER_TEXT = {"schedule": "计划", "misfire": "补执行", "manual": "手动"}
+CARD_STYLE = """
+    QFrame {
+        background-color: #ffffff;
+        border-radius: 12px;
+        border: 1px solid #e8e8e8;
+        padding: 12px;
+        font-size: 14px;
+    }
+"""
+
+
+def format_time(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) if ts else "-"
+
+
+class SchedulerPage(QWidget):
+    """定时任务：按 cron 表达式或固定间隔执行 CMD/PS1/SSH/SQL，任务表和执行历史持久保存"""
+
+    def __init__(self):
+        super().__init__()
+        self.job_ids = []  # 表格行 -> 任务id
+        self.editing_id = None
+        self.history = []
+        self.history_version = None
+        self.init_ui()
+        self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
+        self.refresh_jobs()
+        # 任务在后台线程中执行，定时刷新状态
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_jobs)
+        self.refresh_timer.start(1000)
+
+    def init_ui(self):
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        main_layout = QVBoxLayout(self)
+        main_layout.setContentsMargins(15, 15, 15, 15)
+        main_layout.setSpacing(20)
+
+        title_bar = QHBoxLayout()
+        title = QLabel("定时任务")
+        title.setFont(QFont("Microsoft YaHei", 20, QFont.Bold))
+        title.setStyleSheet("color: #2c3e50;")
+        title_bar.addWidget(title)
+        title_bar.addStretch()
+        main_layout.addLayout(title_bar)
+
+        splitter = QSplitter(Qt.Horizontal)
+        splitter.setHandleWidth(3)
+        splitter.setStyleSheet("QSplitter::handle { background-color: #e0e0e0; }")
+        splitter.addWidget(self.create_form_card())
+        splitter.addWidget(self.create_jobs_card())
+        splitter.setSizes([450, 750])
+        main_layout.addWidget(splitter, 1)
+
+    # ========== 任务编辑 ==========
+    def create_form_card(self):
+        card = QFrame()
+        card.setStyleSheet(CARD_STYLE)
+        layout = QVBoxLayout(card)
+        layout.setSpacing(10)
+
+        self.form_title = QLabel("新建任务")
+        self.form_title.setFont(QFont("Microsoft YaHei", 16, QFont.Bold))
+        self.form_title.setStyleSheet("color: #34495e;")
+        layout.addWidget(self.form_title)
+
+        form = QFormLayout()
+        self.name_edit = QLineEdit()
+        self.name_edit.setPlaceholderText("留空则取命令第一行")
+        self.name_edit.setStyleSheet(styles.INPUT)
+        form.addRow("名称：", self.name_edit)
+
+        self.type_combo = QComboBox()
+        for key, name in TYPE_NAMES.items():
+            self.type_combo.addItem(name, key)
+        self.type_combo.currentIndexChanged.connect(self.update_target_combo)
+        form.addRow("类型：", self.type_combo)
+
+        self.target_combo = QComboBox()
+        self.target_label = QLabel("目标：")
+        form.addRow(self.target_label, self.target_combo)
+
+        self.schedule_edit = QLineEdit("*/5 * * * *")
+        self.schedule_edit.setToolTip("分 时 日 月 周（如 0 2 * * 1-5）、@hourly/@daily/@weekly/@monthly，或 @every 30s/5m/2h/1d")
+        self.schedule_edit.setStyleSheet(styles.INPUT)
+        self.schedule_edit.textChanged.connect(self.preview_schedule)
+        form.addRow("计划：", self.schedule_edit)
+        self.preview_label = QLabel("")
+        self.preview_label.setStyleSheet("color: #5f6368;")
+        self.preview_label.setWordWrap(True)
+        form.addRow("", self.preview_label)
+
+        self.timeout_spin = QSpinBox()
+        self.timeout_spin.setRange(0, 86400)
+        self.timeout_spin.setSpecialValueText("不限")
+        self.timeout_spin.setSuffix(" 秒")
+        self.timeout_spin.setValue(300)
+        form.addRow("超时：", self.timeout_spin)
+
+        self.instances_spin = QSpinBox()
+        self.instances_spin.setRange(1, 16)
+        self.instances_spin.setToolTip("同一任务同时执行的实例数上限，1 表示上次未结束时跳过本次")
+        form.addRow("最大并行实例：", self.instances_spin)
+
+        self.misfire_combo = QComboBox()
+        for key in MISFIRE_POLICIES:
+            self.misfire_combo.addItem(MISFIRE_NAMES[key], key)
+        self.misfire_combo.setToolTip("程序未运行或系统休眠而错过触发时的处理（多次错过合并为一次）")
+        form.addRow("错过触发：", self.misfire_combo)
+
+        self.grace_spin = QSpinBox()
+        self.grace_spin.setRange(0, 86400)
+        self.grace_spin.setSuffix(" 秒")
+        self.grace_spin.setValue(60)
+        self.grace_spin.setToolTip("延迟不超过该时间的触发照常执行")
+        form.addRow("宽限时间：", self.grace_spin)
+
+        self.history_spin = QSpinBox()
+        self.history_spin.setRange(1, 1000)
+        self.history_spin.setValue(50)
+        form.addRow("保留历史条数：", self.history_spin)
+
+        self.enabled_check = QCheckBox("启用")
+        self.enabled_check.setChecked(True)
+        form.addRow("", self.enabled_check)
+        layout.addLayout(form)
+
+        layout.addWidget(QLabel("命令 / SQL："))
+        self.command_edit = QPlainTextEdit()
+        self.command_edit.setStyleSheet(styles.EDITOR)
+        layout.addWidget(self.command_edit, 1)
+
+        btn_layout = QHBoxLayout()
+        save_btn = QPushButton("保存任务")
+        save_btn.setStyleSheet(styles.PRIMARY_BTN)
+        save_btn.clicked.connect(self.save_job)
+        btn_layout.addWidget(save_btn)
+        new_btn = QPushButton("新建")
+        new_btn.setStyleSheet(styles.SECONDARY_BTN)
+        new_btn.clicked.connect(self.new_job)
+        btn_layout.addWidget(new_btn)
+        btn_layout.addStretch()
+        layout.addLayout(btn_layout)
+
+        self.update_target_combo()
+        self.preview_schedule()
+        return card
+
+    def update_target_combo(self):
+        job_type = self.type_combo.currentData()
+        self.target_combo.clear()
+        if job_type == "ssh":
+            self.target_label.setText("主机：")
+            self.target_combo.addItems([h["name"] for h in inventory.list_hosts()])
+        elif job_type == "sql":
+            self.target_label.setText("数据库：")
+            self.target_combo.addItems([p["name"] for p in profile_manager.list_profiles()])
+        else:
+            self.target_label.setText("目标：")
+            self.target_combo.addItem("本机")
+        self.target_combo.setEnabled(job_type in ("ssh", "sql"))
+
+    def preview_schedule(self):
+        try:
+            schedule = Schedule(self.schedule_edit.text())
+        except ValueError as e:
+            self.preview_label.setText(str(e))
+            return
+        times, ts = [], time.time()
+        for _ in range(3):
+            ts = schedule.next_after(ts)
+            if ts is None:
+                break
+            times.append(format_time(ts))
+        self.preview_label.setText("接下来：" + "，".join(times) if times else "该计划不会触发")
+
+    def new_job(self):
+        self.editing_id = None
+        self.form_title.setText("新建任务")
+        self.name_edit.clear()
+        self.command_edit.clear()
+        self.jobs_table.clearSelection()
+
+    def save_job(self):
+        job_type = self.type_combo.currentData()
+        target = self.target_combo.currentText() if job_type in ("ssh", "sql") else ""
+        try:
+            job = make_job(
+                self.name_edit.text(), job_type, self.command_edit.toPlainText().strip(),
+                self.schedule_edit.text(),
+                host=target if job_type == "ssh" else "",
+                profile=target if job_type == "sql" else "",
+                timeout=self.timeout_spin.value(),
+                max_instances=self.instances_spin.value(),
+                misfire=self.misfire_combo.currentData(),
+                misfire_grace=self.grace_spin.value(),
+                history_max=self.history_spin.value(),
+                enabled=self.enabled_check.isChecked(),
+                job_id=self.editing_id
+            )
+        except ValueError as e:
+            show_warn("警告", str(e))
+            return
+        scheduler.save_job(job)
+        self.editing_id = job["id"]
+        self.form_title.setText(f"编辑任务：{job['name']}")
+        self.refresh_jobs()
+        logger.info(f"保存定时任务：{job['name']}（{job['schedule']}）")
+
+    def load_job(self, job):
+        self.editing_id = job["id"]
+        self.form_title.setText(f"编辑任务：{job['name']}")
+        self.name_edit.setText(job["name"])
+        self.type_combo.setCurrentIndex(self.type_combo.findData(job["type"]))
+        target = job["host"] or job["profile"]
+        if target and self.target_combo.findText(target) < 0:
+            self.target_combo.addItem(target)  # 主机/连接配置已被删除，仍显示原值
+        if target:
+            self.target_combo.setCurrentText(target)
+        self.schedule_edit.setText(job["schedule"])
+        self.timeout_spin.setValue(int(job["timeout"]))
+        self.instances_spin.setValue(job["max_instances"])
+        self.misfire_combo.setCurrentIndex(self.misfire_combo.findData(job["misfire"]))
+        self.grace_spin.setValue(job["misfire_grace"])
+        self.history_spin.setValue(job["history_max"])
+        self.enabled_check.setChecked(job["enabled"])
+        self.command_edit.setPlainText(job["command"])
+
+    # ========== 任务列表 / 历史 ==========
+    def create_jobs_card(self):
+        card = QFrame()
+        card.setStyleSheet(CARD_STYLE)
+        layout = QVBoxLayout(card)
+        layout.setSpacing(10)
+
+        header = QHBoxLayout()
+        sub_title = QLabel("任务列表")
+        sub_title.setFont(QFont("Microsoft YaHei", 16, QFont.Bold))
+        sub_title.setStyleSheet("color: #34495e;")
+        header.addWidget(sub_title)
+        header.addStretch()
+        for text, style, slot in (("立即执行", styles.PRIMARY_BTN, self.run_now),
+                                  ("取消执行", styles.WARN_BTN, self.cancel_job),
+                                  ("启用/停用", styles.SECONDARY_BTN, self.toggle_job),
+                                  ("删除", styles.WARN_BTN, self.remove_job)):
+            btn = QPushButton(text)
+            btn.setStyleSheet(style)
+            btn.clicked.connect(slot)
+            header.addWidget(btn)
+        layout.addLayout(header)
+
+        self.jobs_table = QTableWidget(0, 8)
+        self.jobs_table.setHorizontalHeaderLabels(["名称", "类型", "计划", "下次执行", "上次执行", "上次结果", "执行中", "状态"])
+        self.jobs_table.verticalHeader().setVisible(False)
+        self.jobs_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.jobs_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.jobs_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.jobs_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.jobs_table.setStyleSheet(styles.TABLE)
+        self.jobs_table.itemSelectionChanged.connect(self.on_job_selected)
+        layout.addWidget(self.jobs_table, 2)
+
+        history_header = QHBoxLayout()
+        history_header.addWidget(QLabel("执行历史："))
+        history_header.addStretch()
+        clear_btn = QPushButton("清空历史")
+        clear_btn.setStyleSheet(styles.SECONDARY_BTN)
+        clear_btn.clicked.connect(self.clear_history)
+        history_header.addWidget(clear_btn)
+        layout.addLayout(history_header)
+
+        bottom = QSplitter(Qt.Horizontal)
+        self.history_table = QTableWidget(0, 5)
+        self.history_table.setHorizontalHeaderLabels(["开始时间", "触发", "结果", "退出码", "耗时(秒)"])
+        self.history_table.verticalHeader().setVisible(False)
+        self.history_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.history_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.history_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.history_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.history_table.setStyleSheet(styles.TABLE)
+        self.history_table.itemSelectionChanged.connect(self.show_record_output)
+        bottom.addWidget(self.history_table)
+        self.output_console = ConsoleWidget(min_height=150)
+        bottom.addWidget(self.output_console)
+        bottom.setSizes([400, 500])
+        layout.addWidget(bottom, 3)
+        return card
+
+    def selected_job_id(self):
+        row = self.jobs_table.currentRow()
+        return self.job_ids[row] if 0 <= row < len(self.job_ids) else None
+
+    def refresh_jobs(self):
+        jobs = scheduler.list_jobs()
+        ids = [job["id"] for job in jobs]
+        if ids != self.job_ids:
+            selected = self.selected_job_id()
+            self.job_ids = ids
+            self.jobs_table.setRowCount(len(jobs))
+            for row in range(len(jobs)):
+                for col in range(8):
+                    self.jobs_table.setItem(row, col, QTableWidgetItem())
+            if selected in ids:
+                self.jobs_table.selectRow(ids.index(selected))
+        for row, job in enumerate(jobs):
+            values = [
+                job["name"], TYPE_NAMES[job["type"]], job["schedule"],
+                format_time(job["next_run"]) if job["enabled"] else "-",
+                format_time(job["last_run"]),
+                STATUS_TEXT.get(job["last_status"], job["last_status"]) or "-",
+                str(job["running"]) if job["running"] else "",
+                "启用" if job["enabled"] else "停用"
+            ]
+            for col, value in enumerate(values):
+                item = self.jobs_table.item(row, col)
+                if item.text() != value:
+                    item.setText(value)
+            self.jobs_table.item(row, 5).setForeground(QColor(STATUS_COLOR.get(job["last_status"], "#202124")))
+        job_id = self.selected_job_id()
+        if job_id:
+            if scheduler.history_version(job_id) != self.history_version:
+                self.load_history(job_id)
+
+    def on_job_selected(self):
+        job_id = self.selected_job_id()
+        if not job_id:
+            return
+        job = scheduler.get_job(job_id)
+        if job:
+            self.load_job(job)
+        self.load_history(job_id)
+
+    def load_history(self, job_id):
+        self.history_version = scheduler.history_version(job_id)
+        self.history = scheduler.get_history(job_id)
+        self.history_table.setRowCount(len(self.history))
+        for row, record in enumerate(self.history):
+            values = [
+                format_time(record["start"]), TRIGGER_TEXT.get(record["trigger"], record["trigger"]),
+                STATUS_TEXT.get(record["status"], record["status"]),
+                "" if record["exit_code"] is None else str(record["exit_code"]),
+                f"{record['duration']:.2f}"
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == 2:
+                    item.setForeground(QColor(STATUS_COLOR.get(record["status"], "#202124")))
+                self.history_table.setItem(row, col, item)
+        self.output_console.clear()
+
+    def show_record_output(self):
+        row = self.history_table.currentRow()
+        self.output_console.clear()
+        if 0 <= row < len(self.history):
+            self.output_console.append_lines(self.history[row]["output"])
+
+    # ========== 操作 ==========
+    def run_now(self):
+        job_id = self.selected_job_id()
+        if not job_id:
+            show_warn("警告", "请先选择任务！")
+            return
+        if not scheduler.run_now(job_id):
+            show_warn("警告", "该任务的执行实例已达上限，本次已跳过")
+        self.refresh_jobs()
+
+    def cancel_job(self):
+        job_id = self.selected_job_id()
+        if job_id:
+            count = scheduler.cancel_job(job_id)
+            show_info("提示", f"已取消 {count} 个正在执行的实例" if count else "该任务当前没有在执行")
+
+    def toggle_job(self):
+        job_id = self.selected_job_id()
+        job = scheduler.get_job(job_id) if job_id else None
+        if job:
+            scheduler.set_enabled(job_id, not job["enabled"])
+            self.enabled_check.setChecked(not job["enabled"])
+            self.refresh_jobs()
+
+    def remove_job(self):
+        job_id = self.selected_job_id()
+        if not job_id:
+            return
+        scheduler.remove_job(job_id)
+        self.new_job()
+        self.history = []
+        self.history_table.setRowCount(0)
+        self.output_console.clear()
+        self.refresh_jobs()
+
+    def clear_history(self):
+        job_id = self.selected_job_id()
+        if job_id:
+            scheduler.clear_history(job_id)
+            self.load_history(job_id)
@@ -2,7 +2,7 @@
 from PyQt5.QtWidgets import (
     QWidget, QFormLayout, QLineEdit, QPushButton,
     QHBoxLayout, QVBoxLayout, QLabel, QTextEdit,
-    QTextBrowser, QComboBox, QDialog, QSplitter,
+    QComboBox, QDialog, QSplitter,
     QFrame, QSizePolicy, QListWidget, QListWidgetItem,
     QScrollArea, QMenu, QAction
 )
@@ -11,54 +11,168 @@ from PyQt5.QtGui import QFont, QColor
 from utils.ui_util import show_info, show_warn, show_error
 from utils.logger import logger
 from app.config_manager import config_manager
-import paramiko
-import time
+from ui.widgets.console import ConsoleWidget
+from core.ssh import ssh_sessions, read_channel, NO_EXIT_STATUS
+from core.multitail import parse_follow_command, build_follow_command, FOLLOW_MARKER
+from core.net import format_phases
+from core.recorder import SessionRecorder
 
 
-# 实时日志读取线程
+# 连接测试线程（分阶段计时，避免阻塞界面）
+class SSHTestThread(QThread):
+    result_signal = pyqtSignal(bool, str, dict)
+
+    def __init__(self, host, port, user, pwd):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.user = user
+        self.pwd = pwd
+        self.session = None
+
+    def run(self):
+        success, msg, phases, self.session = ssh_sessions.get_session(self.host, self.port, self.user, self.pwd)
+        self.result_signal.emit(success, msg, phases)
+
+
+# 实时日志读取线程（事件驱动，按批次发出；断线后自动重连，tail -f 类命令从断点续传）
 class SSHLogThread(QThread):
+    lines_received = pyqtSignal(list)
     log_received = pyqtSignal(str)
+    session_changed = pyqtSignal(object)
     finished = pyqtSignal()
 
-    def __init__(self, ssh_client, command):
+    def __init__(self, ssh_session, command, sinks=None, recorder=None):
         super().__init__()
-        self.ssh_client = ssh_client
+        self.ssh_session = ssh_session
         self.command = command
+        self.recorder = recorder  # 会话录像（写盘在录像器自己的线程中完成）
+        # 额外的行消费者（如实时分析），在读取线程中调用，不占用界面线程
+        self.sinks = sinks if sinks is not None else []
+        self.channel = None
         self.running = True
+        self.follow = parse_follow_command(command)
+        self.follow_start = None  # 本次执行的起始行号（@@follow 标记行给出）
+        self.next_line = None  # 断线后的续传行号
 
     def run(self):
         try:
-            stdin, stdout, stderr = self.ssh_client.exec_command(self.command)
             while self.running:
-                line = stdout.readline()
-                if line:
-                    self.log_received.emit(line.strip())
-                if stdout.channel.exit_status_ready():
+                if not self.run_once():
                     break
-                time.sleep(0.1)
-            # 读取错误信息
-            error = stderr.read().strip()
-            if error:
-                self.log_received.emit(f"错误：{error}")
-        except Exception as e:
-            self.log_received.emit(f"执行错误：{str(e)}")
+                # 连接断开：非跟踪类命令只重连会话不重跑，避免重复执行带副作用的命令
+                if self.follow:
+                    self.notice("SSH连接已断开，正在重连...")
+                else:
+                    self.notice("SSH连接已断开，命令未完成（非 tail -f 类命令不会自动重新执行），正在重连...")
+                session = ssh_sessions.reconnect(self.ssh_session, lambda: self.running, self.on_retry)
+                if not session:
+                    break
+                self.ssh_session = session
+                self.session_changed.emit(session)
+                if not self.follow:
+                    self.notice("SSH已重连")
+                    break
+                if self.next_line is None:
+                    self.notice("SSH已重连，从文件末尾继续跟踪")
+                else:
+                    self.notice(f"SSH已重连，从第 {self.next_line} 行继续跟踪")
         finally:
+            if self.recorder:
+                self.recorder.close()
             self.finished.emit()
 
+    def notice(self, msg):
+        """提示信息：显示并写入录像"""
+        if self.recorder:
+            self.recorder.record([msg], "m")
+        self.log_received.emit(msg)
+
+    def run_once(self):
+        """执行一次命令，返回 True 表示因连接断开而中止（需要重连）"""
+        self.channel = None
+        try:
+            # 在共享会话上开一个独立通道，多个命令可并发执行
+            self.channel = channel = self.ssh_session.open_channel()
+            if self.follow:
+                path, lines = self.follow
+                self.follow_start = None
+                channel.exec_command(build_follow_command(path, lines, self.next_line))
+            else:
+                channel.exec_command(self.command)
+            stats = {"stdout_lines": 0}
+            exit_code = read_channel(channel, self.deliver, lambda: self.running, stats=stats)
+            if exit_code == NO_EXIT_STATUS and self.running and not self.ssh_session.is_active():
+                if self.follow_start is not None:
+                    # 标记行本身不计入；未收完的半行不计，续传时从该行重新读取
+                    self.next_line = self.follow_start + stats["stdout_lines"] - 1
+                elif self.next_line is None:
+                    # 标记行到达前就断开：无法确定起始行号，重连后只跟踪新增内容（tail -n 0），不重复输出最后几行
+                    self.follow = (self.follow[0], 0) if self.follow else None
+                return True
+            if exit_code == NO_EXIT_STATUS:
+                self.notice("命令结束，未返回退出码")
+            elif exit_code:
+                self.notice(f"命令退出码：{exit_code}")
+        except Exception as e:
+            if self.running and not self.ssh_session.is_active():
+                return True
+            if self.running:
+                self.notice(f"执行错误：{str(e)}")
+        finally:
+            if self.channel:
+                self.ssh_session.release_channel(self.channel)
+        return False
+
+    def on_retry(self, attempt, wait, msg):
+        self.notice(f"第 {attempt} 次重连失败：{msg}，{wait:.1f} 秒后重试")
+
+    def deliver(self, lines):
+        if self.follow:
+            lines = self.track_follow(lines)
+            if not lines:
+                return
+        if self.recorder:
+            self.recorder.record(lines)
+        for sink in list(self.sinks):
+            sink(lines)
+        self.lines_received.emit(lines)
+
+    def track_follow(self, lines):
+        """取出本次执行的 @@follow 标记行（stdout 第一行），记录起始行号"""
+        if self.follow_start is not None:
+            return lines
+        for i, line in enumerate(lines):
+            if line.startswith(FOLLOW_MARKER) and line[len(FOLLOW_MARKER):].isdigit():
+                self.follow_start = int(line[len(FOLLOW_MARKER):])
+                return lines[:i] + lines[i + 1:]
+        return lines
+
     def stop(self):
         self.running = False
+        # 关闭通道以唤醒阻塞中的读取（会话本身保留复用）
+        if self.channel:
+            self.channel.close()
 
 
 class SSHPage(QWidget):
     def __init__(self):
         super().__init__()
-        self.ssh_client = None
-        self.log_thread = None
+        self.ssh_session = None
+        self.log_threads = {}  # 任务编号 -> SSHLogThread（同一会话上并发执行）
+        self.line_sinks = []  # 所有日志线程共享的行消费者列表
+        self.sftp_dialog = None  # 文件传输窗口（与当前会话绑定）
+        self.task_seq = 0
+        self.test_thread = None
         self.init_ui()
         # 设置全局字体
         self.setFont(QFont("Microsoft YaHei", config_manager.get("font_size")))
         # 加载历史命令
         self.load_ssh_history()
+        # 定时刷新会话/通道状态
+        self.session_timer = QTimer(self)
+        self.session_timer.timeout.connect(self.update_session_status)
+        self.session_timer.start(1000)
 
     def init_ui(self):
         # 全局自适应
@@ -208,10 +322,10 @@ class SSHPage(QWidget):
         btn_layout.addWidget(local_btn)
 
         # 测试连接按钮
-        test_btn = QPushButton("测试连接")
-        test_btn.setStyleSheet(self.primary_btn_style())
-        test_btn.clicked.connect(self.test_connection)
-        btn_layout.addWidget(test_btn)
+        self.test_btn = QPushButton("测试连接")
+        self.test_btn.setStyleSheet(self.primary_btn_style())
+        self.test_btn.clicked.connect(self.test_connection)
+        btn_layout.addWidget(self.test_btn)
 
         # 清空按钮
         clear_btn = QPushButton("清空信息")
@@ -289,12 +403,37 @@ class SSHPage(QWidget):
         self.start_btn.clicked.connect(self.start_realtime_log)
         btn_layout.addWidget(self.start_btn)
 
-        self.stop_btn = QPushButton("停止执行")
+        self.stop_btn = QPushButton("停止全部")
         self.stop_btn.setStyleSheet(self.warn_btn_style())
         self.stop_btn.clicked.connect(self.stop_realtime_log)
         self.stop_btn.setEnabled(False)
         btn_layout.addWidget(self.stop_btn)
 
+        fanout_btn = QPushButton("批量执行")
+        fanout_btn.setStyleSheet(self.secondary_btn_style())
+        fanout_btn.clicked.connect(self.open_fanout)
+        btn_layout.addWidget(fanout_btn)
+
+        multitail_btn = QPushButton("多机日志")
+        multitail_btn.setStyleSheet(self.secondary_btn_style())
+        multitail_btn.clicked.connect(self.open_multitail)
+        btn_layout.addWidget(multitail_btn)
+
+        metrics_btn = QPushButton("主机监控")
+        metrics_btn.setStyleSheet(self.secondary_btn_style())
+        metrics_btn.clicked.connect(self.open_metrics)
+        btn_layout.addWidget(metrics_btn)
+
+        sftp_btn = QPushButton("文件传输")
+        sftp_btn.setStyleSheet(self.secondary_btn_style())
+        sftp_btn.clicked.connect(self.open_sftp)
+        btn_layout.addWidget(sftp_btn)
+
+        replay_btn = QPushButton("会话录像")
+        replay_btn.setStyleSheet(self.secondary_btn_style())
+        replay_btn.clicked.connect(self.open_replay)
+        btn_layout.addWidget(replay_btn)
+
         clear_cmd_btn = QPushButton("清空命令")
         clear_cmd_btn.setStyleSheet(self.secondary_btn_style())
         clear_cmd_btn.clicked.connect(lambda: self.cmd_edit.clear())
@@ -394,7 +533,7 @@ class SSHPage(QWidget):
 
         clear_log_btn = QPushButton("清空日志")
         clear_log_btn.setStyleSheet(self.secondary_btn_style())
-        clear_log_btn.clicked.connect(lambda: self.log_browser.clear())
+        clear_log_btn.clicked.connect(lambda: self.log_console.clear())
         header.addWidget(clear_log_btn)
 
         copy_log_btn = QPushButton("复制日志")
@@ -402,24 +541,33 @@ class SSHPage(QWidget):
         copy_log_btn.clicked.connect(self.copy_log)
         header.addWidget(copy_log_btn)
 
+        self.analytics_btn = QPushButton("实时分析")
+        self.analytics_btn.setCheckable(True)
+        self.analytics_btn.setStyleSheet(self.secondary_btn_style() + """
+                QPushButton:checked {
+                    background-color: #4285f4;
+                    color: white;
+                }
+            """)
+        self.analytics_btn.toggled.connect(self.toggle_analytics)
+        header.addWidget(self.analytics_btn)
+
         header.addStretch()
+
+        # 会话/通道状态
+        self.session_label = QLabel("未连接")
+        self.session_label.setStyleSheet("color: #7f8c8d; font-size: 13px;")
+        header.addWidget(self.session_label)
         layout.addLayout(header)
 
-        # 日志展示框
-        self.log_browser = QTextBrowser()
-        self.log_browser.setStyleSheet("""
-                QTextBrowser {
-                    border: 1px solid #e0e0e0;
-                    border-radius: 8px;
-                    padding: 12px;
-                    font-family: Consolas, "Courier New", monospace;
-                    font-size: 14px;
-                    background-color: #fafafa;
-                    min-height: 400px;
-                }
-            """)
-        self.log_browser.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        layout.addWidget(self.log_browser, 1)
+        # 日志展示框 + 实时分析面板（默认隐藏）
+        body = QHBoxLayout()
+        body.setSpacing(10)
+        self.log_console = ConsoleWidget(min_height=400)
+        body.addWidget(self.log_console, 3)
+        self.analytics_panel = None
+        self.analytics_layout = body
+        layout.addLayout(body, 1)
 
         return card
 
@@ -531,10 +679,16 @@ class SSHPage(QWidget):
         self.user_edit.clear()
         self.pwd_edit.clear()
         self.cmd_edit.clear()
-        self.log_browser.clear()
-        if self.ssh_client:
-            self.ssh_client.close()
-            self.ssh_client = None
+        self.log_console.clear()
+        self.stop_realtime_log()
+        if self.sftp_dialog:
+            self.sftp_dialog.shutdown()
+            self.sftp_dialog.close()
+            self.sftp_dialog = None
+        if self.ssh_session:
+            # 会话与批量执行、多机跟踪、文件传输等共享，只退役，其他使用者的通道结束后才关闭
+            ssh_sessions.retire_session(self.ssh_session)
+            self.ssh_session = None
         logger.info("清空SSH连接信息")
 
     def test_connection(self):
@@ -548,26 +702,34 @@ class SSHPage(QWidget):
             show_warn("警告", "主机/端口/用户名不能为空！")
             return
 
-        try:
-            self.ssh_client = paramiko.SSHClient()
-            self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.ssh_client.connect(
-                hostname=host,
-                port=int(port),
-                username=user,
-                password=pwd,
-                timeout=config_manager.get("ssh_timeout")
-            )
-            show_info("成功", "SSH连接成功！")
+        if not port.isdigit():
+            show_warn("警告", "端口必须是数字！")
+            return
+
+        self.test_btn.setEnabled(False)
+        self.test_btn.setText("连接中...")
+        self.test_thread = SSHTestThread(host, port, user, pwd)
+        self.test_thread.result_signal.connect(
+            lambda success, msg, phases: self.on_test_finished(host, port, success, msg, phases))
+        self.test_thread.start()
+
+    def on_test_finished(self, host, port, success, msg, phases):
+        """连接测试完成：保存连接并展示各阶段耗时"""
+        self.test_btn.setEnabled(True)
+        self.test_btn.setText("测试连接")
+        timing = format_phases(phases)
+        if success:
+            self.ssh_session = self.test_thread.session
+            show_info("成功", f"{msg}\n\n{timing}")
             config_manager.increment_stat("ssh_connections")
-            logger.info(f"SSH连接成功：{host}:{port}")
-        except Exception as e:
-            show_error("失败", f"SSH连接失败：{str(e)}")
-            logger.error(f"SSH连接失败：{str(e)}")
+            logger.info(f"SSH连接成功：{host}:{port} {phases}")
+        else:
+            show_error("失败", f"SSH连接失败：{msg}\n\n{timing}")
+            logger.error(f"SSH连接失败：{msg} {phases}")
 
     def start_realtime_log(self):
-        """开始实时日志查看"""
-        if not self.ssh_client:
+        """开始实时日志查看（已有命令在执行时，新命令作为另一通道并发执行）"""
+        if not self.ssh_session or not self.ssh_session.is_active():
             show_warn("警告", "请先建立SSH连接！")
             return
         cmd = self.cmd_edit.toPlainText().strip()
@@ -580,41 +742,123 @@ class SSHPage(QWidget):
         self.load_ssh_history()  # 立即刷新列表
         config_manager.increment_stat("ssh_command_count")
 
-        self.log_thread = SSHLogThread(self.ssh_client, cmd)
-        self.log_thread.log_received.connect(self.append_log)
-        self.log_thread.finished.connect(self.on_log_finished)
-        self.log_thread.start()
-        self.start_btn.setEnabled(False)
+        self.task_seq += 1
+        task_id = self.task_seq
+        if not self.log_threads:
+            self.log_console.clear()
+        else:
+            self.append_log(f"===== [#{task_id}] {cmd} =====")
+
+        recorder = None
+        if config_manager.get("ssh_record_sessions"):
+            host, port, user = self.ssh_session.key
+            recorder = SessionRecorder(f"{host}:{port}", user, cmd)
+        log_thread = SSHLogThread(self.ssh_session, cmd, self.line_sinks, recorder)
+        # 多个命令并发时给每行加上任务编号
+        log_thread.lines_received.connect(lambda lines: self.append_lines(task_id, lines))
+        log_thread.log_received.connect(lambda log: self.append_lines(task_id, [log]))
+        log_thread.session_changed.connect(self.on_session_changed)
+        log_thread.finished.connect(lambda: self.on_log_finished(task_id))
+        self.log_threads[task_id] = log_thread
+        log_thread.start()
         self.stop_btn.setEnabled(True)
-        self.log_browser.clear()
-        logger.info(f"开始执行SSH命令：{cmd}")
+        logger.info(f"开始执行SSH命令[#{task_id}]：{cmd}")
 
     def stop_realtime_log(self):
-        """停止实时日志查看"""
-        if self.log_thread:
-            self.log_thread.stop()
-            self.start_btn.setEnabled(True)
-            self.stop_btn.setEnabled(False)
+        """停止所有正在执行的命令"""
+        for log_thread in self.log_threads.values():
+            log_thread.stop()
+        if self.log_threads:
             logger.info("停止SSH命令执行")
+        self.stop_btn.setEnabled(False)
 
     def append_log(self, log):
         """追加日志"""
-        self.log_browser.append(log)
-        self.log_browser.moveCursor(self.log_browser.textCursor().End)
+        self.log_console.append_line(log)
+
+    def append_lines(self, task_id, lines):
+        """按批次追加日志（控制台按帧率统一刷新）"""
+        if len(self.log_threads) > 1:
+            lines = [f"[#{task_id}] {line}" for line in lines]
+        self.log_console.append_lines(lines)
 
-    def on_log_finished(self):
+    def on_log_finished(self, task_id):
         """日志执行完成"""
-        self.start_btn.setEnabled(True)
-        self.stop_btn.setEnabled(False)
-        logger.info("SSH命令执行完成")
+        log_thread = self.log_threads.pop(task_id, None)
+        if log_thread:
+            log_thread.wait()  # finished 在 run() 末尾发出，等线程真正退出后再释放
+        self.stop_btn.setEnabled(bool(self.log_threads))
+        logger.info(f"SSH命令[#{task_id}]执行完成")
+
+    def on_session_changed(self, session):
+        """后台重连成功：页面切换到新会话"""
+        if self.ssh_session and self.ssh_session.key == session.key:
+            self.ssh_session = session
+
+    def update_session_status(self):
+        """刷新会话状态：主机、并发通道数、会话池大小"""
+        if not self.ssh_session:
+            self.session_label.setText("未连接")
+            return
+        host, port, user = self.ssh_session.key
+        state = "已连接" if self.ssh_session.is_active() else "已断开"
+        self.session_label.setText(
+            f"{user}@{host}:{port} {state} | 通道：{self.ssh_session.channels} | "
+            f"会话池：{len(ssh_sessions.list_sessions())}")
+
+    def toggle_analytics(self, enabled):
+        """开关访问日志实时分析（对正在执行的命令立即生效）"""
+        if enabled:
+            from ui.widgets.analytics_panel import AnalyticsPanel
+            self.analytics_panel = AnalyticsPanel()
+            self.analytics_layout.addWidget(self.analytics_panel, 2)
+            self.line_sinks.append(self.analytics_panel.feed_lines)
+        elif self.analytics_panel:
+            self.line_sinks.remove(self.analytics_panel.feed_lines)
+            self.analytics_panel.deleteLater()
+            self.analytics_panel = None
+
+    def open_fanout(self):
+        """打开批量执行窗口（带入当前命令）"""
+        from ui.dialogs.fanout_dialog import FanoutDialog
+        FanoutDialog(self.cmd_edit.toPlainText().strip(), self).exec_()
+
+    def open_multitail(self):
+        """打开多机日志跟踪窗口"""
+        from ui.dialogs.multitail_dialog import MultiTailDialog
+        MultiTailDialog(self).exec_()
+
+    def open_metrics(self):
+        """打开主机监控窗口"""
+        from ui.dialogs.metrics_dialog import MetricsDialog
+        MetricsDialog(self).exec_()
+
+    def open_replay(self):
+        """打开会话录像回放窗口"""
+        from ui.dialogs.replay_dialog import ReplayDialog
+        ReplayDialog(self).exec_()
+
+    def open_sftp(self):
+        """打开文件传输窗口（非模态；同一会话复用同一个传输队列）"""
+        if not self.ssh_session or not self.ssh_session.is_active():
+            show_warn("警告", "请先建立SSH连接！")
+            return
+        if self.sftp_dialog and self.sftp_dialog.session is not self.ssh_session:
+            self.sftp_dialog.shutdown()
+            self.sftp_dialog.deleteLater()
+            self.sftp_dialog = None
+        if not self.sftp_dialog:
+            from ui.dialogs.sftp_dialog import SFTPDialog
+            self.sftp_dialog = SFTPDialog(self.ssh_session, self)
+        self.sftp_dialog.show()
+        self.sftp_dialog.raise_()
 
     def copy_log(self):
         """复制日志"""
-        text = self.log_browser.toPlainText()
-        if not text:
+        if not self.log_console.capture.line_count:
             show_warn("警告", "日志为空！")
             return
-        from PyQt5.QtWidgets import QApplication
-        clipboard = QApplication.clipboard()
-        clipboard.setText(text)
+        if not self.log_console.copy_all():
+            show_warn("警告", "日志过大，请使用下方的“导出”保存到文件")
+            return
         show_info("成功", "日志已复制到剪贴板")
\ No newline at end of file
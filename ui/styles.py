@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# 新增对话框共用的控件样式（与各页面内的样式方法保持一致）
+
+PRIMARY_BTN = """
+    QPushButton {
+        background-color: #4285f4;
+        color: white;
+        border: none;
+        border-radius: 8px;
+        padding: 8px 18px;
+        font-size: 14px;
+        font-weight: 500;
+        min-height: 34px;
+    }
+    QPushButton:hover {
+        background-color: #3367d6;
+    }
+    QPushButton:disabled {
+        background-color: #a0c0f8;
+    }
+"""
+
+SECONDARY_BTN = """
+    QPushButton {
+        background-color: #f1f3f4;
+        color: #202124;
+        border: none;
+        border-radius: 8px;
+        padding: 8px 18px;
+        font-size: 14px;
+        font-weight: 500;
+        min-height: 34px;
+    }
+    QPushButton:hover {
+        background-color: #e8eaed;
+    }
+"""
+
+WARN_BTN = """
+    QPushButton {
+        background-color: #f57c00;
+        color: white;
+        border: none;
+        border-radius: 8px;
+        padding: 8px 18px;
+        font-size: 14px;
+        font-weight: 500;
+        min-height: 34px;
+    }
+    QPushButton:hover {
+        background-color: #e06c00;
+    }
+    QPushButton:disabled {
+        background-color: #f5c08a;
+    }
+"""
+
+INPUT = """
+    QLineEdit, QComboBox, QSpinBox, QDoubleSpinBox {
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+        padding: 6px 10px;
+        font-size: 14px;
+        background-color: #fafafa;
+        min-height: 30px;
+    }
+"""
+
+EDITOR = """
+    QPlainTextEdit, QTextEdit {
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+        padding: 8px;
+        font-family: Consolas, "Courier New", monospace;
+        font-size: 14px;
+        background-color: #fafafa;
+    }
+"""
+
+TABLE = """
+    QTableWidget, QTreeWidget, QListWidget {
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+        font-size: 13px;
+        background-color: #fafafa;
+    }
+"""
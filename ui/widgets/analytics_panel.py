@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+    QHeaderView, QSizePolicy
+)
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+from core.log_analytics import LogAnalyzer
+
+
+class AnalyticsPanel(QWidget):
+    """访问日志实时分析面板：每秒从 LogAnalyzer 取一次快照刷新"""
+
+    def __init__(self, window=60, parent=None):
+        super().__init__(parent)
+        self.analyzer = LogAnalyzer(window)
+        self.init_ui()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def init_ui(self):
+        self.setMinimumWidth(280)
+        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+
+        title = QLabel(f"实时分析（最近 {self.analyzer.window} 秒）")
+        title.setFont(QFont("Microsoft YaHei", 12, QFont.Bold))
+        title.setStyleSheet("color: #34495e;")
+        layout.addWidget(title)
+
+        self.summary_label = QLabel("等待日志...")
+        self.summary_label.setWordWrap(True)
+        self.summary_label.setStyleSheet("font-size: 13px; color: #2c3e50;")
+        layout.addWidget(self.summary_label)
+
+        self.status_table = self.create_table(["状态码", "次数", "占比"])
+        layout.addWidget(self.status_table, 1)
+
+        self.path_table = self.create_table(["路径", "次数"])
+        layout.addWidget(self.path_table, 2)
+
+    def create_table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        table.setStyleSheet("""
+            QTableWidget {
+                border: 1px solid #e0e0e0;
+                border-radius: 8px;
+                font-size: 12px;
+                background-color: #fafafa;
+            }
+        """)
+        return table
+
+    def feed_lines(self, lines):
+        self.analyzer.feed_lines(lines)
+
+    @staticmethod
+    def fill_table(table, rows):
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(str(value)))
+
+    def refresh(self):
+        snap = self.analyzer.snapshot()
+        if not snap["parsed"]:
+            if snap["skipped"]:
+                self.summary_label.setText(f"未识别的日志行：{snap['skipped']}（支持 combined / JSON 格式）")
+            return
+
+        def ms(value):
+            return f"{value:.1f} ms" if value is not None else "-"
+
+        self.summary_label.setText(
+            f"请求/秒：{snap['rps']:.1f}    窗口内：{snap['total']}\n"
+            f"延迟 P50：{ms(snap['p50'])}  P90：{ms(snap['p90'])}  P99：{ms(snap['p99'])}\n"
+            f"已解析 {snap['parsed']} 行，跳过 {snap['skipped']} 行"
+        )
+        total = snap["total"] or 1
+        self.fill_table(self.status_table, [
+            (status, count, f"{count * 100 / total:.1f}%") for status, count in snap["status"]
+        ])
+        self.fill_table(self.path_table, snap["top_paths"])
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+import os
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit,
+    QPushButton, QLabel, QSizePolicy, QShortcut, QFileDialog, QApplication
+)
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCursor, QKeySequence
+from app.config_manager import config_manager
+from utils.ui_util import show_info, show_error
+from core.capture import CaptureStore
+from ui.widgets.spool_view import SpoolView, COPY_MAX_BYTES
+
+
+class ConsoleWidget(QWidget):
+    """高吞吐输出控制台：行先进缓冲区，按帧率批量刷到界面；支持暂停/跟随
+
+    所有输出同时写入捕获存储（临时文件 + 索引），搜索覆盖完整输出，不受界面行数上限影响。
+    输出超过 console_spool_lines 行后切换为大输出模式：文本框释放，改由 SpoolView 从临时文件按需显示可见的行，
+    文本框因此最多保留 console_spool_lines 行；
+    复制/导出/toPlainText 都从临时文件读取完整输出。
+    """
+
+    def __init__(self, min_height=300, parent=None):
+        super().__init__(parent)
+        self.spool_lines = config_manager.get("console_spool_lines")
+        # 待刷新的行：攒满上限时下一帧必然转入大输出模式（从临时文件显示），更早的行直接丢弃
+        self.pending = deque(maxlen=self.spool_lines)
+        # 待交给捕获存储的行：每帧一批，写入线程每批只写一次文件、flush 一次
+        self.capture_pending = []
+        self.paused = False
+        self.follow = True
+        self.flushing = False
+        self.spooled = False
+        self.capture = CaptureStore()
+        # 控件销毁时关闭临时文件（capture 不是 QObject，连接会保持它存活到信号发出）
+        self.destroyed.connect(self.capture.close)
+        self.search_dialog = None
+        self.init_ui(min_height)
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start(1000 // config_manager.get("console_fps"))
+
+    def init_ui(self, min_height):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(6)
+
+        self.text_edit = QPlainTextEdit()
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setUndoRedoEnabled(False)
+        self.text_edit.setMaximumBlockCount(self.spool_lines)
+        self.text_edit.setStyleSheet(f"""
+            QPlainTextEdit {{
+                border: 1px solid #e0e0e0;
+                border-radius: 8px;
+                padding: 12px;
+                font-family: Consolas, "Courier New", monospace;
+                font-size: 14px;
+                background-color: #fafafa;
+                min-height: {min_height}px;
+            }}
+        """)
+        self.text_edit.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        # 手动向上滚动时自动取消跟随，滚回底部恢复
+        self.text_edit.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        layout.addWidget(self.text_edit, 1)
+
+        self.spool_view = SpoolView(self.capture)
+        self.spool_view.setMinimumHeight(min_height)
+        self.spool_view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.spool_view.scrolled.connect(self.on_spool_scroll)
+        self.spool_view.hide()
+        layout.addWidget(self.spool_view, 1)
+
+        bar = QHBoxLayout()
+        bar.setSpacing(8)
+        self.pause_btn = QPushButton("暂停")
+        self.pause_btn.setCheckable(True)
+        self.pause_btn.setStyleSheet(self.bar_btn_style())
+        self.pause_btn.toggled.connect(self.set_paused)
+        bar.addWidget(self.pause_btn)
+
+        self.follow_btn = QPushButton("跟随")
+        self.follow_btn.setCheckable(True)
+        self.follow_btn.setChecked(True)
+        self.follow_btn.setStyleSheet(self.bar_btn_style())
+        self.follow_btn.toggled.connect(self.set_follow)
+        bar.addWidget(self.follow_btn)
+
+        self.search_btn = QPushButton("搜索")
+        self.search_btn.setStyleSheet(self.bar_btn_style())
+        self.search_btn.clicked.connect(self.open_search)
+        bar.addWidget(self.search_btn)
+        QShortcut(QKeySequence.Find, self, self.open_search)
+
+        self.export_btn = QPushButton("导出")
+        self.export_btn.setStyleSheet(self.bar_btn_style())
+        self.export_btn.clicked.connect(self.export)
+        bar.addWidget(self.export_btn)
+
+        bar.addStretch()
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #7f8c8d; font-size: 12px;")
+        bar.addWidget(self.status_label)
+        layout.addLayout(bar)
+
+    def bar_btn_style(self):
+        return """
+            QPushButton {
+                background-color: #f1f3f4;
+                color: #202124;
+                border: none;
+                border-radius: 6px;
+                padding: 4px 12px;
+                font-size: 12px;
+                min-height: 26px;
+            }
+            QPushButton:checked {
+                background-color: #4285f4;
+                color: white;
+            }
+        """
+
+    # ========== 写入 ==========
+    def append_line(self, line):
+        self.append_lines([line])
+
+    def append_lines(self, lines):
+        if not self.spooled:
+            self.pending.extend(lines)
+        self.capture_pending.extend(lines)
+
+    def commit_capture(self):
+        """把本帧攒下的行交给捕获存储（暂停时同样照常捕获）"""
+        if self.capture_pending:
+            lines, self.capture_pending = self.capture_pending, []
+            self.capture.append(lines)
+
+    def flush(self):
+        """定时器回调：把缓冲区一次性插入文档（每帧一次重排）；大输出模式下只更新查看器的滚动范围"""
+        self.commit_capture()
+        if self.paused:
+            return
+        # 捕获存储的行数在写入线程落盘后才更新，同时按文本框将要显示的行数判断，避免文本框先被裁掉旧行
+        if not self.spooled and (self.capture.line_count > self.spool_lines
+                                 or self.text_edit.blockCount() + len(self.pending) > self.spool_lines):
+            self.enter_spool_mode()
+        if self.spooled:
+            if self.spool_view.shown_lines != self.capture.line_count:
+                self.flushing = True
+                self.spool_view.refresh(self.follow)
+                self.flushing = False
+                self.update_status()
+            return
+        if not self.pending:
+            return
+        text = "\n".join(self.pending)
+        self.pending.clear()
+        self.flushing = True
+        scrollbar = self.text_edit.verticalScrollBar()
+        position = scrollbar.value()
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        if not self.text_edit.document().isEmpty():
+            cursor.insertBlock()
+        cursor.insertText(text)
+        cursor.endEditBlock()
+        if self.follow:
+            scrollbar.setValue(scrollbar.maximum())
+        else:
+            scrollbar.setValue(position)
+        self.flushing = False
+        self.update_status()
+
+    def enter_spool_mode(self):
+        """切换为大输出模式：释放文本框中的内容，之后的显示全部从临时文件读取"""
+        self.spooled = True
+        self.pending.clear()
+        self.text_edit.clear()
+        self.text_edit.hide()
+        self.spool_view.show()
+        self.spool_view.refresh(self.follow)
+
+    def leave_spool_mode(self):
+        self.spooled = False
+        self.spool_view.clear_selection()
+        self.spool_view.hide()
+        self.text_edit.show()
+
+    def update_status(self):
+        if self.spooled:
+            size = self.capture.size / 1024 / 1024
+            waiting = " | 暂停中" if self.paused else ""
+            self.status_label.setText(f"{self.capture.line_count} 行，{size:.1f} MB（大输出模式，从临时文件按需显示）{waiting}")
+            return
+        count = self.text_edit.blockCount() if not self.text_edit.document().isEmpty() else 0
+        waiting = f" | 暂停中，待显示 {len(self.pending)} 行" if self.paused and self.pending else ""
+        captured = f" | 已捕获 {self.capture.line_count} 行" if self.capture.line_count > count else ""
+        self.status_label.setText(f"{count}/{self.spool_lines} 行{captured}{waiting}")
+
+    # ========== 暂停/跟随 ==========
+    def set_paused(self, paused):
+        self.paused = paused
+        self.pause_btn.setText("继续" if paused else "暂停")
+        if not paused:
+            self.flush()
+        self.update_status()
+
+    def set_follow(self, follow):
+        self.follow = follow
+        if follow:
+            scrollbar = (self.spool_view if self.spooled else self.text_edit).verticalScrollBar()
+            scrollbar.setValue(scrollbar.maximum())
+
+    def on_scroll(self, value):
+        if self.flushing:
+            return
+        at_bottom = value >= self.text_edit.verticalScrollBar().maximum()
+        if at_bottom != self.follow:
+            self.follow_btn.setChecked(at_bottom)
+
+    def on_spool_scroll(self, at_bottom):
+        if not self.flushing and at_bottom != self.follow:
+            self.follow_btn.setChecked(at_bottom)
+
+    # ========== 复制/导出（从临时文件读取完整输出） ==========
+    def copy_all(self):
+        """复制完整输出到剪贴板，返回是否成功；超过 COPY_MAX_BYTES 时不复制（应改用导出）"""
+        self.commit_capture()
+        self.capture.sync()
+        if self.capture.size > COPY_MAX_BYTES:
+            return False
+        QApplication.clipboard().setText(self.toPlainText())
+        return True
+
+    def export(self):
+        self.commit_capture()
+        self.capture.sync()
+        if not self.capture.line_count:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出输出", os.path.join(os.path.expanduser("~"), "output.txt"), "文本文件 (*.txt *.log);;所有文件 (*.*)")
+        if not file_path:
+            return
+        try:
+            lines = self.capture.export(file_path)
+            show_info("成功", f"已导出 {lines} 行到：{file_path}")
+        except OSError as e:
+            show_error("失败", f"导出失败：{str(e)}")
+
+    # ========== 搜索 ==========
+    def open_search(self):
+        if self.search_dialog is None:
+            from ui.dialogs.search_dialog import CaptureSearchDialog
+            self.search_dialog = CaptureSearchDialog(self.capture, parent=self)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.query_edit.setFocus()
+        self.search_dialog.query_edit.selectAll()
+
+    # ========== 兼容 QTextBrowser 的常用接口 ==========
+    def clear(self):
+        self.pending.clear()
+        self.capture_pending = []
+        self.capture.reset()
+        self.text_edit.clear()
+        if self.spooled:
+            self.leave_spool_mode()
+        self.update_status()
+
+    def setText(self, text):
+        self.clear()
+        self.append_line(text)
+        self.flush()
+
+    def toPlainText(self):
+        """完整输出（从临时文件读取，不受界面行数上限影响）"""
+        self.commit_capture()
+        self.capture.sync()
+        return self.capture.read_range(0, self.capture.line_count).rstrip("\n")
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
+
+
+class Sparkline(QWidget):
+    """迷你折线图：只画一条折线和当前值，缺失的点（None）断开"""
+
+    def __init__(self, title, color="#4285f4", fixed_max=None, formatter=None, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.color = QColor(color)
+        self.fixed_max = fixed_max
+        self.formatter = formatter or (lambda v: f"{v:.1f}")
+        self.values = []
+        self.setMinimumHeight(70)
+
+    def set_values(self, values):
+        self.values = values
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = self.rect().adjusted(4, 20, -4, -4)
+        painter.fillRect(self.rect(), QColor("#fafafa"))
+        painter.setPen(QColor("#e0e0e0"))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+        present = [v for v in self.values if v is not None]
+        current = self.formatter(present[-1]) if present else "-"
+        font = painter.font()
+        font.setPointSize(9)
+        painter.setFont(font)
+        painter.setPen(QColor("#34495e"))
+        painter.drawText(self.rect().adjusted(6, 2, -6, 0), Qt.AlignLeft | Qt.AlignTop, self.title)
+        painter.drawText(self.rect().adjusted(6, 2, -6, 0), Qt.AlignRight | Qt.AlignTop, current)
+        if len(self.values) < 2 or not present:
+            return
+
+        top = self.fixed_max or max(max(present), 1e-9)
+        step = rect.width() / (len(self.values) - 1)
+        painter.setPen(QPen(self.color, 1.5))
+        segment = QPolygonF()
+        for i, value in enumerate(self.values):
+            if value is None:
+                if segment.size() > 1:
+                    painter.drawPolyline(segment)
+                segment = QPolygonF()
+                continue
+            y = rect.bottom() - min(value / top, 1.0) * rect.height()
+            segment.append(QPointF(rect.left() + i * step, y))
+        if segment.size() > 1:
+            painter.drawPolyline(segment)
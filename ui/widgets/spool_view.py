@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+from PyQt5.QtWidgets import QAbstractScrollArea, QApplication
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QPainter, QFont, QFontMetrics, QColor, QKeySequence
+
+
+COPY_MAX_BYTES = 64 * 1024 * 1024  # 复制到剪贴板的上限，更大的输出请导出到文件
+MAX_LINE_CHARS = 2000  # 单行最多绘制的字符数
+
+
+class SpoolView(QAbstractScrollArea):
+    """大输出查看器：直接从捕获存储（临时文件的内存映射）读取可见范围内的行绘制，内存占用与输出大小无关
+
+    滚动条以行为单位；支持按行选择（单击、拖动、Shift+单击，Ctrl+A 全选），Ctrl+C 从文件复制选中的行。
+    """
+
+    scrolled = pyqtSignal(bool)  # 是否在底部
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.anchor = None  # 选择的起止行（含）
+        self.cursor_line = None
+        self.shown_lines = 0  # 上次 refresh 时的总行数
+        self.setFont(QFont("Consolas", 11))
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        self.setStyleSheet("""
+            QAbstractScrollArea {
+                border: 1px solid #e0e0e0;
+                border-radius: 8px;
+                background-color: #fafafa;
+            }
+        """)
+
+    # ========== 布局 ==========
+    def line_height(self):
+        return QFontMetrics(self.font()).lineSpacing()
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height())
+
+    def gutter_width(self):
+        return QFontMetrics(self.font()).horizontalAdvance(str(max(self.store.line_count, 1))) + 16
+
+    def refresh(self, follow=False):
+        """输出增加后调用：更新滚动范围，跟随时滚到底部"""
+        self.shown_lines = self.store.line_count
+        self.update_range()
+        if follow:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        self.viewport().update()
+
+    def update_range(self):
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setRange(0, max(0, self.shown_lines - self.visible_lines()))
+        scrollbar.setPageStep(self.visible_lines())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        self.update_range()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def on_scroll(self, value):
+        self.scrolled.emit(value >= self.verticalScrollBar().maximum())
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        metrics = QFontMetrics(self.font())
+        height = metrics.lineSpacing()
+        first = self.verticalScrollBar().value()
+        lines = self.store.read_lines(first, first + self.visible_lines() + 1)
+        gutter = self.gutter_width()
+        left = gutter - self.horizontalScrollBar().value()
+        selection = self.selection()
+        widest = 0
+        painter.fillRect(0, 0, gutter - 6, self.viewport().height(), QColor("#f1f3f4"))
+        for i, text in enumerate(lines):
+            line = first + i
+            y = i * height
+            if selection and selection[0] <= line <= selection[1]:
+                painter.fillRect(gutter - 6, y, self.viewport().width(), height, QColor("#c8ddfb"))
+            text = text[:MAX_LINE_CHARS]
+            painter.setPen(QColor("#d93025") if text.startswith("错误：") else QColor("#202124"))
+            painter.drawText(left, y + metrics.ascent(), text)
+            widest = max(widest, metrics.horizontalAdvance(text))
+            painter.fillRect(0, y, gutter - 6, height, QColor("#f1f3f4"))
+            painter.setPen(QColor("#80868b"))
+            painter.drawText(0, y, gutter - 12, height, Qt.AlignRight | Qt.AlignVCenter, str(line + 1))
+        painter.end()
+        # 横向滚动范围按当前可见行的最大宽度
+        hbar = self.horizontalScrollBar()
+        hbar.setRange(0, max(0, widest + gutter - self.viewport().width() + 20))
+        hbar.setPageStep(self.viewport().width())
+
+    # ========== 选择/复制 ==========
+    def line_at(self, y):
+        line = self.verticalScrollBar().value() + int(y // self.line_height())
+        return max(0, min(line, self.store.line_count - 1))
+
+    def selection(self):
+        if self.anchor is None or self.cursor_line is None:
+            return None
+        return min(self.anchor, self.cursor_line), max(self.anchor, self.cursor_line)
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton or not self.store.line_count:
+            return
+        line = self.line_at(event.pos().y())
+        if not (event.modifiers() & Qt.ShiftModifier and self.anchor is not None):
+            self.anchor = line
+        self.cursor_line = line
+        self.viewport().update()
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self.anchor is not None:
+            self.cursor_line = self.line_at(event.pos().y())
+            self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.SelectAll) and self.store.line_count:
+            self.anchor, self.cursor_line = 0, self.store.line_count - 1
+            self.viewport().update()
+        elif event.matches(QKeySequence.Copy):
+            self.copy_selection()
+        else:
+            super().keyPressEvent(event)
+
+    def copy_selection(self):
+        """把选中的行从文件读出复制到剪贴板，返回是否成功（超过上限时不复制）"""
+        selection = self.selection()
+        if not selection:
+            return False
+        with self.store.lock:
+            start = self.store.line_offset(selection[0])
+            end = self.store.line_offset(selection[1] + 1)
+        if end - start > COPY_MAX_BYTES:
+            return False
+        QApplication.clipboard().setText(self.store.read_range(selection[0], selection[1] + 1).rstrip("\n"))
+        return True
+
+    def clear_selection(self):
+        self.anchor = self.cursor_line = None
+        self.viewport().update()
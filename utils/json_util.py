@@ -2,8 +2,14 @@
 # -*- coding: utf-8 -*-
 import json
 import os
+import stat
+import tempfile
 from utils.paths import get_config_path
 
+# 进程的 umask（只能通过设置再恢复读取，导入时读一次）
+UMASK = os.umask(0)
+os.umask(UMASK)
+
 def read_json(filename, default=None):
     path = os.path.join(get_config_path(), filename)
     if not os.path.exists(path):
@@ -17,5 +23,27 @@ def read_json(filename, default=None):
 def write_json(filename, data):
     path = os.path.join(get_config_path(), filename)
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+    dump_json(path, data)
+
+def dump_json(path, data, indent=4):
+    """原子写入：先写同目录下的临时文件（名称唯一，并发写入互不覆盖）再改名替换，中途崩溃不会留下写了一半的文件
+
+    mkstemp 建出的临时文件权限为 0600，改名前改为原文件的权限（新文件按 umask 取默认权限）
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
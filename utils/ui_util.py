@@ -11,4 +11,9 @@ def show_warn(title, text):
 
 def show_error(title, text):
     """显示错误弹窗"""
-    QMessageBox.critical(None, title, text)
\ No newline at end of file
+    QMessageBox.critical(None, title, text)
+
+
+def ask_confirm(title, text):
+    """确认弹窗，选择“是”返回 True"""
+    return QMessageBox.question(None, title, text, QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes